@@ -5,7 +5,6 @@
 #     "textual>=0.41.0",
 #     "aiosqlite>=0.19.0",
 #     "rich>=13.5.0",
-#     "pyperclip>=1.8.2",
 # ]
 # ///
 
@@ -17,29 +16,80 @@ stored in a SQLite database. Features multi-pane layout with overview
 statistics, event stream, filters, and detailed event information.
 
 Usage:
-    ./claude-dashboard.py [--db PATH] [--config PATH]
+    ./claude-dashboard.py [--db [NAME=]PATH ...] [--config PATH]
+
+Settings are read from ~/.claude/dashboard.toml when it exists, or from
+--config. Every setting is optional; an unknown one is an error, so a typo
+is not silently ignored:
+
+    [refresh]
+    poll_interval = 1.0   # seconds between checks for new events
+    idle_interval = 5.0   # the same, once nothing has arrived for idle_after
+    idle_after = 30.0
+    budget_ms = 500       # per refresh; the stats are skipped for that
+                          # refresh once the event page used it up
+    debounce_ms = 150     # quiet time after a filter change before refreshing
+
+    [display]
+    page_size = 1000      # events loaded into the stream
+    auto_follow = true
+    filter_sessions = 100 # most recent sessions listed in the filters
+
+    [database]
+    cache_mb = 0          # SQLite page cache per connection; 0 keeps its default
+
+    [views]
+    sessions = 200        # rows in the sessions, subagents and errors views
+    agent_sessions = 100
+    error_clusters = 50
+
+    [panels]
+    overview = true       # a hidden panel's queries are not run at all
+    details = true
+    filters = true
+
+    [filters]             # selected at startup
+    projects = ["dotfiles"]
+    types = []
+    sources = []
+
+--db may be given more than once, one per machine's events.db (synced
+copies from dev boxes and CI runners, say). The sources are queried
+concurrently and their events merged newest first; a Sources filter
+appears when there is more than one.
 """
 
 import asyncio
+import dataclasses
 import json
 import logging
 import sys
-from dataclasses import dataclass
+import time
+import tomllib
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set
 
-import aiosqlite
+from rich.cells import cell_len
 from rich.console import RenderableType
+from rich.highlighter import JSONHighlighter
+from rich.markup import escape
 from rich.panel import Panel
 from rich.text import Text
 from textual import on, work
+from textual._two_way_dict import TwoWayDict
 from textual.app import App, ComposeResult
 from textual.binding import Binding
+from textual.cache import LRUCache
 from textual.containers import Container, Vertical
+from textual.geometry import Size
 from textual.reactive import reactive
+from textual.timer import Timer
 from textual.screen import ModalScreen
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
 from textual.widget import Widget
 from textual.widgets import (
     DataTable,
@@ -49,268 +99,147 @@ from textual.widgets import (
     Label,
     Static,
     Checkbox,
+    Tree,
 )
+from textual.widgets.data_table import CellKey, RowKey
+
+from claude_events import (
+    AgentSession,
+    DatabaseHealth,
+    ErrorCluster,
+    Event,
+    EventStatus,
+    FederatedDatabase,
+    SearchError,
+    SessionSummary,
+    parse_search,
+    parse_sources,
+)
+import event_store  # put on sys.path by claude_events
+
 
+CONFIG_PATH = Path("~/.claude/dashboard.toml")
 
-class EventStatus(Enum):
-    """Event status types"""
 
-    SUCCESS = "success"
-    ERROR = "error"
-    WARNING = "warning"
+@dataclass
+class RefreshConfig:
+    poll_interval: float = 1.0
+    idle_interval: float = 5.0
+    idle_after: float = 30.0
+    budget_ms: int = 500
+    debounce_ms: int = field(default=150, metadata={"minimum": 0})
 
 
 @dataclass
-class Event:
-    """Event data model"""
-
-    id: str
-    timestamp: int
-    type: str
-    project: Optional[str]
-    status: EventStatus
-    session_id: Optional[str]
-    tool: Optional[str]
-    prompt: Optional[str]
-    input: Optional[Dict[str, Any]]
-    output: Optional[Dict[str, Any]]
-    duration_ms: Optional[int]
-    error_details: Optional[str]
-
-    @property
-    def timestamp_str(self) -> str:
-        """Format timestamp as HH:MM:SS"""
-        return datetime.fromtimestamp(self.timestamp / 1000).strftime("%H:%M:%S")
-
-    @property
-    def status_icon(self) -> str:
-        """Get status icon"""
-        return {
-            EventStatus.SUCCESS: "✓",
-            EventStatus.ERROR: "✗",
-            EventStatus.WARNING: "⚠",
-        }[self.status]
-
-    @property
-    def status_color(self) -> str:
-        """Get status color"""
-        return {
-            EventStatus.SUCCESS: "green",
-            EventStatus.ERROR: "red",
-            EventStatus.WARNING: "yellow",
-        }[self.status]
-
-
-class DatabaseManager:
-    """SQLite database connection manager"""
+class DisplayConfig:
+    page_size: int = 1000
+    auto_follow: bool = True
+    filter_sessions: int = 100
 
-    logger = logging.getLogger(__name__)
 
-    def __init__(self, db_path: str):
-        self.db_path = Path(db_path).expanduser()
-        self.connection: Optional[aiosqlite.Connection] = None
+@dataclass
+class DatabaseConfig:
+    cache_mb: int = field(default=0, metadata={"minimum": 0})
 
-    async def connect(self):
-        """Establish database connection"""
-        self.logger.info(f"Connecting to database at {self.db_path}")
-        self.connection = await aiosqlite.connect(self.db_path, timeout=30.0)
-        self.connection.row_factory = aiosqlite.Row
-        self.logger.info("Database connection established")
 
-    async def close(self):
-        """Close database connection"""
-        if self.connection:
-            await self.connection.close()
+@dataclass
+class ViewsConfig:
+    sessions: int = 200
+    agent_sessions: int = 100
+    error_clusters: int = 50
 
-    async def get_events(
-        self,
-        limit: int = 1000,
-        offset: int = 0,
-        projects: Optional[Set[str]] = None,
-        types: Optional[Set[str]] = None,
-        sessions: Optional[Set[str]] = None,
-        search: Optional[str] = None,
-    ) -> List[Event]:
-        """Fetch events with optional filters"""
-        query = "SELECT * FROM claude_events WHERE 1=1"
-        params = []
-
-        if projects:
-            placeholders = ",".join("?" * len(projects))
-            query += f" AND project_name IN ({placeholders})"
-            params.extend(projects)
-
-        if types:
-            placeholders = ",".join("?" * len(types))
-            query += f" AND hook_type IN ({placeholders})"
-            params.extend(types)
-
-        if sessions:
-            placeholders = ",".join("?" * len(sessions))
-            query += f" AND session_id IN ({placeholders})"
-            params.extend(sessions)
-
-        if search:
-            query += " AND (event_id LIKE ? OR hook_type LIKE ? OR user_prompt LIKE ? OR tool_name LIKE ?)"
-            search_param = f"%{search}%"
-            params.extend([search_param] * 4)
-
-        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-
-        async with self.connection.execute(query, params) as cursor:
-            rows = await cursor.fetchall()
-            return [self._row_to_event(row) for row in rows]
-
-    async def get_latest_timestamp(self) -> Optional[str]:
-        """Get the timestamp of the most recent event"""
-        query = "SELECT MAX(created_at) as max_ts FROM claude_events"
-        async with self.connection.execute(query) as cursor:
-            row = await cursor.fetchone()
-            return row["max_ts"] if row else None
-
-    async def get_stats(
-        self,
-        projects: Optional[Set[str]] = None,
-        types: Optional[Set[str]] = None,
-        sessions: Optional[Set[str]] = None,
-    ) -> Dict[str, int]:
-        """Get event statistics"""
-        base_where = "WHERE 1=1"
-        params = []
-
-        if projects:
-            placeholders = ",".join("?" * len(projects))
-            base_where += f" AND project_name IN ({placeholders})"
-            params.extend(projects)
-
-        if types:
-            placeholders = ",".join("?" * len(types))
-            base_where += f" AND hook_type IN ({placeholders})"
-            params.extend(types)
-
-        if sessions:
-            placeholders = ",".join("?" * len(sessions))
-            base_where += f" AND session_id IN ({placeholders})"
-            params.extend(sessions)
-
-        # Get total count
-        total_query = f"SELECT COUNT(*) as count FROM claude_events {base_where}"
-        async with self.connection.execute(total_query, params) as cursor:
-            total_row = await cursor.fetchone()
-            total = total_row["count"]
-
-        # Since we don't have status in the schema, we'll derive it from the data
-        # For now, we'll get all events and derive status from tool_output
-        events_query = f"SELECT tool_output FROM claude_events {base_where}"
-        async with self.connection.execute(events_query, params) as cursor:
-            rows = await cursor.fetchall()
-
-        stats = {"total": total, "success": 0, "error": 0, "warning": 0}
-
-        for row in rows:
-            status = "success"  # Default
-            if row["tool_output"]:
-                try:
-                    output = json.loads(row["tool_output"])
-                    if isinstance(output, dict):
-                        if output.get("error") or output.get("exit_code", 0) != 0:
-                            status = "error"
-                        elif output.get("warning"):
-                            status = "warning"
-                except (json.JSONDecodeError, TypeError):
-                    pass
-
-            stats[status] += 1
-
-        return stats
-
-    async def get_unique_projects(self) -> List[str]:
-        """Get list of unique project names"""
-        query = "SELECT DISTINCT project_name FROM claude_events WHERE project_name IS NOT NULL ORDER BY project_name"
-        async with self.connection.execute(query) as cursor:
-            rows = await cursor.fetchall()
-            return [row["project_name"] for row in rows]
-
-    async def get_unique_types(self) -> List[str]:
-        """Get list of unique event types"""
-        query = "SELECT DISTINCT hook_type FROM claude_events ORDER BY hook_type"
-        async with self.connection.execute(query) as cursor:
-            rows = await cursor.fetchall()
-            return [row["hook_type"] for row in rows]
-
-    async def get_unique_sessions(self) -> List[str]:
-        """Get list of unique session IDs"""
-        query = "SELECT DISTINCT session_id FROM claude_events WHERE session_id IS NOT NULL ORDER BY created_at DESC"
-        async with self.connection.execute(query) as cursor:
-            rows = await cursor.fetchall()
-            return [row["session_id"] for row in rows]
-
-    def _row_to_event(self, row: aiosqlite.Row) -> Event:
-        """Convert database row to Event object"""
-        # Parse created_at from SQLite datetime format (YYYY-MM-DD HH:MM:SS) to milliseconds
-        created_at_str = row["created_at"]
-        if created_at_str:
-            try:
-                # SQLite datetime format: "2025-07-27 23:51:43"
-                dt = datetime.strptime(created_at_str, "%Y-%m-%d %H:%M:%S")
-                # Assume UTC timezone
-                dt = dt.replace(tzinfo=timezone.utc)
-                timestamp_ms = int(dt.timestamp() * 1000)
-            except (ValueError, AttributeError):
-                timestamp_ms = int(datetime.now().timestamp() * 1000)
-        else:
-            timestamp_ms = int(datetime.now().timestamp() * 1000)
 
-        # Parse tool input/output
-        tool_input = None
-        tool_output = None
-        if row["tool_input"]:
-            try:
-                tool_input = json.loads(row["tool_input"])
-            except (json.JSONDecodeError, TypeError):
-                tool_input = {"raw": row["tool_input"]}
+@dataclass
+class PanelsConfig:
+    overview: bool = True
+    details: bool = True
+    filters: bool = True
 
-        if row["tool_output"]:
-            try:
-                tool_output = json.loads(row["tool_output"])
-            except (json.JSONDecodeError, TypeError):
-                tool_output = {"raw": row["tool_output"]}
-
-        # Derive status from tool output or event type
-        status = EventStatus.SUCCESS  # Default
-        error_details = None
-
-        if tool_output:
-            # Check for error indicators in output
-            if isinstance(tool_output, dict):
-                if tool_output.get("error") or tool_output.get("exit_code", 0) != 0:
-                    status = EventStatus.ERROR
-                    error_details = str(tool_output.get("error", ""))
-                elif tool_output.get("warning"):
-                    status = EventStatus.WARNING
-
-        # Map fields from actual schema to expected schema
-        return Event(
-            id=row["event_id"],
-            timestamp=timestamp_ms,
-            type=row["hook_type"],
-            project=row["project_name"],
-            status=status,
-            session_id=row["session_id"],
-            tool=row["tool_name"],
-            prompt=row["user_prompt"],
-            input=tool_input,
-            output=tool_output,
-            duration_ms=None,  # Not available in current schema
-            error_details=error_details,
+
+@dataclass
+class FiltersConfig:
+    projects: List[str] = field(default_factory=list)
+    types: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+
+
+@dataclass
+class DashboardConfig:
+    """Settings from the config file; defaults for anything it leaves out"""
+
+    refresh: RefreshConfig = field(default_factory=RefreshConfig)
+    display: DisplayConfig = field(default_factory=DisplayConfig)
+    database: DatabaseConfig = field(default_factory=DatabaseConfig)
+    views: ViewsConfig = field(default_factory=ViewsConfig)
+    panels: PanelsConfig = field(default_factory=PanelsConfig)
+    filters: FiltersConfig = field(default_factory=FiltersConfig)
+
+
+class ConfigError(ValueError):
+    """The config file cannot be read or has a setting it should not"""
+
+
+def check_setting(name: str, setting: dataclasses.Field, value: Any):
+    """Raise ConfigError unless `value` suits the setting's type and range"""
+    default = (
+        setting.default_factory()
+        if callable(setting.default_factory)
+        else setting.default
+    )
+    if isinstance(default, bool):
+        valid = isinstance(value, bool)
+        expected = "true or false"
+    elif isinstance(default, (int, float)):
+        whole = not isinstance(default, float)
+        valid = isinstance(value, int if whole else (int, float)) and not isinstance(
+            value, bool
         )
+        expected = "a whole number" if whole else "a number"
+        minimum = setting.metadata.get("minimum")
+        if valid and minimum is not None and value < minimum:
+            raise ConfigError(f"{name} must be at least {minimum}")
+        if valid and minimum is None and value <= 0:
+            raise ConfigError(f"{name} must be positive")
+    else:
+        valid = isinstance(value, list) and all(isinstance(item, str) for item in value)
+        expected = "a list of strings"
+    if not valid:
+        raise ConfigError(f"{name} must be {expected}, not {value!r}")
+
+
+def load_config(path: Path) -> DashboardConfig:
+    """Read and validate a config file"""
+    try:
+        with open(path.expanduser(), "rb") as f:
+            raw = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        raise ConfigError(f"cannot read {path}: {e}") from e
+
+    config = DashboardConfig()
+    for section_name, values in raw.items():
+        section = getattr(config, section_name, None)
+        if section is None or not isinstance(values, dict):
+            raise ConfigError(f"unknown section [{section_name}]")
+        settings = {setting.name: setting for setting in dataclasses.fields(section)}
+        for key, value in values.items():
+            if key not in settings:
+                raise ConfigError(f"unknown setting {section_name}.{key}")
+            check_setting(f"{section_name}.{key}", settings[key], value)
+            setattr(section, key, value)
+    return config
 
 
 class OverviewPanel(Widget):
     """Overview statistics panel"""
 
     stats = reactive({"total": 0, "success": 0, "error": 0, "warning": 0})
+    burn = reactive({"tokens": 0, "per_minute": 0.0})
+    # capture-event.py's counts of writes it retried, spooled or lost
+    capture = reactive({})
+    # The largest source's WAL; flagged once it outgrows the size limit
+    wal_bytes = reactive(0)
+    stale = reactive(False)
+    loaded = False
 
     def render(self) -> RenderableType:
         """Render the overview panel"""
@@ -332,7 +261,21 @@ Success: {stats["success"]:,}
 Errors: {stats["error"]:,}
 Warnings: {stats["warning"]:,}
 
-{progress_bar} {success_pct}%"""
+{progress_bar} {success_pct}%
+
+Tokens 15m: {format_tokens(self.burn["tokens"])} ({format_tokens(self.burn["per_minute"])}/min)"""
+        capture = self.capture
+        if capture.get("spooled") or capture.get("dropped"):
+            content += (
+                f"\n[yellow]Writes: {capture.get('retries', 0):,} retried, "
+                f"{capture.get('spooled', 0):,} spooled, {capture.get('dropped', 0):,} lost[/yellow]"
+            )
+        elif capture.get("retries"):
+            content += f"\n[dim]Writes: {capture['retries']:,} retried[/dim]"
+        if self.wal_bytes > event_store.WAL_SIZE_LIMIT_BYTES:
+            content += f"\n[yellow]WAL: {format_bytes(self.wal_bytes)}, see health (h)[/yellow]"
+        if self.stale:
+            content += "\n[dim]Not updated: refresh over budget[/dim]"
 
         return Panel(content, title="Overview", border_style="blue")
 
@@ -340,8 +283,23 @@ Warnings: {stats["warning"]:,}
 class FilterPanel(Widget):
     """Inner content for the filter panel"""
 
-    def __init__(self):
+    def __init__(
+        self, sources: Sequence[str] = (), defaults: Optional[FiltersConfig] = None
+    ):
         super().__init__()
+        self.sources = list(sources)
+        defaults = defaults or FiltersConfig()
+        self.default_sources = set(defaults.sources) & set(self.sources)
+        # Projects and types are listed from the database after the first
+        # refresh; until then the defaults stand in for their checkboxes.
+        self.pending_defaults = {
+            "projects": set(defaults.projects),
+            "types": set(defaults.types),
+        }
+        self.loaded = False
+        self.catalog: tuple = ()
+        self.source_checks: List[Checkbox] = []
+        self.all_sources_check: Optional[Checkbox] = None
         self.project_checks: List[Checkbox] = []
         self.type_checks: List[Checkbox] = []
         self.session_checks: List[Checkbox] = []
@@ -352,6 +310,24 @@ class FilterPanel(Widget):
     def compose(self) -> ComposeResult:
         """Create the filter panel UI"""
         with Vertical():
+            # Only worth the space when several databases are open
+            if self.sources:
+                yield Label("Sources", classes="filter-header")
+                self.all_sources_check = Checkbox(
+                    "All Sources", value=not self.default_sources, id="all-sources"
+                )
+                yield self.all_sources_check
+                for source in self.sources:
+                    checkbox = Checkbox(
+                        source,
+                        value=source in self.default_sources,
+                        classes="filter-item",
+                    )
+                    self.source_checks.append(checkbox)
+                    yield checkbox
+
+                yield Label("─" * 20, classes="filter-divider")
+
             yield Label("Projects", classes="filter-header")
             self.all_projects_check = Checkbox(
                 "All Projects", value=True, id="all-projects"
@@ -378,42 +354,73 @@ class FilterPanel(Widget):
     async def update_filters(
         self, projects: List[str], types: List[str], sessions: List[str]
     ):
-        """Update available filters"""
+        """Update available filters
+
+        Unchanged lists are left alone. Each list's checkboxes are mounted
+        together, since mounting thousands of sessions one at a time took
+        the better part of a minute.
+        """
+        if self.loaded and self.catalog == (projects, types, sessions):
+            return
+        self.catalog = (projects, types, sessions)
+
         # Update project filters
         project_container = self.query_one("#project-filters", Container)
         await project_container.remove_children()
-        self.project_checks.clear()
-
-        for project in projects:
-            checkbox = Checkbox(project, value=False, classes="filter-item")
-            self.project_checks.append(checkbox)
-            await project_container.mount(checkbox)
+        default_projects = (
+            self.pending_defaults["projects"] if not self.loaded else set()
+        )
+        self.project_checks = [
+            Checkbox(project, value=project in default_projects, classes="filter-item")
+            for project in projects
+        ]
+        await project_container.mount_all(self.project_checks)
 
         # Update type filters
         type_container = self.query_one("#type-filters", Container)
         await type_container.remove_children()
-        self.type_checks.clear()
-
-        for event_type in types:
-            checkbox = Checkbox(event_type, value=False, classes="filter-item")
-            self.type_checks.append(checkbox)
-            await type_container.mount(checkbox)
+        default_types = self.pending_defaults["types"] if not self.loaded else set()
+        self.type_checks = [
+            Checkbox(
+                event_type, value=event_type in default_types, classes="filter-item"
+            )
+            for event_type in types
+        ]
+        await type_container.mount_all(self.type_checks)
 
         # Update session filters
         session_container = self.query_one("#session-filters", Container)
         await session_container.remove_children()
-        self.session_checks.clear()
-
+        self.session_checks = []
         for session in sessions:
             # Truncate long session IDs for display
             display_text = session[:12] + "..." if len(session) > 12 else session
             checkbox = Checkbox(display_text, value=False, classes="filter-item")
             checkbox.session_id = session  # Store full ID
             self.session_checks.append(checkbox)
-            await session_container.mount(checkbox)
+        await session_container.mount_all(self.session_checks)
+
+        if not self.loaded:
+            self.loaded = True
+            if any(check.value for check in self.project_checks):
+                self.all_projects_check.value = False
+            if any(check.value for check in self.type_checks):
+                self.all_types_check.value = False
+
+    def get_selected_sources(self) -> Optional[Set[str]]:
+        """Get selected sources or None for all"""
+        if not self.all_sources_check or self.all_sources_check.value:
+            return None
+
+        selected = {
+            check.label.plain.strip() for check in self.source_checks if check.value
+        }
+        return selected if selected else None
 
     def get_selected_projects(self) -> Optional[Set[str]]:
         """Get selected projects or None for all"""
+        if not self.loaded:
+            return self.pending_defaults["projects"] or None
         if self.all_projects_check and self.all_projects_check.value:
             return None
 
@@ -424,6 +431,8 @@ class FilterPanel(Widget):
 
     def get_selected_types(self) -> Optional[Set[str]]:
         """Get selected types or None for all"""
+        if not self.loaded:
+            return self.pending_defaults["types"] or None
         if self.all_types_check and self.all_types_check.value:
             return None
 
@@ -444,6 +453,13 @@ class FilterPanel(Widget):
         }
         return selected if selected else None
 
+    @on(Checkbox.Changed, "#all-sources")
+    def handle_all_sources_change(self, event: Checkbox.Changed):
+        """Handle all sources checkbox change"""
+        if event.value:
+            for check in self.source_checks:
+                check.value = False
+
     @on(Checkbox.Changed, "#all-projects")
     def handle_all_projects_change(self, event: Checkbox.Changed):
         """Handle all projects checkbox change"""
@@ -470,7 +486,9 @@ class FilterPanel(Widget):
         """Handle individual filter item change"""
         if event.value:
             # Uncheck "All" when individual item is selected
-            if event.checkbox in self.project_checks and self.all_projects_check:
+            if event.checkbox in self.source_checks and self.all_sources_check:
+                self.all_sources_check.value = False
+            elif event.checkbox in self.project_checks and self.all_projects_check:
                 self.all_projects_check.value = False
             elif event.checkbox in self.type_checks and self.all_types_check:
                 self.all_types_check.value = False
@@ -481,53 +499,230 @@ class FilterPanel(Widget):
 # Remove the duplicate FilterPanel class that was causing issues
 
 
+def status_cell(event: Event) -> Text:
+    status_text = Text(event.status_icon)
+    status_text.stylize(event.status_color)
+    return status_text
+
+
 class EventTable(DataTable):
-    """Event stream table with virtual scrolling"""
+    """Event stream table with virtual scrolling
+
+    Rows are keyed by event, and a refresh touches only what changed: new
+    events are added, a changed status is updated in place and events that
+    fell out of the page are removed. The rows are then numbered in page
+    order once, by key, rather than per removal and by sorting. A page with
+    little in common with the last one is rebuilt instead.
+    """
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.events: List[Event] = []
+        self.by_key: Dict[str, Event] = {}
 
     def on_mount(self):
         """Initialize table columns"""
-        self.add_columns("Time", "Project", "Type", "Status")
+        self.add_column("Time", key="time")
+        self.add_column("Project", key="project")
+        self.add_column("Type", key="type")
+        self.add_column("Status", key="status")
         self.cursor_type = "row"
         self.zebra_stripes = True
 
+    def add_event(self, event: Event):
+        self.add_row(
+            event.timestamp_str,
+            event.project or "—",
+            event.type,
+            status_cell(event),
+            key=event.key,
+        )
+
+    def place_rows(self, keys: List[str]):
+        """Show the rows in the order of `keys`, every row's key once.
+
+        What sort() does once it has the order. Setting the row numbers
+        directly is the only way DataTable offers to order rows by key.
+        """
+        self._row_locations = TwoWayDict(
+            {RowKey(key): index for index, key in enumerate(keys)}
+        )
+        self._update_count += 1
+        self.refresh()
+
+    def remove_rows(self, keys: Iterable[str]):
+        """What remove_row does, for several rows, numbering the rest once."""
+        gone = set(keys)
+        for key in gone:
+            row_key = RowKey(key)
+            for column_key in self._data[row_key]:
+                self._updated_cells.discard(CellKey(row_key, column_key))
+            del self.rows[row_key]
+            del self._data[row_key]
+        self.place_rows([event.key for event in self.events if event.key not in gone])
+        self._require_update_dimensions = True
+        self.cursor_coordinate = self.cursor_coordinate
+        self.refresh(layout=True)
+
     def update_events(self, events: List[Event]):
         """Update displayed events"""
-        self.clear()
-        self.events = events
-
+        incoming = {event.key: event for event in events}
+        gone = [key for key in self.by_key if key not in incoming]
+        if len(gone) > len(incoming) // 2:
+            self.clear()
+            for event in events:
+                self.add_event(event)
+            self.events, self.by_key = events, incoming
+            return
+
+        selected = None
+        if self.row_count:
+            selected = self.coordinate_to_cell_key(self.cursor_coordinate).row_key.value
+
+        if gone:
+            self.remove_rows(gone)
+        added = False
         for event in events:
-            # Format status with color
-            status_text = Text(event.status_icon)
-            status_text.stylize(event.status_color)
-
-            self.add_row(
-                event.timestamp_str,
-                event.project or "—",
-                event.type,
-                status_text,
-                key=event.id,
-            )
+            shown = self.by_key.get(event.key)
+            if shown is None:
+                self.add_event(event)
+                added = True
+            elif shown.status != event.status:
+                self.update_cell(event.key, "status", status_cell(event))
+        self.events, self.by_key = events, incoming
+
+        if added:
+            # New rows were appended; put every row back in page order.
+            self.place_rows(list(incoming))
+        if selected in incoming:
+            self.move_cursor(row=self.get_row_index(selected), scroll=False)
+
+
+# The payload viewer takes this many lines and then lets the screen redraw,
+# so opening a megabyte of tool output never holds up a frame.
+LINES_PER_FRAME = 1000
+# Longer lines are broken up; a long string is a single line of JSON.
+LONGEST_LINE = 1000
+
+
+def decode_column(raw: Optional[str]) -> Any:
+    """A JSON column decoded, or its text if it is not JSON"""
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def payload_sections(payload: Dict[str, Optional[str]], failed: bool) -> List[tuple]:
+    """(title, value) for each part of a stored payload worth showing
+
+    The full event repeats the tool input and output, so it is decoded only
+    for a failure's error or when there is nothing else to show.
+    """
+    tool_input = decode_column(payload["tool_input"])
+    tool_output = decode_column(payload["tool_output"])
+    sections = []
+    if tool_input:
+        sections.append(("Input", tool_input))
+    if tool_output:
+        sections.append(("Output", tool_output))
+    if failed or not sections:
+        full_event = decode_column(payload["full_event"])
+        error = event_store.error_text(
+            full_event if isinstance(full_event, dict) else {}, tool_output
+        )
+        if error:
+            sections.append(("Error", error))
+        elif not sections and full_event:
+            sections.append(("Event", full_event))
+    return sections
+
+
+def pretty_lines(value: Any) -> Iterator[str]:
+    """`value` as indented JSON, a line at a time, encoded as it is read"""
+    if isinstance(value, str):
+        chunks: Iterable[str] = [value]
+    else:
+        chunks = json.JSONEncoder(indent=2, ensure_ascii=False).iterencode(value)
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            for start in range(0, max(len(line), 1), LONGEST_LINE):
+                yield line[start : start + LONGEST_LINE]
+    for start in range(0, len(pending), LONGEST_LINE):
+        yield pending[start : start + LONGEST_LINE]
+
+
+class PayloadViewer(ScrollView, can_focus=True):
+    """Lines of JSON, highlighted only as they scroll into view"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lines: List[Any] = []  # str, or a Text that is shown as it is
+        self.widest = 0
+        self.highlighter = JSONHighlighter()
+        self.strips: LRUCache[int, Strip] = LRUCache(1024)
+
+    def clear(self):
+        self.lines = []
+        self.widest = 0
+        self.strips.clear()
+        self.virtual_size = Size(0, 0)
+        self.scroll_to(0, 0, animate=False)
+        self.refresh()
+
+    def append(self, lines: Sequence[Any]):
+        self.lines.extend(lines)
+        self.widest = max(self.widest, *(cell_len(str(line)) for line in lines))
+        self.virtual_size = Size(self.widest, len(self.lines))
+
+    def render_line(self, y: int) -> Strip:
+        scroll_x, scroll_y = self.scroll_offset
+        index = scroll_y + y
+        width = self.size.width
+        if index >= len(self.lines):
+            return Strip.blank(width, self.rich_style)
+        strip = self.strips.get(index)
+        if strip is None:
+            line = self.lines[index]
+            text = line if isinstance(line, Text) else self.highlighter(Text(line))
+            strip = Strip(text.render(self.app.console))
+            self.strips[index] = strip
+        return (
+            strip.crop(scroll_x, scroll_x + width)
+            .extend_cell_length(width)
+            .apply_style(self.rich_style)
+        )
 
 
-class DetailsPanel(Widget):
-    """Event details panel"""
+class DetailsPanel(Vertical):
+    """Event details panel
+
+    The summary comes from the event list. The payload is read only once an
+    event is selected, and written into the viewer a frame's worth at a
+    time, so a huge Read or Bash output opens at once and fills in behind.
+    """
 
     current_event = reactive(None)
 
-    def render(self) -> RenderableType:
-        """Render the details panel"""
-        if not self.current_event:
-            return Panel(
-                "Select an event to view details", title="Details", border_style="blue"
-            )
+    def compose(self) -> ComposeResult:
+        yield Static("Select an event to view details", id="details-summary")
+        yield PayloadViewer(id="details-payload")
+
+    def on_mount(self):
+        self.border_title = "Details"
 
-        event = self.current_event
+    def watch_current_event(self, event: Optional[Event]):
+        if event is None:
+            return
+        self.query_one("#details-summary", Static).update(self.summary(event))
+        self.load_payload(event)
 
-        # Build details content
+    def summary(self, event: Event) -> str:
         lines = []
         lines.append(f"[bold]Event ID:[/bold] {event.id}")
         lines.append(
@@ -535,6 +730,8 @@ class DetailsPanel(Widget):
         )
         lines.append(f"[bold]Type:[/bold] {event.type}")
         lines.append(f"[bold]Project:[/bold] {event.project or 'N/A'}")
+        if event.source:
+            lines.append(f"[bold]Source:[/bold] {event.source}")
         lines.append(
             f"[bold]Status:[/bold] [{event.status_color}]{event.status_icon} {event.status.value}[/]"
         )
@@ -548,24 +745,27 @@ class DetailsPanel(Widget):
             prompt = (
                 event.prompt[:200] + "..." if len(event.prompt) > 200 else event.prompt
             )
-            lines.append(f"[bold]Prompt:[/bold] {prompt}")
+            lines.append(f"[bold]Prompt:[/bold] {escape(prompt)}")
         if event.duration_ms is not None:
             lines.append(f"[bold]Duration:[/bold] {event.duration_ms}ms")
-
-        if event.input:
-            lines.append("\n[bold]Input:[/bold]")
-            lines.append(json.dumps(event.input, indent=2)[:300] + "...")
-
-        if event.output:
-            lines.append("\n[bold]Output:[/bold]")
-            lines.append(json.dumps(event.output, indent=2)[:300] + "...")
-
-        if event.error_details:
-            lines.append("\n[bold red]Error Details:[/bold red]")
-            lines.append(event.error_details[:500])
-
-        content = "\n".join(lines)
-        return Panel(content, title="Details", border_style="blue")
+        return "\n".join(lines)
+
+    @work(exclusive=True)
+    async def load_payload(self, event: Event):
+        viewer = self.query_one("#details-payload", PayloadViewer)
+        viewer.clear()
+        payload = await self.app.db.get_payload(event)
+        if payload is None:
+            return
+        failed = event.status == EventStatus.ERROR
+        sections = await asyncio.to_thread(payload_sections, payload, failed)
+        for title, value in sections:
+            viewer.append([Text(f"{title}:", style="bold")])
+            lines = pretty_lines(value)
+            while batch := list(islice(lines, LINES_PER_FRAME)):
+                viewer.append(batch)
+                await asyncio.sleep(0)
+            viewer.append([""])
 
 
 class HelpScreen(ModalScreen):
@@ -590,6 +790,10 @@ n/N         Next/previous search result
 f           Focus filters panel
 r           Refresh data
 a           Toggle auto-follow
+s           Sessions view
+t           Subagent tree
+e           Error clusters
+h           Database health
 g/G         Go to first/last event
 ?           Show this help
 q           Quit application
@@ -598,12 +802,352 @@ q           Quit application
 Space       Toggle filter selection
 c           Clear all filters
 
+[bold]Search:[/bold]
+word "a phrase"      Event ID, type, prompt or tool name
+tool: status: project: type: session: agent: cluster:
+after:2026-10-01 before:6h
+re:fail(ed|ure)      Regular expression over the same text
+
 Press ESC to close this help screen."""
 
         with Container(id="help-dialog"):
             yield Static(help_text, id="help-content")
 
 
+def format_tokens(count: float) -> str:
+    """Compact token count: 950, 12.3k, 4.1M"""
+    if count < 1000:
+        return str(int(count))
+    if count < 1_000_000:
+        return f"{count / 1000:.1f}k"
+    return f"{count / 1_000_000:.1f}M"
+
+
+def format_bytes(count: float) -> str:
+    """Compact size: 512B, 4.0K, 312.5M, 1.4G"""
+    for unit in ("B", "K", "M"):
+        if count < 1024:
+            return f"{int(count)}{unit}" if unit == "B" else f"{count:.1f}{unit}"
+        count /= 1024
+    return f"{count:.1f}G"
+
+
+def format_seconds(seconds: float) -> str:
+    """Compact duration: 45s, 12m05s, 3h20m"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+class SessionsScreen(ModalScreen):
+    """Per-session aggregates, most recently active first"""
+
+    BINDINGS = [
+        ("escape", "dismiss", "Close"),
+        ("s", "dismiss", "Close"),
+    ]
+
+    def __init__(self, db: FederatedDatabase, limit: int = 200):
+        super().__init__()
+        self.db = db
+        self.limit = limit
+        self.summaries: Dict[str, SessionSummary] = {}
+
+    def compose(self) -> ComposeResult:
+        with Container(id="sessions-dialog"):
+            yield Label("Sessions", id="sessions-title")
+            yield DataTable(id="sessions-table", cursor_type="row", zebra_stripes=True)
+            yield Static("", id="session-detail")
+
+    async def on_mount(self):
+        table = self.query_one("#sessions-table", DataTable)
+        columns = [
+            "Session",
+            "Project",
+            "Started",
+            "Length",
+            "Events",
+            "Errors",
+            "Tool time",
+            "Tokens",
+            "Top tools",
+        ]
+        if self.db.names:
+            columns.insert(1, "Source")
+        table.add_columns(*columns)
+        self.load_summaries()
+
+    @work(exclusive=True)
+    async def load_summaries(self):
+        table = self.query_one("#sessions-table", DataTable)
+        for summary in await self.db.get_session_summaries(self.limit):
+            key = f"{summary.source}/{summary.session_id}"
+            self.summaries[key] = summary
+            top_tools = sorted(summary.tool_counts.items(), key=lambda item: -item[1])[
+                :3
+            ]
+            errors = Text(
+                str(summary.error_count), style="red" if summary.error_count else ""
+            )
+            cells = [
+                summary.session_id[:12] + ("" if summary.ended else " …"),
+                summary.project or "—",
+                local_stamp(summary.started_at),
+                format_seconds(summary.duration_seconds),
+                str(summary.event_count),
+                errors,
+                format_seconds(summary.tool_seconds),
+                format_tokens(summary.tokens) if summary.tokens else "—",
+                ", ".join(f"{tool} {count}" for tool, count in top_tools),
+            ]
+            if self.db.names:
+                cells.insert(1, summary.source or "")
+            table.add_row(*cells, key=key)
+
+    @on(DataTable.RowHighlighted, "#sessions-table")
+    def show_detail(self, event: DataTable.RowHighlighted):
+        summary = self.summaries.get(event.row_key.value)
+        if not summary:
+            return
+        types = ", ".join(
+            f"{name} {count}" for name, count in sorted(summary.type_counts.items())
+        )
+        tools = ", ".join(
+            f"{name} {count}"
+            for name, count in sorted(
+                summary.tool_counts.items(), key=lambda item: -item[1]
+            )
+        )
+        state = "ended" if summary.ended else "running"
+        self.query_one("#session-detail", Static).update(
+            f"[bold]{summary.session_id}[/bold] ({state})\n"
+            f"[bold]Events:[/bold] {types}\n"
+            f"[bold]Tools:[/bold] {tools or '—'}"
+        )
+
+
+class AgentTreeScreen(ModalScreen):
+    """Sessions and the subagents they started, loaded as nodes expand"""
+
+    BINDINGS = [
+        ("escape", "dismiss", "Close"),
+        ("t", "dismiss", "Close"),
+    ]
+
+    def __init__(self, db: FederatedDatabase, limit: int = 100):
+        super().__init__()
+        self.db = db
+        self.limit = limit
+
+    def compose(self) -> ComposeResult:
+        with Container(id="agents-dialog"):
+            yield Label("Subagents by session", id="agents-title")
+            yield Tree("Sessions", id="agents-tree")
+
+    def on_mount(self):
+        self.load_sessions()
+
+    @work(exclusive=True)
+    async def load_sessions(self):
+        tree = self.query_one("#agents-tree", Tree)
+        tree.root.expand()
+        for session in await self.db.get_agent_sessions(self.limit):
+            label = Text(session.session_id[:12], style="bold")
+            label.append(f"  {session.project or '—'}")
+            if session.source:
+                label.append(f"  @{session.source}", style="dim")
+            label.append(f"  {session.subagent_count} subagents", style="cyan")
+            tree.root.add(label, data=session, allow_expand=True)
+
+    @on(Tree.NodeExpanded, "#agents-tree")
+    async def load_subagents(self, event: Tree.NodeExpanded):
+        node = event.node
+        session = node.data
+        # Children are fetched the first time a session opens, so a large
+        # team costs nothing until someone looks at it.
+        if not isinstance(session, AgentSession) or node.children:
+            return
+        for subagent in await self.db.get_subagents(session.session_id, session.source):
+            calls = sum(subagent.tool_counts.values())
+            label = Text(subagent.agent_type or "agent", style="bold")
+            label.append(f"  {subagent.agent_id}", style="dim")
+            duration = subagent.duration_seconds
+            label.append(
+                f"  {format_seconds(duration) if duration is not None else 'running'}"
+            )
+            label.append(f"  {calls} calls")
+            if subagent.error_count:
+                label.append(f"  {subagent.error_count} errors", style="red")
+            top = sorted(subagent.tool_counts.items(), key=lambda item: -item[1])[:4]
+            if top:
+                label.append(
+                    "  " + ", ".join(f"{tool} {count}" for tool, count in top),
+                    style="dim",
+                )
+            node.add_leaf(label, data=subagent)
+
+
+def local_stamp(created_at: str) -> str:
+    """A stored UTC timestamp as local MM-DD HH:MM"""
+    return (
+        datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
+        .replace(tzinfo=timezone.utc)
+        .astimezone()
+        .strftime("%m-%d %H:%M")
+    )
+
+
+class ErrorClustersScreen(ModalScreen):
+    """Tool failures grouped by normalized error text, most frequent first"""
+
+    BINDINGS = [
+        ("escape", "dismiss", "Close"),
+        ("e", "dismiss", "Close"),
+    ]
+
+    def __init__(self, db: FederatedDatabase, limit: int = 50):
+        super().__init__()
+        self.db = db
+        self.limit = limit
+        self.clusters: Dict[str, ErrorCluster] = {}
+
+    def compose(self) -> ComposeResult:
+        with Container(id="errors-dialog"):
+            yield Label("Error clusters", id="errors-title")
+            yield DataTable(id="errors-table", cursor_type="row", zebra_stripes=True)
+            yield Static("", id="error-detail")
+
+    def on_mount(self):
+        table = self.query_one("#errors-table", DataTable)
+        table.add_columns(
+            "Count", "Sessions", "First seen", "Last seen", "Tool", "Signature"
+        )
+        self.load_clusters()
+
+    @work(exclusive=True)
+    async def load_clusters(self):
+        table = self.query_one("#errors-table", DataTable)
+        for cluster in await self.db.get_error_clusters(self.limit):
+            self.clusters[cluster.cluster_id] = cluster
+            table.add_row(
+                Text(str(cluster.count), style="red"),
+                str(cluster.session_count),
+                local_stamp(cluster.first_seen),
+                local_stamp(cluster.last_seen),
+                cluster.tool or "—",
+                cluster.signature.splitlines()[0][:80] if cluster.signature else "",
+                key=cluster.cluster_id,
+            )
+
+    @on(DataTable.RowHighlighted, "#errors-table")
+    def show_detail(self, event: DataTable.RowHighlighted):
+        cluster = self.clusters.get(event.row_key.value)
+        if not cluster:
+            return
+        latest = (
+            f"{cluster.source}/{cluster.example_id}"
+            if cluster.source
+            else cluster.example_id
+        )
+        detail = Text()
+        detail.append("Cluster: ", style="bold").append(cluster.cluster_id)
+        detail.append("  Latest: ", style="bold").append(latest or "—")
+        detail.append("\n").append(cluster.signature)
+        self.query_one("#error-detail", Static).update(detail)
+
+
+# Free pages left by deletes past this share of the file are worth a VACUUM.
+FREE_PAGES_WORTH_VACUUM = 0.2
+
+
+def health_summary(health: DatabaseHealth) -> Text:
+    """One database's sizes and last maintenance pass, trouble highlighted"""
+    text = Text()
+    if health.source:
+        text.append(f"{health.source}\n", style="bold")
+    text.append("File: ", style="bold").append(
+        f"{format_bytes(health.db_bytes)} in {health.page_count:,} pages of {format_bytes(health.page_size)}"
+    )
+    text.append("\nWAL: ", style="bold").append(
+        format_bytes(health.wal_bytes),
+        style="yellow" if health.wal_bytes > event_store.WAL_SIZE_LIMIT_BYTES else "",
+    )
+    text.append("\nFree pages: ", style="bold").append(
+        f"{health.freelist_count:,} ({health.free_ratio:.0%})"
+    )
+    if health.free_ratio > FREE_PAGES_WORTH_VACUUM:
+        text.append(
+            " — VACUUM while nothing is running would return them", style="yellow"
+        )
+
+    report = health.maintained
+    text.append("\nMaintained: ", style="bold")
+    if report is None:
+        text.append("never; run claude-events-maintain", style="yellow")
+        return text
+    checkpoint = report["checkpoint"]
+    text.append(
+        f"{local_stamp(report['checked_at'])}, {checkpoint['mode']} checkpoint of "
+        f"{format_bytes(checkpoint['wal_bytes_before'])} "
+    )
+    if checkpoint["completed"]:
+        text.append("completed")
+    else:
+        text.append("held up by a reader", style="yellow")
+    if report["missing_indexes"]:
+        text.append("\nMissing indexes: ", style="bold").append(
+            ", ".join(report["missing_indexes"]), style="red"
+        )
+    return text
+
+
+class HealthScreen(ModalScreen):
+    """Each database's size, free pages and WAL, and its indexes' sizes"""
+
+    BINDINGS = [
+        ("escape", "dismiss", "Close"),
+        ("h", "dismiss", "Close"),
+    ]
+
+    def __init__(self, db: FederatedDatabase):
+        super().__init__()
+        self.db = db
+
+    def compose(self) -> ComposeResult:
+        with Container(id="health-dialog"):
+            yield Label("Database health", id="health-title")
+            yield Static("", id="health-summary")
+            yield DataTable(id="health-indexes", cursor_type="row", zebra_stripes=True)
+
+    def on_mount(self):
+        table = self.query_one("#health-indexes", DataTable)
+        columns = ["Index", "Size", "Share"]
+        if self.db.names:
+            columns.insert(0, "Source")
+        table.add_columns(*columns)
+        self.load_health()
+
+    @work(exclusive=True)
+    async def load_health(self):
+        table = self.query_one("#health-indexes", DataTable)
+        summaries = []
+        for health in await self.db.get_health():
+            summaries.append(health_summary(health))
+            # Sized by the maintenance pass, from SQLite's dbstat table; a
+            # build without it leaves the sizes out.
+            sizes = (health.maintained or {}).get("indexes") or {}
+            for name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+                share = size / health.db_bytes if health.db_bytes else 0.0
+                cells = [name, format_bytes(size), f"{share:.0%}"]
+                if self.db.names:
+                    cells.insert(0, health.source or "")
+                table.add_row(*cells)
+        self.query_one("#health-summary", Static).update(Text("\n\n").join(summaries))
+
+
 class ClaudeDashboard(App):
     """Main application class"""
 
@@ -649,7 +1193,18 @@ class ClaudeDashboard(App):
         column-span: 1;
         row-span: 3;
         height: 100%;
-        overflow-y: auto;
+        border: round blue;
+        padding: 0 1;
+    }
+
+    #details-summary {
+        height: auto;
+        margin-bottom: 1;
+    }
+
+    #details-payload {
+        height: 1fr;
+        background: $background;
     }
     
     .filter-header {
@@ -679,6 +1234,94 @@ class ClaudeDashboard(App):
     #help-content {
         padding: 1;
     }
+
+    #sessions-dialog {
+        align: center middle;
+        background: $surface;
+        border: solid $primary;
+        padding: 1 2;
+        width: 95%;
+        height: 90%;
+    }
+
+    #sessions-title {
+        text-style: bold;
+        color: $primary;
+    }
+
+    #sessions-table {
+        height: 1fr;
+    }
+
+    #session-detail {
+        height: auto;
+        padding: 1 0 0 0;
+    }
+
+    #agents-dialog {
+        align: center middle;
+        background: $surface;
+        border: solid $primary;
+        padding: 1 2;
+        width: 90%;
+        height: 90%;
+    }
+
+    #agents-title {
+        text-style: bold;
+        color: $primary;
+    }
+
+    #agents-tree {
+        height: 1fr;
+    }
+
+    #errors-dialog {
+        align: center middle;
+        background: $surface;
+        border: solid $primary;
+        padding: 1 2;
+        width: 95%;
+        height: 90%;
+    }
+
+    #errors-title {
+        text-style: bold;
+        color: $primary;
+    }
+
+    #errors-table {
+        height: 1fr;
+    }
+
+    #error-detail {
+        height: auto;
+        max-height: 8;
+        padding: 1 0 0 0;
+    }
+    
+    #health-dialog {
+        align: center middle;
+        background: $surface;
+        border: solid $primary;
+        padding: 1 2;
+        width: 80%;
+        height: 90%;
+    }
+
+    #health-title {
+        text-style: bold;
+        color: $primary;
+    }
+
+    #health-summary {
+        height: auto;
+        padding: 0 0 1 0;
+    }
+
+    #health-indexes {
+        height: 1fr;
+    }
     
     #search-input {
         dock: bottom;
@@ -707,6 +1350,10 @@ class ClaudeDashboard(App):
         Binding("N", "prev_match", "Previous", show=False),
         Binding("r", "refresh", "Refresh"),
         Binding("a", "toggle_follow", "Auto-follow"),
+        Binding("s", "sessions", "Sessions"),
+        Binding("t", "agent_tree", "Subagents"),
+        Binding("e", "error_clusters", "Errors"),
+        Binding("h", "health", "Health"),
         Binding("g", "go_first", "First", show=False),
         Binding("G", "go_last", "Last", show=False),
         Binding("f", "focus_filters", "Filters"),
@@ -714,37 +1361,74 @@ class ClaudeDashboard(App):
         Binding("escape", "cancel_search", "Cancel", show=False),
     ]
 
-    def __init__(self, db_path: str = "~/.claude/events.db"):
+    def __init__(
+        self,
+        db_paths: Sequence[str] = ("~/.claude/events.db",),
+        config: Optional[DashboardConfig] = None,
+    ):
         super().__init__()
-        self.db_path = db_path
-        self.db: Optional[DatabaseManager] = None
-        self.auto_follow = True
+        self.db_paths = list(db_paths)
+        self.config = config or DashboardConfig()
+        self.db: Optional[FederatedDatabase] = None
+        # The filter lists load on connections of their own, so interrupting
+        # a refresh's queries never aborts them.
+        self.catalog_db: Optional[FederatedDatabase] = None
+        self.auto_follow = self.config.display.auto_follow
         self.search_mode = False
         self.search_query = ""
-        self.poll_interval = 1.0  # Active polling interval
-        self.idle_interval = 5.0  # Idle polling interval
+        self.poll_interval = (
+            self.config.refresh.poll_interval
+        )  # Active polling interval
+        self.idle_interval = self.config.refresh.idle_interval  # Idle polling interval
         self.last_activity = datetime.now()
         self.last_timestamp: Optional[str] = None
         self.is_exiting = False
+        self.launched = time.monotonic()
+        self.first_rows_ms: Optional[float] = None
+        # Bumped by every refresh request; a refresh renders only if no newer
+        # request arrived while it was querying.
+        self.refresh_generation = 0
+        self.refresh_timer: Optional[Timer] = None
+        self.refreshing: Optional[int] = None  # the generation being refreshed
+        self.refresh_again = False
+        self.cursor_to_first = False
+        self.loading_filters = False
+        self.sources = parse_sources(
+            self.db_paths, cache_mb=self.config.database.cache_mb or None
+        )
 
     def compose(self) -> ComposeResult:
         """Create the application UI"""
         yield Header(show_clock=True)
 
-        with Container(id="app-grid"):
-            # Overview panel (top-left)
-            yield OverviewPanel(id="overview")
+        panels = self.config.panels
+        overview = OverviewPanel(id="overview")
+        details = DetailsPanel(id="details")
+        filters = Container(
+            Label("Filters", id="filters-title"),
+            FilterPanel(
+                sources=[source.name for source in self.sources if source.name],
+                defaults=self.config.filters,
+            ),
+            id="filters",
+        )
+        # Hidden panels stay mounted, since the refresh and the key bindings
+        # look them up, but take no grid cell.
+        overview.display = panels.overview
+        details.display = panels.details
+        filters.display = panels.filters
 
-            # Event stream (middle column, full height)
+        with Container(id="app-grid"):
+            # Grid cells fill in order: overview top-left, the stream and the
+            # details as full-height columns, then filters under the overview.
+            # A left-column panel on its own comes first and fills the column.
+            yield overview
+            if not panels.overview:
+                yield filters
             yield EventTable(id="event-stream")
-
-            # Details panel (right column, full height)
-            yield DetailsPanel(id="details")
-
-            # Filters panel (bottom-left)
-            with Container(id="filters"):
-                yield Label("Filters", id="filters-title")
-                yield FilterPanel()
+            yield details
+            if panels.overview:
+                yield filters
 
         # Search input (hidden by default)
         yield Input(
@@ -754,16 +1438,41 @@ class ClaudeDashboard(App):
 
         yield Footer()
 
+    def apply_layout(self):
+        """Size the grid to the panels the config enables"""
+        panels = self.config.panels
+        left = [
+            panel
+            for panel, shown in (
+                ("#overview", panels.overview),
+                ("#filters", panels.filters),
+            )
+            if shown
+        ]
+        columns = (
+            (["1fr"] if left else []) + ["2fr"] + (["2fr"] if panels.details else [])
+        )
+        grid = self.query_one("#app-grid")
+        grid.styles.grid_size_columns = len(columns)
+        grid.styles.grid_columns = " ".join(columns)
+        if len(left) == 1:
+            self.query_one(left[0]).styles.row_span = 3
+
     async def on_mount(self):
         """Initialize the application"""
-        self.db = DatabaseManager(self.db_path)
+        self.apply_layout()
+        self.db = FederatedDatabase(self.sources)
+        self.catalog_db = FederatedDatabase(parse_sources(self.db_paths))
 
         try:
-            await self.db.connect()
+            await asyncio.gather(self.db.connect(), self.catalog_db.connect())
             self.notify("Connected to database", severity="information")
+            for problem in self.db.problems:
+                self.notify(problem, severity="warning")
 
-            # Load initial data
-            await self.refresh_data()
+            # Load initial data behind the first paint: the newest events,
+            # then the stats, then the filter lists.
+            self.request_refresh(0)
 
             # Start monitoring
             self.monitor_events()
@@ -777,6 +1486,8 @@ class ClaudeDashboard(App):
         """Clean up on exit"""
         if self.db:
             await self.db.close()
+        if self.catalog_db:
+            await self.catalog_db.close()
 
     @work(exclusive=True, thread=True)
     async def monitor_events(self):
@@ -788,7 +1499,7 @@ class ClaudeDashboard(App):
                 time_since_activity = (now - self.last_activity).total_seconds()
                 interval = (
                     self.idle_interval
-                    if time_since_activity > 30
+                    if time_since_activity > self.config.refresh.idle_after
                     else self.poll_interval
                 )
 
@@ -802,8 +1513,8 @@ class ClaudeDashboard(App):
                 latest = await self.db.get_latest_timestamp()
                 if latest and latest != self.last_timestamp:
                     self.last_timestamp = latest
-                    # Call refresh_data on the main thread to avoid event loop conflicts
-                    self.call_from_thread(self.refresh_data)
+                    # Request it on the main thread to avoid event loop conflicts
+                    self.call_from_thread(self.request_refresh, 0, new_state=False)
 
                     if self.auto_follow:
                         # Scroll to top (newest events) - also needs to be on main thread
@@ -818,63 +1529,190 @@ class ClaudeDashboard(App):
                     self.logger.warning(f"Monitoring error: {e}", exc_info=True)
                     self.notify(f"Monitoring error: {e}", severity="warning")
 
-    async def refresh_data(self):
-        """Refresh all data from database"""
+    async def within_budget(self, query, deadline: Optional[float]) -> Any:
+        """Await `query` if the refresh has budget left, or None.
+
+        A query still running at the deadline is interrupted, so the next
+        one does not queue behind it on the connection. No deadline means
+        no budget.
+        """
+        if deadline is None:
+            return await query
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            query.close()
+            return None
+        try:
+            return await asyncio.wait_for(query, remaining)
+        except asyncio.TimeoutError:
+            await self.db.interrupt()
+            return None
+
+    @work(group="filters", exit_on_error=False)
+    async def load_filter_catalog(self):
+        """Reload the filter lists, unless a reload is already running.
+
+        Off the refresh, and on catalog_db, so the events and stats never
+        wait on the session list, the slowest of the dashboard's queries on
+        a large database, and interrupting them leaves it running.
+        """
+        if self.loading_filters:
+            return
+        self.loading_filters = True
         try:
+            lists = (
+                await self.catalog_db.get_unique_projects(),
+                await self.catalog_db.get_unique_types(),
+                await self.catalog_db.get_unique_sessions(
+                    self.config.display.filter_sessions
+                ),
+            )
+            await self.query_one(FilterPanel).update_filters(*lists)
+        except Exception as e:
+            self.logger.warning(f"Filter lists not loaded: {e}")
+        finally:
+            self.loading_filters = False
+
+    def request_refresh(self, delay_ms: Optional[int] = None, new_state: bool = True):
+        """Refresh once requests stop arriving for `delay_ms` (debounce_ms by default).
+
+        A burst of filter clicks becomes one refresh of the state they leave
+        behind. `new_state` is False for a refresh that only picks up new
+        events, which waits for one in flight instead of cancelling it.
+        """
+        if new_state:
+            self.refresh_generation += 1
+        if self.refresh_timer is not None:
+            self.refresh_timer.stop()
+            self.refresh_timer = None
+        delay = self.config.refresh.debounce_ms if delay_ms is None else delay_ms
+        if delay:
+            self.refresh_timer = self.set_timer(delay / 1000, self.start_refresh)
+        else:
+            self.call_later(self.start_refresh)
+
+    async def start_refresh(self):
+        self.refresh_timer = None
+        if self.refreshing is not None:
+            if self.refreshing == self.refresh_generation:
+                self.refresh_again = True
+                return
+            # Its results are for a state nobody is looking at any more, and
+            # the new refresh's queries would queue behind its own.
+            await self.db.interrupt()
+        self.refresh_worker()
+
+    @work(exclusive=True, group="refresh", exit_on_error=False)
+    async def refresh_worker(self):
+        self.refresh_again = True
+        while self.refresh_again:
+            self.refresh_again = False
+            await self.refresh_data(self.refresh_generation)
+
+    async def refresh_data(self, generation: int):
+        """Refresh all data from database
+
+        The event page is always loaded, then the stats get what is left
+        of the refresh budget and keep showing what they had when it runs
+        out. Each is shown as soon as it is back, as long as `generation` is
+        still the latest. The filter lists reload in the background.
+        """
+        self.refreshing = generation
+        try:
+            deadline = time.monotonic() + self.config.refresh.budget_ms / 1000
+
             # Get current filters
             filter_panel = self.query_one(FilterPanel)
             selected_projects = filter_panel.get_selected_projects()
             selected_types = filter_panel.get_selected_types()
             selected_sessions = filter_panel.get_selected_sessions()
+            selected_sources = filter_panel.get_selected_sources()
 
-            # Update stats
-            stats = await self.db.get_stats(
-                selected_projects, selected_types, selected_sessions
-            )
-            overview = self.query_one("#overview", OverviewPanel)
-            overview.stats = stats
-
-            # Update events
             events = await self.db.get_events(
+                limit=self.config.display.page_size,
+                sources=selected_sources,
                 projects=selected_projects,
                 types=selected_types,
                 sessions=selected_sessions,
                 search=self.search_query if self.search_mode else None,
             )
+            if generation != self.refresh_generation:
+                return
             event_table = self.query_one("#event-stream", EventTable)
             event_table.update_events(events)
+            if self.cursor_to_first and event_table.row_count > 0:
+                event_table.move_cursor(row=0)
+            self.cursor_to_first = False
+            if self.first_rows_ms is None:
+                self.first_rows_ms = (time.monotonic() - self.launched) * 1000
+                self.logger.info(
+                    f"First events shown {self.first_rows_ms:.0f}ms after launch"
+                )
 
-            # Update available filters
-            if not selected_projects and not selected_types and not selected_sessions:
-                projects = await self.db.get_unique_projects()
-                types = await self.db.get_unique_types()
-                sessions = await self.db.get_unique_sessions()
-                await filter_panel.update_filters(projects, types, sessions)
+            if self.config.panels.overview:
+                overview = self.query_one("#overview", OverviewPanel)
+                # Like the filter lists, the first stats are worth waiting for
+                stats_deadline = deadline if overview.loaded else None
+                stats = await self.within_budget(
+                    self.db.get_stats(
+                        sources=selected_sources,
+                        projects=selected_projects,
+                        types=selected_types,
+                        sessions=selected_sessions,
+                    ),
+                    stats_deadline,
+                )
+                burn = await self.within_budget(
+                    self.db.get_token_burn(
+                        sources=selected_sources, projects=selected_projects
+                    ),
+                    stats_deadline,
+                )
+                capture = await asyncio.to_thread(event_store.read_capture_metrics)
+                if generation != self.refresh_generation:
+                    return
+                overview.capture = capture
+                overview.wal_bytes = self.db.wal_bytes()
+                if stats is not None:
+                    overview.stats = stats
+                if burn is not None:
+                    overview.burn = burn
+                overview.stale = stats is None or burn is None
+                overview.loaded = overview.loaded or not overview.stale
+
+            # The first load of the filter lists is not skipped: until it
+            # has run there is nothing to choose from.
+            if not filter_panel.loaded or (
+                self.config.panels.filters
+                and not (selected_projects or selected_types or selected_sessions)
+            ):
+                self.load_filter_catalog()
 
             self.last_activity = datetime.now()
 
         except Exception as e:
+            if generation != self.refresh_generation:
+                return  # interrupted by a newer refresh
             self.logger.error(f"Failed to refresh data: {e}", exc_info=True)
             self.notify(f"Failed to refresh data: {e}", severity="error")
+        finally:
+            if self.refreshing == generation:
+                self.refreshing = None
 
     @on(DataTable.RowSelected)
     async def handle_row_selected(self, event: DataTable.RowSelected):
         """Handle event selection"""
         if event.data_table.id == "event-stream":
-            event_id = event.row_key.value
             event_table = self.query_one("#event-stream", EventTable)
-
-            # Find the selected event
-            for evt in event_table.events:
-                if evt.id == event_id:
-                    details_panel = self.query_one("#details", DetailsPanel)
-                    details_panel.current_event = evt
-                    break
+            selected = event_table.by_key.get(event.row_key.value)
+            if selected:
+                details_panel = self.query_one("#details", DetailsPanel)
+                details_panel.current_event = selected
 
     @on(Checkbox.Changed)
-    async def handle_filter_change(self, event: Checkbox.Changed):
+    def handle_filter_change(self, event: Checkbox.Changed):
         """Handle filter changes"""
-        await self.refresh_data()
+        self.request_refresh()
 
     def action_quit(self):
         """Quit the application"""
@@ -900,18 +1738,19 @@ class ClaudeDashboard(App):
             search_input = self.query_one("#search-input", Input)
             search_input.remove_class("visible")
             search_input.value = ""
-            self.run_worker(self.refresh_data())
+            self.request_refresh(0)
 
     @on(Input.Submitted, "#search-input")
-    async def handle_search_submit(self, event: Input.Submitted):
+    def handle_search_submit(self, event: Input.Submitted):
         """Handle search input submission"""
+        try:
+            parse_search(event.value)
+        except SearchError as e:
+            self.notify(f"Invalid search: {e}", severity="error")
+            return
         self.search_query = event.value
-        await self.refresh_data()
-
-        # Move to first result
-        event_table = self.query_one("#event-stream", EventTable)
-        if event_table.row_count > 0:
-            event_table.move_cursor(row=0)
+        self.cursor_to_first = True
+        self.request_refresh(0)
 
     def action_next_match(self):
         """Go to next search match"""
@@ -927,9 +1766,25 @@ class ClaudeDashboard(App):
 
     def action_refresh(self):
         """Manually refresh data"""
-        self.run_worker(self.refresh_data())
+        self.request_refresh(0)
         self.notify("Refreshed", severity="information")
 
+    def action_sessions(self):
+        """Show per-session aggregates"""
+        self.push_screen(SessionsScreen(self.db, self.config.views.sessions))
+
+    def action_agent_tree(self):
+        """Show sessions and their subagents"""
+        self.push_screen(AgentTreeScreen(self.db, self.config.views.agent_sessions))
+
+    def action_error_clusters(self):
+        """Show tool failures grouped by error cluster"""
+        self.push_screen(ErrorClustersScreen(self.db, self.config.views.error_clusters))
+
+    def action_health(self):
+        """Show each database's size, WAL and indexes"""
+        self.push_screen(HealthScreen(self.db))
+
     def action_toggle_follow(self):
         """Toggle auto-follow mode"""
         self.auto_follow = not self.auto_follow
@@ -955,22 +1810,26 @@ class ClaudeDashboard(App):
         filter_panel = self.query_one(FilterPanel)
         filter_panel.focus()
 
-    async def action_clear_filters(self):
+    def action_clear_filters(self):
         """Clear all filters"""
         filter_panel = self.query_one(FilterPanel)
 
         # Reset all checkboxes
+        if filter_panel.all_sources_check:
+            filter_panel.all_sources_check.value = True
         if filter_panel.all_projects_check:
             filter_panel.all_projects_check.value = True
         if filter_panel.all_types_check:
             filter_panel.all_types_check.value = True
 
+        for check in filter_panel.source_checks:
+            check.value = False
         for check in filter_panel.project_checks:
             check.value = False
         for check in filter_panel.type_checks:
             check.value = False
 
-        await self.refresh_data()
+        self.request_refresh()
         self.notify("Filters cleared", severity="information")
 
 
@@ -981,11 +1840,15 @@ def main():
     parser = argparse.ArgumentParser(description="Claude Code Events TUI Dashboard")
     parser.add_argument(
         "--db",
-        default="~/.claude/events.db",
-        help="Path to SQLite database (default: ~/.claude/events.db)",
+        action="append",
+        metavar="[NAME=]PATH",
+        help="Path to SQLite database (default: ~/.claude/events.db); "
+        "repeat to merge several machines' databases",
     )
     parser.add_argument(
-        "--config", help="Path to configuration file (not implemented yet)"
+        "--config",
+        type=Path,
+        help=f"Path to configuration file (default: {CONFIG_PATH} if it exists)",
     )
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
 
@@ -1011,14 +1874,26 @@ def main():
         f"Starting Claude Dashboard with log level: {logging.getLevelName(log_level)}"
     )
 
-    # Check if database exists
-    db_path = Path(args.db).expanduser()
-    if not db_path.exists():
-        logger.error(f"Database not found at {db_path}")
-        print(f"Error: Database not found at {db_path}")
-        sys.exit(1)
+    # Check the databases exist
+    db_paths = args.db or ["~/.claude/events.db"]
+    for source in parse_sources(db_paths):
+        if not source.db_path.exists():
+            logger.error(f"Database not found at {source.db_path}")
+            print(f"Error: Database not found at {source.db_path}")
+            sys.exit(1)
+
+    # Validated before the screen is taken over, so a mistake reads clearly
+    config_path = args.config or CONFIG_PATH
+    config = DashboardConfig()
+    if args.config or config_path.expanduser().exists():
+        try:
+            config = load_config(config_path)
+        except ConfigError as e:
+            logger.error(f"Invalid configuration: {e}")
+            print(f"Error: invalid configuration: {e}")
+            sys.exit(1)
 
-    app = ClaudeDashboard(db_path=args.db)
+    app = ClaudeDashboard(db_paths=db_paths, config=config)
     app.run()
 
 
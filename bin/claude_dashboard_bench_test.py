@@ -0,0 +1,59 @@
+"""Tests for the dashboard query benchmark's fixture and full-scan gate.
+
+The benchmark is only worth its numbers if the fixture looks like a real
+store and the gate catches a walk that reads every payload, so those are
+what is pinned here.
+
+Run with: uv run --with pytest --with aiosqlite pytest bin/claude_dashboard_bench_test.py
+"""
+
+import argparse
+import importlib.util
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+import claude_events_synth
+
+CLI = Path(__file__).parent / "claude-dashboard-bench"
+_spec = importlib.util.spec_from_file_location(
+    "bench", CLI, loader=SourceFileLoader("bench", str(CLI))
+)
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+
+COLUMNS = ["id", "created_at", "hook_type", "status", "full_event"]
+INDEXED = {"idx_created_at": ["created_at"], "idx_hook_status": ["hook_type", "status"]}
+
+
+def test_every_fixture_session_runs_to_its_end():
+    args = argparse.Namespace(
+        rows=3000, sessions=20, projects=3, output_bytes=64, error_ratio=0.05, seed=0
+    )
+
+    rows = list(bench.fixture_rows(args))
+    types = {row[1] for row in rows}
+
+    assert 3000 <= len(rows) < 3000 + 3000 // 20
+    assert types == set(claude_events_synth.EVENT_TYPES)
+    assert bench.failures([], None, {hook_type: 1 for hook_type in types}) == []
+
+
+def test_a_limited_walk_filtered_on_a_column_its_index_lacks_is_a_full_scan():
+    page = (
+        "SELECT id FROM claude_events WHERE 1=1 {} ORDER BY created_at DESC LIMIT 1000"
+    )
+    walk = "SCAN claude_events USING INDEX idx_created_at"
+
+    assert not bench.full_scan(page.format(""), walk, COLUMNS, INDEXED)
+    assert bench.full_scan(
+        page.format("AND hook_type IN ('PreCompact')"), walk, COLUMNS, INDEXED
+    )
+    assert not bench.full_scan(
+        page.format("AND hook_type IN ('PreCompact')"),
+        "SEARCH claude_events USING INDEX idx_hook_status (hook_type=?)",
+        COLUMNS,
+        INDEXED,
+    )
+    assert bench.full_scan(
+        "SELECT COUNT(*) FROM claude_events", "SCAN claude_events", COLUMNS, INDEXED
+    )
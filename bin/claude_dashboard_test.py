@@ -0,0 +1,335 @@
+"""Tests for the dashboard's config file, refresh, event table, payload viewer and health view.
+
+Run with: uv run --with pytest --with textual --with aiosqlite pytest bin/claude_dashboard_test.py
+"""
+
+import asyncio
+import dataclasses
+import importlib.util
+import json
+import time
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+import pytest
+from textual.app import App
+
+from claude_events import Event, EventStatus
+
+CLI = Path(__file__).parent / "claude-dashboard.py"
+_spec = importlib.util.spec_from_file_location(
+    "dashboard", CLI, loader=SourceFileLoader("dashboard", str(CLI))
+)
+dashboard = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(dashboard)
+
+
+def write(tmp_path, text):
+    path = tmp_path / "dashboard.toml"
+    path.write_text(text)
+    return path
+
+
+def test_settings_left_out_keep_their_defaults(tmp_path):
+    config = dashboard.load_config(
+        write(
+            tmp_path, '[refresh]\nbudget_ms = 250\n[filters]\nprojects = ["dotfiles"]\n'
+        )
+    )
+
+    assert (config.refresh.budget_ms, config.refresh.poll_interval) == (250, 1.0)
+    assert config.filters.projects == ["dotfiles"]
+    assert config.display == dashboard.DisplayConfig()
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("[refresh]\npoll_intreval = 2\n", "unknown setting refresh.poll_intreval"),
+        ("[display]\npage_size = 10.5\n", "display.page_size must be a whole number"),
+        ("[panels]\ndetails = 0\n", "panels.details must be true or false"),
+        ("[views]\nsessions = 0\n", "views.sessions must be positive"),
+        ("[refresh]\ndebounce_ms = -50\n", "refresh.debounce_ms must be at least 0"),
+    ],
+)
+def test_a_mistake_is_reported_rather_than_ignored(tmp_path, text, message):
+    with pytest.raises(dashboard.ConfigError, match=message):
+        dashboard.load_config(write(tmp_path, text))
+
+
+def test_payload_lines_are_indented_json_with_long_lines_broken():
+    lines = list(
+        dashboard.pretty_lines({"stdout": "x" * (dashboard.LONGEST_LINE + 10)})
+    )
+
+    assert lines[0] == "{"
+    assert max(len(line) for line in lines) == dashboard.LONGEST_LINE
+    assert json.loads("".join(lines)) == {"stdout": "x" * (dashboard.LONGEST_LINE + 10)}
+
+
+def test_the_full_event_is_shown_for_an_error_or_when_there_is_nothing_else():
+    payload = {
+        "tool_input": json.dumps({"command": "make"}),
+        "tool_output": None,
+        "full_event": json.dumps(
+            {"hook_event_name": "PostToolUseFailure", "error": "exit 2"}
+        ),
+    }
+
+    assert [
+        title for title, _ in dashboard.payload_sections(payload, failed=False)
+    ] == ["Input"]
+    assert dashboard.payload_sections(payload, failed=True)[1] == ("Error", "exit 2")
+
+    notification = {
+        "tool_input": None,
+        "tool_output": None,
+        "full_event": json.dumps({"message": "waiting"}),
+    }
+    assert dashboard.payload_sections(notification, failed=False) == [
+        ("Event", {"message": "waiting"})
+    ]
+
+
+def event(number, status=EventStatus.SUCCESS):
+    return Event(
+        id=f"e{number}",
+        timestamp=1_790_000_000_000 + number * 1000,
+        type="PostToolUse",
+        project="app",
+        status=status,
+        session_id="s1",
+        tool="Bash",
+        prompt=None,
+        input=None,
+        output=None,
+        duration_ms=None,
+        error_details=None,
+    )
+
+
+def test_a_refresh_adds_new_rows_updates_statuses_and_drops_the_oldest():
+    class Table(App):
+        def compose(self):
+            yield dashboard.EventTable()
+
+    async def refresh_twice():
+        app = Table()
+        async with app.run_test():
+            table = app.query_one(dashboard.EventTable)
+            table.update_events([event(n) for n in (5, 4, 3, 2, 1)])
+            kept = table.get_cell("e3", "time")
+            table.update_events(
+                [event(7), event(6), event(5), event(4, EventStatus.ERROR), event(3)]
+            )
+            rows = [
+                table.coordinate_to_cell_key((row, 0)).row_key.value
+                for row in range(table.row_count)
+            ]
+            return (
+                rows,
+                table.get_cell("e4", "status").plain,
+                table.get_cell("e3", "time") is kept,
+            )
+
+    rows, status, row_kept = asyncio.run(refresh_twice())
+
+    assert rows == ["e7", "e6", "e5", "e4", "e3"]
+    assert status == "✗"
+    assert row_kept
+
+
+def test_rows_dropped_from_the_middle_leave_the_page_in_order_under_the_cursor():
+    class Table(App):
+        def compose(self):
+            yield dashboard.EventTable()
+
+    async def refresh_twice():
+        app = Table()
+        async with app.run_test():
+            table = app.query_one(dashboard.EventTable)
+            table.update_events([event(n) for n in range(20, 0, -1)])
+            table.move_cursor(row=table.get_row_index("e5"))
+            page = [event(n) for n in range(24, 0, -1) if n not in (7, 12, 13)]
+            table.update_events(page)
+            rows = [
+                table.coordinate_to_cell_key((row, 0)).row_key.value
+                for row in range(table.row_count)
+            ]
+            cursor = table.coordinate_to_cell_key(table.cursor_coordinate).row_key.value
+            return rows, [event.key for event in page], cursor
+
+    rows, page, cursor = asyncio.run(refresh_twice())
+
+    assert rows == page
+    assert cursor == "e5"
+
+
+class ScriptedDatabase:
+    """Stands in for the dashboard's databases, answering after set delays.
+
+    Each get_events answers with the next of `pages`, a (seconds, events)
+    pair. interrupt() only counts: the query it was meant for still ends
+    with its rows, as one that finished just before it would.
+    """
+
+    problems = []
+
+    def __init__(self, pages=(), stats_seconds=0.0):
+        self.pages = list(pages)
+        self.stats_seconds = stats_seconds
+        self.queries = 0
+        self.interrupts = 0
+        self.stats_cancelled = False
+
+    async def get_events(self, **filters):
+        self.queries += 1
+        seconds, events = self.pages.pop(0) if self.pages else (0, [])
+        await asyncio.sleep(seconds)
+        return events
+
+    async def get_stats(self, **filters):
+        try:
+            await asyncio.sleep(self.stats_seconds)
+        except asyncio.CancelledError:
+            self.stats_cancelled = True
+            raise
+        return {"total": 2, "success": 2, "error": 0, "warning": 0}
+
+    async def get_token_burn(self, **filters):
+        return {"tokens": 0, "per_minute": 0.0}
+
+    async def get_unique_projects(self):
+        return []
+
+    async def get_unique_types(self):
+        return []
+
+    async def get_unique_sessions(self, limit):
+        return []
+
+    async def interrupt(self):
+        self.interrupts += 1
+
+    async def close(self):
+        pass
+
+    def wal_bytes(self):
+        return 0
+
+
+class Dashboard(dashboard.ClaudeDashboard):
+    """The dashboard on a ScriptedDatabase, without the polling thread"""
+
+    def __init__(self, db, **refresh):
+        config = dashboard.DashboardConfig(
+            refresh=dataclasses.replace(dashboard.RefreshConfig(), **refresh)
+        )
+        super().__init__(config=config)
+        self.db = self.catalog_db = db
+        self.shown = []
+
+    async def on_mount(self, mount):
+        mount.prevent_default()  # no connecting, and no monitor_events
+        self.apply_layout()
+        table = self.query_one("#event-stream", dashboard.EventTable)
+        update_events = table.update_events
+
+        def record(events):
+            self.shown.append([event.key for event in events])
+            update_events(events)
+
+        table.update_events = record
+
+
+def test_a_burst_of_requests_within_the_debounce_starts_one_refresh():
+    async def click_three_filters():
+        app = Dashboard(ScriptedDatabase(), debounce_ms=200)
+        starts = []
+        refresh_worker = app.refresh_worker
+        app.refresh_worker = lambda: (
+            starts.append(app.refresh_generation),
+            refresh_worker(),
+        )[1]
+        async with app.run_test() as pilot:
+            for _ in range(3):
+                app.request_refresh()
+                await pilot.pause(0.02)
+            await pilot.pause(0.4)
+            return starts, app.db.queries
+
+    starts, queries = asyncio.run(click_three_filters())
+
+    assert starts == [3]
+    assert queries == 1
+
+
+def test_a_newer_request_interrupts_the_query_in_flight_and_its_rows_are_never_shown():
+    async def refilter_mid_query():
+        db = ScriptedDatabase(pages=[(0.3, [event(1)]), (0, [event(2)])])
+        app = Dashboard(db, debounce_ms=0)
+        async with app.run_test() as pilot:
+            app.request_refresh()
+            await pilot.pause(0.05)
+            app.request_refresh()
+            await pilot.pause(0.5)
+            return db.interrupts, app.shown
+
+    interrupts, shown = asyncio.run(refilter_mid_query())
+
+    assert interrupts == 1
+    assert shown == [["e2"]]
+
+
+def test_stats_over_budget_are_given_up_and_the_last_ones_kept():
+    async def refresh_with_slow_stats():
+        db = ScriptedDatabase(
+            pages=[(0, [event(1)]), (0, [event(2), event(1)])], stats_seconds=5
+        )
+        app = Dashboard(db, debounce_ms=0, budget_ms=100)
+        async with app.run_test() as pilot:
+            overview = app.query_one("#overview", dashboard.OverviewPanel)
+            overview.loaded = True
+            before = {"total": 1, "success": 1, "error": 0, "warning": 0}
+            overview.stats = before
+            started = time.monotonic()
+            app.request_refresh()
+            while app.refreshing is not None or app.db.queries == 0:
+                await pilot.pause(0.02)
+            seconds = time.monotonic() - started
+            return seconds, overview.stats is before, overview.stale, db, app.shown
+
+    seconds, stats_kept, stale, db, shown = asyncio.run(refresh_with_slow_stats())
+
+    assert seconds < 1
+    assert stats_kept and stale
+    assert db.stats_cancelled and db.interrupts == 1
+    assert shown == [["e1"]]
+
+
+def test_health_flags_a_long_log_lost_space_and_a_missing_index():
+    health = dashboard.DatabaseHealth(
+        db_bytes=400 * 1024 * 1024,
+        wal_bytes=300 * 1024 * 1024,
+        page_size=4096,
+        page_count=102_400,
+        freelist_count=40_000,
+        maintained={
+            "checked_at": "2026-10-01 09:00:00",
+            "missing_indexes": ["idx_tool_name"],
+            "checkpoint": {
+                "mode": "truncate",
+                "completed": False,
+                "wal_bytes_before": 300 * 1024 * 1024,
+            },
+        },
+    )
+
+    text = dashboard.health_summary(health)
+
+    assert "WAL: 300.0M" in text.plain and "VACUUM" in text.plain
+    assert "truncate checkpoint of 300.0M held up by a reader" in text.plain
+    assert "Missing indexes: idx_tool_name" in text.plain
+    assert dashboard.health_summary(
+        dataclasses.replace(health, maintained=None)
+    ).plain.endswith("never; run claude-events-maintain")
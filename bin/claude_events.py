@@ -0,0 +1,1123 @@
+"""Read access to the Claude Code events database, shared by the bin tools.
+
+The dashboard, claude-events-query and claude-events-follow all read
+~/.claude/events.db through DatabaseManager, so a filter means the same rows
+in each of them and a status is derived the same way everywhere. Nothing here
+imports Textual, so the headless tools start fast.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import re
+import socket
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+
+import aiosqlite
+
+# The schema and status rules belong to the hooks that write the database;
+# anchored on this file's location like the bin/claude-events-* tools.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "claude" / "hooks"))
+
+import event_maintenance  # noqa: E402
+import event_store  # noqa: E402
+import session_summaries  # noqa: E402
+
+
+class EventStatus(Enum):
+    """Event status types"""
+
+    SUCCESS = "success"
+    ERROR = "error"
+    WARNING = "warning"
+
+
+@dataclass
+class Event:
+    """Event data model"""
+
+    id: str
+    timestamp: int
+    type: str
+    project: Optional[str]
+    status: EventStatus
+    session_id: Optional[str]
+    tool: Optional[str]
+    prompt: Optional[str]
+    # Left empty by get_events, which does not read payloads; see get_payload.
+    input: Optional[Dict[str, Any]]
+    output: Optional[Dict[str, Any]]
+    duration_ms: Optional[int]
+    error_details: Optional[str]
+    source: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """Unique across sources; each machine numbers its own events"""
+        return f"{self.source}/{self.id}" if self.source else self.id
+
+    @property
+    def timestamp_str(self) -> str:
+        """Format timestamp as HH:MM:SS"""
+        return datetime.fromtimestamp(self.timestamp / 1000).strftime("%H:%M:%S")
+
+    @property
+    def status_icon(self) -> str:
+        """Get status icon"""
+        return {
+            EventStatus.SUCCESS: "✓",
+            EventStatus.ERROR: "✗",
+            EventStatus.WARNING: "⚠",
+        }[self.status]
+
+    @property
+    def status_color(self) -> str:
+        """Get status color"""
+        return {
+            EventStatus.SUCCESS: "green",
+            EventStatus.ERROR: "red",
+            EventStatus.WARNING: "yellow",
+        }[self.status]
+
+
+@dataclass
+class SessionSummary:
+    """Aggregates for one session, from its events"""
+
+    session_id: str
+    project: Optional[str]
+    started_at: str
+    ended_at: str
+    event_count: int
+    error_count: int
+    tool_seconds: float
+    type_counts: Dict[str, int]
+    tool_counts: Dict[str, int]
+    ended: bool
+    source: Optional[str] = None
+    tokens: int = 0
+
+    @property
+    def duration_seconds(self) -> float:
+        start = datetime.strptime(self.started_at, event_store.SQLITE_TIMESTAMP_FORMAT)
+        end = datetime.strptime(self.ended_at, event_store.SQLITE_TIMESTAMP_FORMAT)
+        return (end - start).total_seconds()
+
+
+@dataclass
+class AgentSession:
+    """A session that started subagents: a root of the agent tree"""
+
+    session_id: str
+    project: Optional[str]
+    subagent_count: int
+    last_started: Optional[str]
+    source: Optional[str] = None
+
+
+@dataclass
+class Subagent:
+    """One subagent of a session, with what it did"""
+
+    agent_id: str
+    agent_type: Optional[str]
+    started_at: Optional[str]
+    stopped_at: Optional[str]
+    tool_counts: Dict[str, int]
+    error_count: int
+
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        if not (self.started_at and self.stopped_at):
+            return None
+        start = datetime.strptime(self.started_at, event_store.SQLITE_TIMESTAMP_FORMAT)
+        stop = datetime.strptime(self.stopped_at, event_store.SQLITE_TIMESTAMP_FORMAT)
+        return (stop - start).total_seconds()
+
+
+@dataclass
+class ErrorCluster:
+    """Tool failures whose error text differs only in paths, numbers and hashes"""
+
+    cluster_id: str
+    tool: Optional[str]
+    signature: str
+    count: int
+    session_count: int
+    first_seen: str
+    last_seen: str
+    example_id: Optional[str] = None
+    source: Optional[str] = None
+
+
+@dataclass
+class DatabaseHealth:
+    """One database file's pages and log, with its last maintenance report"""
+
+    db_bytes: int
+    wal_bytes: int
+    page_size: int
+    page_count: int
+    freelist_count: int
+    # What claude-events-maintain last found, index sizes and all; None
+    # until it has run against this file.
+    maintained: Optional[Dict[str, Any]] = None
+    source: Optional[str] = None
+
+    @property
+    def free_ratio(self) -> float:
+        return self.freelist_count / self.page_count if self.page_count else 0.0
+
+
+# What an event list needs. Tool input and output can run to megabytes, so
+# they stay in the database until an event is opened (get_payload); output is
+# read only for rows stored before status was, whose status is derived from it.
+EVENT_LIST_COLUMNS = """
+    id, event_id, created_at, hook_type, project_name, session_id, tool_name,
+    user_prompt, status, NULL AS tool_input,
+    CASE WHEN status IS NULL THEN tool_output END AS tool_output
+"""
+
+
+# --- search ---
+#
+# A search is words, "quoted phrases", field:value terms and re:patterns:
+#
+#     tool:Bash status:error project:dotfiles after:2026-10-01 "exact phrase" re:fail(ed|ure)
+#
+# Fields match exactly (session: by prefix, as the filters show IDs cut
+# short), so each compiles to a predicate an index covers; repeating a field
+# means any of its values. after: and before: take a date, a time or an age,
+# as --since does. Words and phrases match part of the event ID, type,
+# prompt or tool name, as the search always has. A re: pattern is a Python
+# regular expression over the same columns, run by a SQLite function, and
+# goes last in the WHERE clause so it only sees rows everything else let
+# through. A word like http://x whose prefix is not a field is just a word.
+
+SEARCH_FIELDS = {
+    "tool": "tool_name",
+    "status": "status",
+    "project": "project_name",
+    "type": "hook_type",
+    "session": "session_id",
+    "agent": "agent_id",
+    "cluster": "error_cluster",
+}
+SEARCH_TIMES = {"after": ">=", "before": "<"}
+SEARCH_TEXT_COLUMNS = ("event_id", "hook_type", "user_prompt", "tool_name")
+SEARCH_TERM = re.compile(
+    r'(?:(?P<field>[a-z]+):)?(?:"(?P<quoted>[^"]*)"|(?P<bare>\S+))'
+)
+
+
+class SearchError(ValueError):
+    """A search that cannot be run: a bad date, status or pattern"""
+
+
+@dataclass
+class Search:
+    """A parsed search; see parse_search"""
+
+    fields: Dict[str, List[str]] = field(default_factory=dict)
+    times: Dict[str, str] = field(default_factory=dict)
+    text: List[str] = field(default_factory=list)
+    patterns: List[str] = field(default_factory=list)
+
+
+def parse_search(query: str) -> Search:
+    """Split a search into its terms, checking each; raises SearchError"""
+    search = Search()
+    for term in SEARCH_TERM.finditer(query):
+        name = term["field"]
+        value = term["quoted"] if term["quoted"] is not None else term["bare"]
+        if name in SEARCH_FIELDS and value:
+            if name == "status" and value not in {
+                status.value for status in EventStatus
+            }:
+                raise SearchError(
+                    f"status must be success, error or warning, not {value!r}"
+                )
+            search.fields.setdefault(name, []).append(value)
+        elif name in SEARCH_TIMES and value:
+            try:
+                search.times[name] = event_store.parse_when(value)
+            except ValueError as e:
+                raise SearchError(f"{name}: {e}") from e
+        elif name == "re" and value:
+            try:
+                compiled_pattern(value)
+            except re.error as e:
+                raise SearchError(f"re:{value}: {e}") from e
+            search.patterns.append(value)
+        elif term["quoted"] is not None and not name:
+            if value:
+                search.text.append(value)
+        else:
+            search.text.append(term[0])
+    return search
+
+
+def search_where(query: str) -> Tuple[str, List[Any]]:
+    """The AND clauses for a search, and their parameters"""
+    search = parse_search(query)
+    where = ""
+    params: List[Any] = []
+    for name, values in search.fields.items():
+        column = SEARCH_FIELDS[name]
+        if name == "session":
+            ranges = " OR ".join(f"({column} >= ? AND {column} < ?)" for _ in values)
+            where += f" AND ({ranges})"
+            for prefix in values:
+                params.extend([prefix, prefix + "\U0010ffff"])
+        else:
+            where += f" AND {column} IN ({','.join('?' * len(values))})"
+            params.extend(values)
+    for name, when in search.times.items():
+        where += f" AND created_at {SEARCH_TIMES[name]} ?"
+        params.append(when)
+    for text in search.text:
+        where += (
+            " AND ("
+            + " OR ".join(f"{column} LIKE ?" for column in SEARCH_TEXT_COLUMNS)
+            + ")"
+        )
+        params.extend([f"%{text}%"] * len(SEARCH_TEXT_COLUMNS))
+    for pattern in search.patterns:
+        where += (
+            " AND ("
+            + " OR ".join(f"regexp(?, {column})" for column in SEARCH_TEXT_COLUMNS)
+            + ")"
+        )
+        params.extend([pattern] * len(SEARCH_TEXT_COLUMNS))
+    return where, params
+
+
+@lru_cache(maxsize=64)
+def compiled_pattern(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
+def regexp(pattern: str, value: Optional[str]) -> bool:
+    """SQLite's regexp(): whether `pattern` matches anywhere in `value`"""
+    return value is not None and compiled_pattern(pattern).search(value) is not None
+
+
+class DatabaseManager:
+    """SQLite database connection manager"""
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(
+        self, db_path: str, name: Optional[str] = None, cache_mb: Optional[int] = None
+    ):
+        self.db_path = Path(db_path).expanduser()
+        self.name = name
+        self.cache_mb = cache_mb
+        self.connection: Optional[aiosqlite.Connection] = None
+        # What connect() found missing from an older or partly loaded file
+        self.problems: List[str] = []
+        # Ended sessions this reader aggregated itself: session -> (last_id, summary)
+        self.ended_summaries: Dict[str, Tuple[int, SessionSummary]] = {}
+
+    async def connect(self):
+        """Open the database read-only, and note what it is missing.
+
+        A reader never upgrades the schema: that would take the write lock
+        the hooks are waiting on, and a synced copy is another machine's to
+        upgrade. The hooks and claude-events-maintain do it instead; until
+        then an older schema or a missing index is logged and kept in
+        `problems` for the dashboard to show.
+        """
+        self.logger.info(f"Connecting to database at {self.db_path}")
+        uri = f"{self.db_path.absolute().as_uri()}?mode=ro"
+        self.connection = await aiosqlite.connect(uri, uri=True, timeout=30.0)
+        self.connection.row_factory = aiosqlite.Row
+        await self.connection.create_function("regexp", 2, regexp, deterministic=True)
+        if self.cache_mb:
+            # Negative means KiB rather than pages
+            await self.connection.execute(
+                f"PRAGMA cache_size = -{self.cache_mb * 1024}"
+            )
+        self.problems = await self._problems()
+        for problem in self.problems:
+            self.logger.warning(problem)
+        self.logger.info("Database connection established")
+
+    async def _problems(self) -> List[str]:
+        """What this file lacks that the current schema expects."""
+        where = self.name or str(self.db_path)
+        async with self.connection.execute("PRAGMA user_version") as cursor:
+            (version,) = await cursor.fetchone()
+        async with self.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        ) as cursor:
+            present = {row["name"] for row in await cursor.fetchall()}
+
+        problems = []
+        if version < event_store.SCHEMA_VERSION:
+            problems.append(
+                f"{where} is at schema version {version} of {event_store.SCHEMA_VERSION}; "
+                "some views will fail until a hook or claude-events-maintain on its machine upgrades it"
+            )
+        missing = [
+            name
+            for name in map(event_store.index_name, event_store.INDEXES)
+            if name not in present
+        ]
+        if version and missing:
+            problems.append(
+                f"{where} is missing {', '.join(missing)}; some views will be slow"
+            )
+        return problems
+
+    async def close(self):
+        """Close database connection"""
+        if self.connection:
+            await self.connection.close()
+
+    async def interrupt(self):
+        """Abort the query running on this connection; it raises OperationalError"""
+        if self.connection:
+            await self.connection.interrupt()
+
+    async def get_events(
+        self,
+        limit: int = 1000,
+        offset: int = 0,
+        projects: Optional[Set[str]] = None,
+        types: Optional[Set[str]] = None,
+        sessions: Optional[Set[str]] = None,
+        search: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[Event]:
+        """Fetch events with optional filters"""
+        where, params = self._where(projects, types, sessions, search, since, until)
+        query = f"SELECT {EVENT_LIST_COLUMNS} FROM claude_events {where} ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        async with self.connection.execute(query, params) as cursor:
+            rows = await cursor.fetchall()
+            return [self._row_to_event(row) for row in rows]
+
+    async def get_payload(self, event_id: str) -> Optional[Dict[str, Optional[str]]]:
+        """An event's tool_input, tool_output and full_event, still encoded.
+
+        Decoding is left to the caller, which may want it off the event loop.
+        """
+        query = "SELECT tool_input, tool_output, full_event FROM claude_events WHERE event_id = ?"
+        async with self.connection.execute(query, (event_id,)) as cursor:
+            row = await cursor.fetchone()
+        return dict(row) if row else None
+
+    async def iter_rows(
+        self,
+        projects: Optional[Set[str]] = None,
+        types: Optional[Set[str]] = None,
+        sessions: Optional[Set[str]] = None,
+        search: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        newest_first: bool = False,
+        limit: Optional[int] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[aiosqlite.Row]:
+        """Yield every matching row, oldest first unless `newest_first`.
+
+        SQLite steps the statement as rows are asked for, so fetching in
+        chunks keeps memory flat however many rows match. The id tiebreak
+        keeps events stored in the same second in the order they arrived.
+        """
+        where, params = self._where(projects, types, sessions, search, since, until)
+        direction = "DESC" if newest_first else "ASC"
+        query = f"SELECT * FROM claude_events {where} ORDER BY created_at {direction}, id {direction}"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        async with self.connection.execute(query, params) as cursor:
+            while rows := await cursor.fetchmany(chunk_size):
+                for row in rows:
+                    yield row
+
+    async def get_session_summaries(self, limit: int = 200) -> List[SessionSummary]:
+        """Aggregates for the `limit` most recently active sessions.
+
+        Ended sessions are read from session_summaries, which the local
+        maintenance pass fills in (see session_summaries.py), or from this
+        reader's memory once it has aggregated them. Only the rest are
+        aggregated from their events; nothing is written back.
+        """
+        query = (
+            "SELECT session_id, MAX(id) AS last_id FROM claude_events "
+            "WHERE session_id IS NOT NULL "
+            "GROUP BY session_id ORDER BY MAX(created_at) DESC LIMIT ?"
+        )
+        async with self.connection.execute(query, (limit,)) as cursor:
+            latest = {
+                row["session_id"]: row["last_id"] for row in await cursor.fetchall()
+            }
+        if not latest:
+            return []
+
+        summaries: Dict[str, SessionSummary] = {}
+        for session, last_id in latest.items():
+            remembered = self.ended_summaries.get(session)
+            if remembered and remembered[0] == last_id:
+                summaries[session] = remembered[1]
+
+        unknown = [session for session in latest if session not in summaries]
+        if unknown:
+            placeholders = ",".join("?" * len(unknown))
+            async with self.connection.execute(
+                f"SELECT * FROM session_summaries WHERE session_id IN ({placeholders})",
+                unknown,
+            ) as cursor:
+                for row in await cursor.fetchall():
+                    if row["last_id"] == latest[row["session_id"]]:
+                        summaries[row["session_id"]] = self._row_to_summary(
+                            row, ended=True
+                        )
+
+        stale = [session for session in latest if session not in summaries]
+        if stale:
+            placeholders = ",".join("?" * len(stale))
+            async with self.connection.execute(
+                session_summaries.SESSION_SUMMARY_SQL.format(placeholders=placeholders),
+                stale,
+            ) as cursor:
+                computed = await cursor.fetchall()
+
+            for row in computed:
+                summary = self._row_to_summary(row, ended=bool(row["ended"]))
+                summaries[row["session_id"]] = summary
+                if row["ended"]:
+                    self.ended_summaries[row["session_id"]] = (row["last_id"], summary)
+
+        # Token totals come from the transcript rollups, which are kept
+        # current as they are indexed, so they are never cached here.
+        placeholders = ",".join("?" * len(summaries))
+        async with self.connection.execute(
+            "SELECT session_id, SUM(input_tokens + output_tokens + cache_creation_tokens) AS tokens "
+            f"FROM session_usage WHERE session_id IN ({placeholders}) GROUP BY session_id",
+            list(summaries),
+        ) as cursor:
+            for row in await cursor.fetchall():
+                summaries[row["session_id"]].tokens = row["tokens"]
+
+        return [summaries[session] for session in latest if session in summaries]
+
+    def _row_to_summary(self, row: aiosqlite.Row, ended: bool) -> SessionSummary:
+        return SessionSummary(
+            session_id=row["session_id"],
+            project=row["project_name"],
+            started_at=row["started_at"],
+            ended_at=row["ended_at"],
+            event_count=row["event_count"],
+            error_count=row["error_count"] or 0,
+            tool_seconds=row["tool_seconds"],
+            type_counts=json.loads(row["type_counts"]),
+            tool_counts=json.loads(row["tool_counts"]),
+            ended=ended,
+            source=self.name,
+        )
+
+    async def get_agent_sessions(self, limit: int = 100) -> List[AgentSession]:
+        """Sessions that started subagents, most recent first"""
+        query = """
+            SELECT parent_session_id AS session_id,
+                   COUNT(*) AS subagents,
+                   MAX(started_at) AS last_started,
+                   (SELECT project_name FROM claude_events e
+                    WHERE e.session_id = a.parent_session_id LIMIT 1) AS project_name
+            FROM agent_edges a
+            GROUP BY parent_session_id
+            ORDER BY last_started DESC
+            LIMIT ?
+        """
+        async with self.connection.execute(query, (limit,)) as cursor:
+            return [
+                AgentSession(
+                    session_id=row["session_id"],
+                    project=row["project_name"],
+                    subagent_count=row["subagents"],
+                    last_started=row["last_started"],
+                    source=self.name,
+                )
+                for row in await cursor.fetchall()
+            ]
+
+    async def get_subagents(self, session_id: str) -> List[Subagent]:
+        """A session's subagents, in the order they started"""
+        query = (
+            "SELECT agent_id, agent_type, started_at, stopped_at FROM agent_edges "
+            "WHERE parent_session_id = ? ORDER BY started_at"
+        )
+        async with self.connection.execute(query, (session_id,)) as cursor:
+            subagents = {
+                row["agent_id"]: Subagent(
+                    agent_id=row["agent_id"],
+                    agent_type=row["agent_type"],
+                    started_at=row["started_at"],
+                    stopped_at=row["stopped_at"],
+                    tool_counts={},
+                    error_count=0,
+                )
+                for row in await cursor.fetchall()
+            }
+
+        # Reads only this session's subagent events, through idx_session_agent
+        query = """
+            SELECT agent_id, tool_name, COUNT(*) AS calls, SUM(status = 'error') AS errors
+            FROM claude_events
+            WHERE session_id = ? AND agent_id IS NOT NULL
+              AND hook_type IN ('PostToolUse', 'PostToolUseFailure')
+            GROUP BY agent_id, tool_name
+        """
+        async with self.connection.execute(query, (session_id,)) as cursor:
+            for row in await cursor.fetchall():
+                subagent = subagents.get(row["agent_id"])
+                if subagent:
+                    subagent.tool_counts[row["tool_name"] or "?"] = row["calls"]
+                    subagent.error_count += row["errors"] or 0
+
+        return list(subagents.values())
+
+    async def get_token_burn(
+        self, projects: Optional[Set[str]] = None, window_minutes: int = 15
+    ) -> Dict[str, float]:
+        """Tokens used in the last `window_minutes`, and the rate per minute.
+
+        Counts input, output and cache-creation tokens; cache reads are
+        cheap and would drown the rest. Reads idx_token_usage_created only.
+        Zero until bin/claude-events-index-transcripts has run.
+        """
+        since = (
+            datetime.now(timezone.utc) - timedelta(minutes=window_minutes)
+        ).strftime(event_store.SQLITE_TIMESTAMP_FORMAT)
+        query = (
+            "SELECT COALESCE(SUM(input_tokens + output_tokens + cache_creation_tokens), 0) "
+            "FROM token_usage WHERE created_at >= ?"
+        )
+        params: List[Any] = [since]
+        if projects:
+            query += f" AND project_name IN ({','.join('?' * len(projects))})"
+            params.extend(projects)
+        async with self.connection.execute(query, params) as cursor:
+            tokens = (await cursor.fetchone())[0]
+        return {"tokens": tokens, "per_minute": tokens / window_minutes}
+
+    async def get_error_clusters(self, limit: int = 50) -> List[ErrorCluster]:
+        """The most frequent error clusters, with the latest error of each.
+
+        The aggregate reads only idx_error_cluster, which holds just the
+        error rows. Rows stored before clustering was recorded are not in it.
+        """
+        query = """
+            SELECT error_cluster, COUNT(*) AS errors,
+                   COUNT(DISTINCT session_id) AS sessions,
+                   MIN(created_at) AS first_seen, MAX(created_at) AS last_seen,
+                   MAX(id) AS latest
+            FROM claude_events
+            WHERE error_cluster IS NOT NULL
+            GROUP BY error_cluster
+            ORDER BY errors DESC, last_seen DESC
+            LIMIT ?
+        """
+        async with self.connection.execute(query, (limit,)) as cursor:
+            clusters = await cursor.fetchall()
+        if not clusters:
+            return []
+
+        latest = [row["latest"] for row in clusters]
+        query = (
+            "SELECT id, event_id, tool_name, tool_output, full_event FROM claude_events "
+            f"WHERE id IN ({','.join('?' * len(latest))})"
+        )
+        async with self.connection.execute(query, latest) as cursor:
+            examples = {row["id"]: row for row in await cursor.fetchall()}
+
+        found = []
+        for row in clusters:
+            example = examples.get(row["latest"])
+            tool, text = None, ""
+            if example:
+                tool = example["tool_name"]
+                payload = self._decode(example["full_event"])
+                text = (
+                    event_store.error_text(
+                        payload if isinstance(payload, dict) else {},
+                        self._decode(example["tool_output"]),
+                    )
+                    or ""
+                )
+            found.append(
+                ErrorCluster(
+                    cluster_id=row["error_cluster"],
+                    tool=tool,
+                    signature=event_store.normalize_error(text),
+                    count=row["errors"],
+                    session_count=row["sessions"],
+                    first_seen=row["first_seen"],
+                    last_seen=row["last_seen"],
+                    example_id=example["event_id"] if example else None,
+                    source=self.name,
+                )
+            )
+        return found
+
+    async def get_max_id(self) -> int:
+        """The id of the newest row, or 0 for an empty table"""
+        async with self.connection.execute(
+            "SELECT MAX(id) FROM claude_events"
+        ) as cursor:
+            row = await cursor.fetchone()
+            return row[0] or 0
+
+    async def get_rows_between(
+        self,
+        after_id: int,
+        up_to_id: int,
+        projects: Optional[Set[str]] = None,
+        types: Optional[Set[str]] = None,
+        sessions: Optional[Set[str]] = None,
+        search: Optional[str] = None,
+    ) -> List[aiosqlite.Row]:
+        """Matching rows with after_id < id <= up_to_id, in id order.
+
+        ids only grow, so a reader that remembers the last one it saw picks
+        up exactly the rows stored since. Bounding the range above lets it
+        skip past rows the filters reject instead of rereading them.
+        """
+        where, params = self._where(projects, types, sessions, search, None, None)
+        query = (
+            f"SELECT * FROM claude_events {where} AND id > ? AND id <= ? ORDER BY id"
+        )
+        params.extend([after_id, up_to_id])
+        async with self.connection.execute(query, params) as cursor:
+            return await cursor.fetchall()
+
+    def wal_bytes(self) -> int:
+        """The size of the write-ahead log, from the file system alone"""
+        return event_maintenance.file_size(event_maintenance.wal_path(self.db_path))
+
+    async def get_health(self) -> DatabaseHealth:
+        """The file's pages and log now, and what the last maintenance pass found.
+
+        The PRAGMAs read only the database header. Sizing the indexes reads
+        every page, so those come from the maintenance job's saved report.
+        """
+        pragmas = {}
+        for name in ("page_size", "page_count", "freelist_count"):
+            async with self.connection.execute(f"PRAGMA {name}") as cursor:
+                pragmas[name] = (await cursor.fetchone())[0]
+        query = "SELECT value FROM checkpoints WHERE name = ?"
+        async with self.connection.execute(
+            query, (event_maintenance.HEALTH,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        return DatabaseHealth(
+            db_bytes=event_maintenance.file_size(self.db_path),
+            wal_bytes=self.wal_bytes(),
+            maintained=json.loads(row[0]) if row else None,
+            source=self.name,
+            **pragmas,
+        )
+
+    async def data_version(self) -> int:
+        """Changes whenever another connection commits to the database"""
+        async with self.connection.execute("PRAGMA data_version") as cursor:
+            row = await cursor.fetchone()
+            return row[0]
+
+    @staticmethod
+    def _where(
+        projects: Optional[Set[str]],
+        types: Optional[Set[str]],
+        sessions: Optional[Set[str]],
+        search: Optional[str],
+        since: Optional[str],
+        until: Optional[str],
+    ) -> Tuple[str, List[Any]]:
+        """The WHERE clause and parameters every query shares.
+
+        `since` and `until` are SQLite timestamps (YYYY-MM-DD HH:MM:SS, UTC),
+        compared with created_at as text; `since` is inclusive, `until` is
+        not.
+        """
+        where = "WHERE 1=1"
+        params: List[Any] = []
+
+        if projects:
+            placeholders = ",".join("?" * len(projects))
+            where += f" AND project_name IN ({placeholders})"
+            params.extend(projects)
+
+        if types:
+            placeholders = ",".join("?" * len(types))
+            where += f" AND hook_type IN ({placeholders})"
+            params.extend(types)
+
+        if sessions:
+            placeholders = ",".join("?" * len(sessions))
+            where += f" AND session_id IN ({placeholders})"
+            params.extend(sessions)
+
+        if since:
+            where += " AND created_at >= ?"
+            params.append(since)
+
+        if until:
+            where += " AND created_at < ?"
+            params.append(until)
+
+        # Last, so that a regular expression sees as few rows as possible
+        if search:
+            search_clauses, search_params = search_where(search)
+            where += search_clauses
+            params.extend(search_params)
+
+        return where, params
+
+    def row_status(self, row: aiosqlite.Row, tool_output: Any = None) -> EventStatus:
+        """A row's status: stored at ingest, derived for rows that predate it"""
+        if row["status"]:
+            return EventStatus(row["status"])
+        if tool_output is None:
+            tool_output = self._decode(row["tool_output"])
+        return EventStatus(event_store.derive_status(row["hook_type"], tool_output))
+
+    async def get_latest_timestamp(self) -> Optional[str]:
+        """Get the timestamp of the most recent event"""
+        query = "SELECT MAX(created_at) as max_ts FROM claude_events"
+        async with self.connection.execute(query) as cursor:
+            row = await cursor.fetchone()
+            return row["max_ts"] if row else None
+
+    async def get_stats(
+        self,
+        projects: Optional[Set[str]] = None,
+        types: Optional[Set[str]] = None,
+        sessions: Optional[Set[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """Get event statistics"""
+        base_where, params = self._where(projects, types, sessions, None, since, until)
+
+        # Status is stored at ingest; only rows written before that column
+        # existed need their tool_output decoded. The unary + keeps SQLite
+        # from walking idx_status to avoid a sort, which under a project
+        # filter visits every row; the filter's own index is far cheaper.
+        stats_query = f"SELECT status, COUNT(*) as count FROM claude_events {base_where} GROUP BY +status"
+        async with self.connection.execute(stats_query, params) as cursor:
+            rows = await cursor.fetchall()
+
+        stats = {"total": 0, "success": 0, "error": 0, "warning": 0}
+        legacy = 0
+        for row in rows:
+            stats["total"] += row["count"]
+            if row["status"] in stats:
+                stats[row["status"]] += row["count"]
+            else:
+                legacy += row["count"]
+
+        if legacy:
+            legacy_query = f"SELECT hook_type, tool_output FROM claude_events {base_where} AND status IS NULL"
+            async with self.connection.execute(legacy_query, params) as cursor:
+                async for row in cursor:
+                    status = event_store.derive_status(
+                        row["hook_type"], self._decode(row["tool_output"])
+                    )
+                    stats[status] += 1
+
+        return stats
+
+    async def get_unique_projects(self) -> List[str]:
+        """Get list of unique project names"""
+        query = "SELECT DISTINCT project_name FROM claude_events WHERE project_name IS NOT NULL ORDER BY project_name"
+        async with self.connection.execute(query) as cursor:
+            rows = await cursor.fetchall()
+            return [row["project_name"] for row in rows]
+
+    async def get_unique_types(self) -> List[str]:
+        """Get list of unique event types"""
+        query = "SELECT DISTINCT hook_type FROM claude_events ORDER BY hook_type"
+        async with self.connection.execute(query) as cursor:
+            rows = await cursor.fetchall()
+            return [row["hook_type"] for row in rows]
+
+    async def get_unique_sessions(self, limit: Optional[int] = None) -> List[str]:
+        """Get list of unique session IDs, the `limit` most recent if given"""
+        # Grouping reads idx_session_created alone; a DISTINCT ordered by
+        # created_at walked the whole table and sorted it.
+        query = (
+            "SELECT session_id FROM claude_events WHERE session_id IS NOT NULL "
+            "GROUP BY session_id ORDER BY MAX(created_at) DESC LIMIT ?"
+        )
+        async with self.connection.execute(
+            query, (-1 if limit is None else limit,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+            return [row["session_id"] for row in rows]
+
+    @staticmethod
+    def _decode(raw: Optional[str]) -> Any:
+        """Decode a JSON column, or None if it is empty or malformed"""
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            return None
+
+    def _row_to_event(self, row: aiosqlite.Row) -> Event:
+        """Convert database row to Event object"""
+        # Parse created_at from SQLite datetime format (YYYY-MM-DD HH:MM:SS) to milliseconds
+        created_at_str = row["created_at"]
+        if created_at_str:
+            try:
+                # SQLite datetime format: "2025-07-27 23:51:43"
+                dt = datetime.strptime(created_at_str, "%Y-%m-%d %H:%M:%S")
+                # Assume UTC timezone
+                dt = dt.replace(tzinfo=timezone.utc)
+                timestamp_ms = int(dt.timestamp() * 1000)
+            except (ValueError, AttributeError):
+                timestamp_ms = int(datetime.now().timestamp() * 1000)
+        else:
+            timestamp_ms = int(datetime.now().timestamp() * 1000)
+
+        # Parse tool input/output
+        tool_input = None
+        tool_output = None
+        if row["tool_input"]:
+            try:
+                tool_input = json.loads(row["tool_input"])
+            except (json.JSONDecodeError, TypeError):
+                tool_input = {"raw": row["tool_input"]}
+
+        if row["tool_output"]:
+            try:
+                tool_output = json.loads(row["tool_output"])
+            except (json.JSONDecodeError, TypeError):
+                tool_output = {"raw": row["tool_output"]}
+
+        status = self.row_status(row, tool_output)
+        error_details = None
+        if status == EventStatus.ERROR and isinstance(tool_output, dict):
+            error_details = str(tool_output.get("error", ""))
+
+        # Map fields from actual schema to expected schema
+        return Event(
+            id=row["event_id"],
+            timestamp=timestamp_ms,
+            type=row["hook_type"],
+            project=row["project_name"],
+            status=status,
+            session_id=row["session_id"],
+            tool=row["tool_name"],
+            prompt=row["user_prompt"],
+            input=tool_input,
+            output=tool_output,
+            duration_ms=None,  # Not available in current schema
+            error_details=error_details,
+            source=self.name,
+        )
+
+
+class FederatedDatabase:
+    """Several event databases read as one, newest events first.
+
+    Every query goes to each selected source concurrently; aiosqlite runs
+    each connection on its own thread, so N sources cost about as much as
+    the slowest. Event lists are merged with a k-way merge on timestamp,
+    which is cheap because every source already returns them sorted.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, sources: Sequence[DatabaseManager]):
+        self.sources = list(sources)
+
+    @property
+    def names(self) -> List[str]:
+        return [source.name for source in self.sources if source.name]
+
+    async def connect(self):
+        await asyncio.gather(*(source.connect() for source in self.sources))
+
+    @property
+    def problems(self) -> List[str]:
+        return [problem for source in self.sources for problem in source.problems]
+
+    async def close(self):
+        await asyncio.gather(*(source.close() for source in self.sources))
+
+    async def interrupt(self):
+        await asyncio.gather(*(source.interrupt() for source in self.sources))
+
+    def _selected(self, names: Optional[Set[str]]) -> List[DatabaseManager]:
+        if not names:
+            return self.sources
+        return [source for source in self.sources if source.name in names]
+
+    async def _each(
+        self, names: Optional[Set[str]], method: str, **kwargs
+    ) -> List[Any]:
+        return await asyncio.gather(
+            *(getattr(source, method)(**kwargs) for source in self._selected(names))
+        )
+
+    async def get_events(
+        self,
+        limit: int = 1000,
+        offset: int = 0,
+        sources: Optional[Set[str]] = None,
+        **filters,
+    ) -> List[Event]:
+        """Fetch events from every source, merged newest first"""
+        # Any source could supply the whole page, so each is asked for all
+        # of it; the merge then stops as soon as the page is full.
+        per_source = await self._each(
+            sources, "get_events", limit=limit + offset, **filters
+        )
+        merged = heapq.merge(
+            *per_source, key=lambda event: event.timestamp, reverse=True
+        )
+        return list(islice(merged, offset, offset + limit))
+
+    async def get_payload(self, event: Event) -> Optional[Dict[str, Optional[str]]]:
+        """An event's payload, from the source that recorded it"""
+        names = {event.source} if event.source else None
+        for payload in await self._each(names, "get_payload", event_id=event.id):
+            if payload is not None:
+                return payload
+        return None
+
+    async def get_stats(
+        self, sources: Optional[Set[str]] = None, **filters
+    ) -> Dict[str, int]:
+        """Event statistics summed across sources"""
+        totals = {"total": 0, "success": 0, "error": 0, "warning": 0}
+        for stats in await self._each(sources, "get_stats", **filters):
+            for key in totals:
+                totals[key] += stats[key]
+        return totals
+
+    async def get_latest_timestamp(self) -> Optional[str]:
+        latest = [ts for ts in await self._each(None, "get_latest_timestamp") if ts]
+        return max(latest) if latest else None
+
+    async def get_unique_projects(self) -> List[str]:
+        return sorted(set().union(*await self._each(None, "get_unique_projects")))
+
+    async def get_unique_types(self) -> List[str]:
+        return sorted(set().union(*await self._each(None, "get_unique_types")))
+
+    async def get_session_summaries(self, limit: int = 200) -> List[SessionSummary]:
+        """Each source's most recent sessions, most recently active first"""
+        found = await self._each(None, "get_session_summaries", limit=limit)
+        merged = heapq.merge(*found, key=lambda summary: summary.ended_at, reverse=True)
+        return list(islice(merged, limit))
+
+    async def get_agent_sessions(self, limit: int = 100) -> List[AgentSession]:
+        found = await self._each(None, "get_agent_sessions", limit=limit)
+        merged = heapq.merge(
+            *found, key=lambda session: session.last_started or "", reverse=True
+        )
+        return list(islice(merged, limit))
+
+    async def get_token_burn(
+        self, sources: Optional[Set[str]] = None, **filters
+    ) -> Dict[str, float]:
+        burn = {"tokens": 0, "per_minute": 0.0}
+        for found in await self._each(sources, "get_token_burn", **filters):
+            for key in burn:
+                burn[key] += found[key]
+        return burn
+
+    async def get_error_clusters(self, limit: int = 50) -> List[ErrorCluster]:
+        """Clusters across sources; the same fingerprint is the same error anywhere"""
+        merged: Dict[str, ErrorCluster] = {}
+        for found in await self._each(None, "get_error_clusters", limit=limit):
+            for cluster in found:
+                seen = merged.get(cluster.cluster_id)
+                if seen is None:
+                    merged[cluster.cluster_id] = cluster
+                    continue
+                seen.count += cluster.count
+                seen.session_count += cluster.session_count
+                seen.first_seen = min(seen.first_seen, cluster.first_seen)
+                if cluster.last_seen > seen.last_seen:
+                    seen.last_seen = cluster.last_seen
+                    seen.example_id, seen.source = cluster.example_id, cluster.source
+        ordered = sorted(
+            merged.values(), key=lambda c: (c.count, c.last_seen), reverse=True
+        )
+        return ordered[:limit]
+
+    async def get_health(self) -> List[DatabaseHealth]:
+        return await self._each(None, "get_health")
+
+    def wal_bytes(self) -> int:
+        """The largest of the sources' write-ahead logs"""
+        return max((source.wal_bytes() for source in self.sources), default=0)
+
+    async def get_subagents(
+        self, session_id: str, source: Optional[str] = None
+    ) -> List[Subagent]:
+        """One session's subagents, from the source that recorded it"""
+        names = {source} if source else None
+        return [
+            found
+            for each in await self._each(names, "get_subagents", session_id=session_id)
+            for found in each
+        ]
+
+    async def get_unique_sessions(self, limit: Optional[int] = None) -> List[str]:
+        # Sessions belong to one machine, so concatenating keeps each
+        # source's most-recent-first order without a cross-source sort. The
+        # limit is per source.
+        sessions: Dict[str, None] = {}
+        for found in await self._each(None, "get_unique_sessions", limit=limit):
+            sessions.update(dict.fromkeys(found))
+        return list(sessions)
+
+
+def source_name(db_path: str) -> str:
+    """Label a database for the Sources filter.
+
+    Synced copies are usually laid out one directory per machine
+    (ci-runner-1/events.db), or named after it (devbox.db). The local
+    ~/.claude/events.db is labelled with this host's name.
+    """
+    path = Path(db_path).expanduser()
+    if path.stem != "events":
+        return path.stem
+    if path.parent.name == ".claude":
+        return socket.gethostname().split(".")[0]
+    return path.parent.name
+
+
+def parse_sources(
+    specs: Sequence[str], cache_mb: Optional[int] = None
+) -> List[DatabaseManager]:
+    """One DatabaseManager per --db value, each [NAME=]PATH"""
+    if len(specs) == 1 and "=" not in specs[0]:
+        return [DatabaseManager(specs[0], cache_mb=cache_mb)]
+
+    sources = []
+    for spec in specs:
+        name, _, path = spec.rpartition("=")
+        sources.append(
+            DatabaseManager(path, name or source_name(path), cache_mb=cache_mb)
+        )
+    return sources
@@ -0,0 +1,217 @@
+"""Tests for replaying the JSONL event logs into the events database.
+
+Replay exists to repair drift between the two stores, so the property worth
+pinning is that it only ever adds what is missing: a second replay, or a
+replay over events capture-event.py already stored, must insert nothing.
+
+Run with: uv run --with pytest pytest bin/claude_events_replay_test.py
+"""
+
+import gzip
+import importlib.util
+import json
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+import pytest
+
+CLI = Path(__file__).parent / "claude-events-replay"
+_spec = importlib.util.spec_from_file_location(
+    "replay", CLI, loader=SourceFileLoader("replay", str(CLI))
+)
+replay = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(replay)
+
+event_store = sys.modules["event_store"]
+
+
+def payload(session="s1", hook="PostToolUse", tool="Read"):
+    return {
+        "session_id": session,
+        "hook_event_name": hook,
+        "tool_name": tool,
+        "cwd": "/Users/me/dev/app",
+        "tool_input": {"file_path": "/Users/me/dev/app/main.py"},
+    }
+
+
+def logged(event, logged_at):
+    """The line log-event-jsonl.py would append for `event`."""
+    enriched = {
+        **event,
+        "logged_at": logged_at,
+        "project_name": "app",
+        "claude_env": {"CLAUDE_PROJECT_DIR": "/Users/me/dev/app"},
+    }
+    return json.dumps(enriched, separators=(",", ":")) + "\n"
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "events-2026-10-01.jsonl"
+    path.write_text(
+        logged(payload(), "2026-10-01T12:00:00.000001+00:00")
+        + logged(payload(hook="PreToolUse"), "2026-10-01T12:00:01.000001+00:00")
+    )
+    return path
+
+
+def count(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM claude_events").fetchone()[0]
+
+
+def rows_of(path):
+    return replay.parse_rows(replay.read_lines([path]), jobs=1, rejected=[0])
+
+
+def test_replaying_a_log_twice_inserts_nothing_the_second_time(tmp_path, log_file):
+    db = tmp_path / "events.db"
+
+    assert replay.merge(db, rows_of(log_file)) == 2
+    assert replay.merge(db, rows_of(log_file)) == 0
+
+
+def capture(db, event, at):
+    """Store `event` as capture-event.py would have at `at`."""
+    conn = event_store.ensure_database(db)
+    event_store.insert_rows(
+        conn, [event_store.build_row(event, event_store.capture_context(event, at))]
+    )
+    conn.close()
+
+
+def test_a_merge_skips_events_capture_event_already_stored(tmp_path, log_file):
+    """The two hooks stamp their own IDs, so only the payload can match them."""
+    db = tmp_path / "events.db"
+    capture(db, payload(), datetime(2026, 10, 1, 12, 0, 0, 4000, tzinfo=timezone.utc))
+
+    assert replay.merge(db, rows_of(log_file)) == 1
+    assert replay.merge(db, rows_of(log_file)) == 0
+
+
+def test_a_payload_sent_again_is_kept_however_many_times_it_was_stored(tmp_path):
+    log_file = tmp_path / "events-2026-10-01.jsonl"
+    log_file.write_text(
+        "".join(
+            logged(
+                payload(hook="PreToolUse"), f"2026-10-01T12:00:0{second}.000001+00:00"
+            )
+            for second in range(4)
+        )
+    )
+    db = tmp_path / "events.db"
+    capture(
+        db,
+        payload(hook="PreToolUse"),
+        datetime(2026, 10, 1, 12, 0, 1, tzinfo=timezone.utc),
+    )
+
+    assert replay.merge(db, rows_of(log_file)) == 3
+    assert count(db) == 4
+    assert replay.merge(db, rows_of(log_file)) == 0
+
+    empty = tmp_path / "empty.db"
+    assert replay.merge(empty, rows_of(log_file)) == 4
+
+
+def test_a_rebuild_reads_compressed_logs_and_restores_the_indexes(tmp_path, log_file):
+    compressed = tmp_path / "events-2026-09-30.jsonl.gz"
+    with gzip.open(compressed, "wt") as f:
+        f.write(logged(payload(session="s0"), "2026-09-30T08:00:00.000001+00:00"))
+    db = tmp_path / "events.db"
+
+    loaded = replay.rebuild(db, rows_of(compressed))
+
+    assert loaded == 1
+    with sqlite3.connect(db) as conn:
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(claude_events)")}
+    assert {"idx_session_created", "idx_timestamp"} <= indexes
+
+
+def test_a_rebuild_replaces_the_events_under_an_open_connection(tmp_path, log_file):
+    db = tmp_path / "events.db"
+    capture(db, payload(session="old"), datetime(2026, 9, 1, tzinfo=timezone.utc))
+    reader = sqlite3.connect(db)
+    assert reader.execute("SELECT COUNT(*) FROM claude_events").fetchone()[0] == 1
+
+    assert replay.rebuild(db, rows_of(log_file)) == 2
+
+    assert reader.execute(
+        "SELECT DISTINCT session_id FROM claude_events"
+    ).fetchall() == [("s1",)]
+    reader.close()
+    assert not db.with_name("events.db.rebuild").exists()
+
+
+def test_a_replayed_event_keeps_its_logged_time(tmp_path, log_file):
+    db = tmp_path / "events.db"
+    replay.merge(db, rows_of(log_file))
+
+    with sqlite3.connect(db) as conn:
+        first = conn.execute("SELECT MIN(created_at) FROM claude_events").fetchone()[0]
+    assert first == "2026-10-01 12:00:00"
+
+
+def test_a_torn_line_is_counted_and_skipped(tmp_path, log_file):
+    with open(log_file, "a") as f:
+        f.write('{"session_id": "s1", "hook_ev')
+    rejected = [0]
+
+    rows = list(replay.parse_rows(replay.read_lines([log_file]), 1, rejected))
+
+    assert (len(rows), rejected[0]) == (2, 1)
+
+
+def test_a_replay_since_a_time_reads_only_the_later_lines_of_each_log(
+    tmp_path, log_file
+):
+    compressed = tmp_path / "events-2026-10-02.jsonl.gz"
+    with gzip.open(compressed, "wt") as f:
+        f.write(logged(payload(session="s0"), "2026-10-01T11:00:00.000001+00:00"))
+        f.write(logged(payload(session="s2"), "2026-10-02T08:00:00.000001+00:00"))
+
+    lines = replay.read_lines_since([log_file, compressed], "2026-10-01 12:00:01")
+    rows = list(replay.parse_rows(lines, 1, [0]))
+
+    assert [(row[1], row[2]) for row in rows] == [
+        ("PreToolUse", "s1"),
+        ("PostToolUse", "s2"),
+    ]
+    assert replay.logged_since(
+        [compressed, log_file, tmp_path / "events-2026-09-29.jsonl"],
+        "2026-10-01 12:00:01",
+    ) == [
+        compressed,
+        log_file,
+    ]
+
+
+def test_a_rebuild_since_a_time_is_refused_and_loses_nothing(
+    tmp_path, log_file, monkeypatch, capsys
+):
+    db_path = tmp_path / "events.db"
+    replay.merge(db_path, rows_of(log_file))
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "claude-events-replay",
+            "--db",
+            str(db_path),
+            "--rebuild",
+            "--since",
+            "1h",
+            str(log_file),
+        ],
+    )
+
+    with pytest.raises(SystemExit) as exit:
+        replay.main()
+
+    assert exit.value.code == 2
+    assert "not allowed with argument" in capsys.readouterr().err
+    assert count(db_path) == 2
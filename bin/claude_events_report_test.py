@@ -0,0 +1,60 @@
+"""Tests for the activity report generator.
+
+Run with: uv run --with pytest pytest bin/claude_events_report_test.py
+"""
+
+import importlib.util
+import sys
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+CLI = Path(__file__).parent / "claude-events-report"
+_spec = importlib.util.spec_from_file_location(
+    "report", CLI, loader=SourceFileLoader("report", str(CLI))
+)
+report = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(report)
+
+event_store = sys.modules["event_store"]
+
+
+def store(conn, events):
+    rows = []
+    for number, (project, hook, created_at, fields) in enumerate(events):
+        event = {
+            "session_id": "s1",
+            "hook_event_name": hook,
+            "cwd": f"/tmp/{project}",
+            **fields,
+        }
+        context = {
+            "event_id": f"e{number}",
+            "project_dir": f"/tmp/{project}",
+            "environment": {},
+            "created_at": created_at,
+        }
+        rows.append(event_store.build_row(event, context))
+    event_store.insert_rows(conn, rows)
+
+
+def test_the_report_covers_only_its_window_and_names_the_top_error(tmp_path):
+    conn = event_store.ensure_database(tmp_path / "events.db")
+    failure = {"tool_name": "Bash", "error": "exit 2 in /tmp/app/run.sh"}
+    store(
+        conn,
+        [
+            ("app", "PostToolUseFailure", "2026-09-01 12:00:00", failure),
+            ("app", "PostToolUseFailure", "2026-10-01 12:00:00", failure),
+            ("app", "PostToolUse", "2026-10-01 12:00:05", {"tool_name": "Read"}),
+            ("lib", "Stop", "2026-10-02 08:00:00", {}),
+        ],
+    )
+    report.event_rollups.update_rollups(conn)
+
+    gathered = report.gather(conn, "2026-10-01 00:00:00", "2026-10-03 00:00:00")
+    markdown = report.render_markdown(gathered)
+    conn.close()
+
+    assert (gathered["events"], gathered["statuses"]) == (3, {"error": 1, "success": 2})
+    assert [p["project"] for p in gathered["by_project"]] == ["app", "lib"]
+    assert "| 1 | Bash | exit <n> in <path> |" in markdown
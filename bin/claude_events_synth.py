@@ -0,0 +1,236 @@
+"""Synthetic Claude Code hook payloads for benchmarks and fixtures.
+
+Each generator returns a payload shaped like the JSON Claude Code writes to a
+hook's stdin, for the 12 event types log-event-jsonl.py lists. Sessions run
+the way real ones do: a SessionStart, prompts, Pre/PostToolUse pairs for a
+skewed mix of tools, the odd failure, a Stop, a SessionEnd.
+
+Deterministic for a given seed, so two benchmark runs load the same bytes.
+"""
+
+import random
+
+EVENT_TYPES = (
+    "SessionStart",
+    "UserPromptSubmit",
+    "PreToolUse",
+    "PermissionRequest",
+    "PostToolUse",
+    "PostToolUseFailure",
+    "Notification",
+    "SubagentStart",
+    "SubagentStop",
+    "Stop",
+    "PreCompact",
+    "SessionEnd",
+)
+
+# Weighted the way a working session is: mostly reading and running commands.
+TOOL_WEIGHTS = {
+    "Read": 35,
+    "Bash": 25,
+    "Grep": 12,
+    "Edit": 10,
+    "Glob": 6,
+    "Write": 4,
+    "Task": 3,
+    "WebFetch": 2,
+    "TodoWrite": 3,
+}
+
+WORDS = (
+    "refactor the parser so errors carry line numbers and add a regression "
+    "test for the empty file case then run the suite and fix what breaks"
+).split()
+
+
+class PayloadFactory:
+    """Builds payloads for one simulated machine.
+
+    `output_bytes` sets the size of each tool's output, the part of a payload
+    that dominates its size in practice. `error_ratio` is the share of tool
+    calls that fail.
+    """
+
+    def __init__(
+        self,
+        seed=0,
+        projects=("api", "web", "dotfiles"),
+        output_bytes=2048,
+        error_ratio=0.05,
+    ):
+        self.random = random.Random(seed)
+        self.projects = list(projects)
+        self.output_bytes = output_bytes
+        self.error_ratio = error_ratio
+        self._tools = list(TOOL_WEIGHTS)
+        self._weights = list(TOOL_WEIGHTS.values())
+        self._corpus = self._make_corpus(64 * 1024)
+
+    def new_session(self, project=None):
+        """Start a session; returns the fields every payload in it shares."""
+        project = project or self.random.choice(self.projects)
+        session_id = f"{self.random.getrandbits(128):032x}"
+        return {
+            "session_id": session_id,
+            "transcript_path": f"/Users/dev/.claude/projects/-Users-dev-{project}/{session_id}.jsonl",
+            "cwd": f"/Users/dev/src/{project}",
+        }
+
+    def payload(self, hook_type, session):
+        """One payload of `hook_type` within `session`."""
+        event = {**session, "hook_event_name": hook_type}
+        build = getattr(self, f"_{hook_type}", None)
+        if build:
+            event.update(build())
+        return event
+
+    def session_events(self, session=None, tool_calls=20):
+        """Yield every payload of one plausible session, in order."""
+        session = session or self.new_session()
+        yield self.payload("SessionStart", session)
+        for call in range(tool_calls):
+            if call % 8 == 0:
+                yield self.payload("UserPromptSubmit", session)
+            tool = self._tool()
+            yield {**self.payload("PreToolUse", session), **self._tool_input(tool)}
+            if self.random.random() < 0.05:
+                yield {
+                    **self.payload("PermissionRequest", session),
+                    **self._tool_input(tool),
+                }
+            if self.random.random() < self.error_ratio:
+                yield {
+                    **self.payload("PostToolUseFailure", session),
+                    **self._tool_input(tool),
+                }
+            else:
+                yield {**self.payload("PostToolUse", session), **self._tool_input(tool)}
+            if tool == "Task":
+                yield from self._subagent(session)
+        if tool_calls > 30:
+            yield self.payload("PreCompact", session)
+        yield self.payload("Notification", session)
+        yield self.payload("Stop", session)
+        yield self.payload("SessionEnd", session)
+
+    def one_of_each(self, session=None):
+        """Yield one payload of every event type, for per-type measurements."""
+        session = session or self.new_session()
+        for hook_type in EVENT_TYPES:
+            event = self.payload(hook_type, session)
+            if hook_type in (
+                "PreToolUse",
+                "PermissionRequest",
+                "PostToolUse",
+                "PostToolUseFailure",
+            ):
+                event.update(self._tool_input(self._tool()))
+            yield event
+
+    def _subagent(self, session):
+        """A subagent's run: its hooks carry the agent_id it was started with."""
+        agent = {
+            "agent_id": f"agent-{self.random.getrandbits(32):08x}",
+            "agent_type": self.random.choice(("general-purpose", "Explore", "Plan")),
+        }
+        yield {**self.payload("SubagentStart", session), **agent}
+        for _ in range(self.random.randrange(1, 6)):
+            tool = self.random.choice(("Read", "Grep", "Glob", "Bash"))
+            yield {
+                **self.payload("PreToolUse", session),
+                **self._tool_input(tool),
+                **agent,
+            }
+            yield {
+                **self.payload("PostToolUse", session),
+                **self._tool_input(tool),
+                **agent,
+            }
+        yield {**self.payload("SubagentStop", session), **agent}
+
+    # --- per-type fields -----------------------------------------------------
+
+    def _tool(self):
+        return self.random.choices(self._tools, self._weights)[0]
+
+    def _tool_input(self, tool):
+        path = f"/Users/dev/src/app/lib/module_{self.random.randrange(200)}.py"
+        inputs = {
+            "Read": {"file_path": path},
+            "Edit": {
+                "file_path": path,
+                "old_string": "pass",
+                "new_string": "return None",
+            },
+            "Write": {"file_path": path, "content": self._text(self.output_bytes // 4)},
+            "Bash": {"command": "pytest -q tests/", "description": "Run the suite"},
+            "Grep": {"pattern": "def parse", "path": "lib"},
+            "Glob": {"pattern": "**/*.py"},
+            "Task": {"description": "Explore", "prompt": self._text(200)},
+            "WebFetch": {"url": "https://example.com/docs", "prompt": "Summarize"},
+            "TodoWrite": {"todos": [{"content": "Fix parser", "status": "pending"}]},
+        }
+        return {"tool_name": tool, "tool_input": inputs[tool]}
+
+    def _PostToolUse(self):
+        return {
+            "tool_response": {"stdout": self._text(self.output_bytes), "exit_code": 0}
+        }
+
+    def _PostToolUseFailure(self):
+        line = self.random.randrange(1, 500)
+        return {
+            "error": f'Command failed with exit code 1\nFile "/Users/dev/src/app/lib/x.py", line {line}',
+            "tool_response": {
+                "stderr": self._text(self.output_bytes // 4),
+                "exit_code": 1,
+            },
+        }
+
+    def _UserPromptSubmit(self):
+        return {"prompt": self._text(300)}
+
+    def _SessionStart(self):
+        return {"source": "startup"}
+
+    def _Notification(self):
+        return {"message": "Claude needs your permission to use Bash"}
+
+    def _SubagentStart(self):
+        return {
+            "agent_id": f"agent-{self.random.getrandbits(32):08x}",
+            "agent_type": "general-purpose",
+        }
+
+    def _SubagentStop(self):
+        return {
+            "stop_hook_active": False,
+            "agent_id": f"agent-{self.random.getrandbits(32):08x}",
+            "agent_type": "general-purpose",
+        }
+
+    def _Stop(self):
+        return {"stop_hook_active": False}
+
+    def _PreCompact(self):
+        return {"trigger": "auto", "custom_instructions": ""}
+
+    def _SessionEnd(self):
+        return {"reason": "prompt_input_exit"}
+
+    def _text(self, size):
+        """`size` bytes of word-like text, sliced from a shared corpus."""
+        if size > len(self._corpus) // 2:
+            self._corpus = self._make_corpus(size * 2)
+        start = self.random.randrange(len(self._corpus) - size)
+        return self._corpus[start : start + size]
+
+    def _make_corpus(self, size):
+        words = []
+        length = 0
+        while length < size:
+            word = self.random.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return " ".join(words)
@@ -0,0 +1,425 @@
+"""Tests for the shared read layer over the events database.
+
+The dashboard and the headless tools all read through DatabaseManager, so
+what is pinned here is that its filters and orderings hold however the rows
+are fetched: chunk by chunk, or merged across several machines' databases.
+
+Run with: uv run --with pytest --with aiosqlite pytest bin/claude_events_test.py
+"""
+
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import claude_events
+import event_maintenance
+import event_store
+import session_summaries
+
+
+def store(path, events):
+    """A database holding `events`, each (session, hook, created_at[, fields])."""
+    conn = event_store.ensure_database(path)
+    stored = conn.execute("SELECT COUNT(*) FROM claude_events").fetchone()[0]
+    rows = []
+    for number, (session, hook, created_at, *fields) in enumerate(events, start=stored):
+        event = {"session_id": session, "hook_event_name": hook, "cwd": "/tmp/app"}
+        event.update(*fields)
+        context = {
+            "event_id": f"{path.stem}-{number}",
+            "project_dir": "/tmp/app",
+            "environment": {},
+            "created_at": created_at,
+        }
+        rows.append(event_store.build_row(event, context))
+    event_store.insert_rows(conn, rows)
+    conn.close()
+    return path
+
+
+async def collect(db_path, **filters):
+    db = claude_events.DatabaseManager(str(db_path))
+    await db.connect()
+    try:
+        return [row["event_id"] async for row in db.iter_rows(**filters)]
+    finally:
+        await db.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return store(
+        tmp_path / "events.db",
+        [
+            ("s1", "SessionStart", "2026-10-01 09:00:00"),
+            ("s1", "PreToolUse", "2026-10-01 09:00:00"),
+            ("s2", "PreToolUse", "2026-10-02 09:00:00"),
+            ("s1", "Stop", "2026-10-03 09:00:00"),
+        ],
+    )
+
+
+def test_streaming_in_small_chunks_returns_every_row_in_arrival_order(db_path):
+    """Rows stored in the same second keep the order they were stored in."""
+    streamed = asyncio.run(collect(db_path, chunk_size=1))
+
+    assert streamed == ["events-0", "events-1", "events-2", "events-3"]
+
+
+def test_a_time_range_includes_its_start_and_excludes_its_end(db_path):
+    streamed = asyncio.run(
+        collect(db_path, since="2026-10-02 09:00:00", until="2026-10-03 09:00:00")
+    )
+
+    assert streamed == ["events-2"]
+
+
+def test_federated_events_interleave_newest_first_with_unique_keys(tmp_path):
+    laptop = store(tmp_path / "laptop.db", [("a", "Stop", "2026-10-01 10:00:00")])
+    runner = store(
+        tmp_path / "runner.db",
+        [("b", "Stop", "2026-10-01 09:00:00"), ("b", "Stop", "2026-10-01 11:00:00")],
+    )
+
+    async def newest():
+        db = claude_events.FederatedDatabase(
+            claude_events.parse_sources([str(laptop), f"ci={runner}"])
+        )
+        await db.connect()
+        try:
+            return await db.get_events(limit=3), await db.get_stats(sources={"ci"})
+        finally:
+            await db.close()
+
+    events, ci_stats = asyncio.run(newest())
+
+    assert [event.key for event in events] == [
+        "ci/runner-1",
+        "laptop/laptop-0",
+        "ci/runner-0",
+    ]
+    assert ci_stats["total"] == 2
+
+
+def test_rows_between_two_ids_are_only_the_matching_ones_stored_since(db_path):
+    async def since_first():
+        db = claude_events.DatabaseManager(str(db_path))
+        await db.connect()
+        try:
+            newest = await db.get_max_id()
+            rows = await db.get_rows_between(1, newest, sessions={"s1"})
+            return [row["event_id"] for row in rows]
+        finally:
+            await db.close()
+
+    assert asyncio.run(since_first()) == ["events-1", "events-3"]
+
+
+def test_a_reader_reports_an_old_schema_without_upgrading_it(tmp_path):
+    db_path = store(tmp_path / "events.db", [("s1", "Stop", "2026-10-01 09:00:00")])
+    conn = event_store.ensure_database(db_path)
+    conn.execute("DROP INDEX idx_tool_name")
+    conn.execute("PRAGMA user_version = 1")
+    conn.close()
+
+    async def open_it():
+        db = claude_events.FederatedDatabase(
+            [claude_events.DatabaseManager(str(db_path), name="laptop")]
+        )
+        await db.connect()
+        try:
+            return db.problems, await db.get_stats()
+        finally:
+            await db.close()
+
+    problems, stats = asyncio.run(open_it())
+    conn = sqlite3.connect(db_path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+
+    assert version == 1 and stats["total"] == 1
+    assert [problem.split(" ")[:3] for problem in problems] == [
+        ["laptop", "is", "at"],
+        ["laptop", "is", "missing"],
+    ]
+    assert "idx_tool_name" in problems[1]
+
+
+def test_an_ended_session_is_summarised_without_writing_and_recomputed_if_it_grows(
+    tmp_path,
+):
+    db_path = store(
+        tmp_path / "events.db",
+        [
+            ("s1", "SessionStart", "2026-10-01 09:00:00"),
+            ("s1", "PreToolUse", "2026-10-01 09:00:01", {"tool_name": "Bash"}),
+            ("s1", "PostToolUseFailure", "2026-10-01 09:00:04", {"tool_name": "Bash"}),
+            ("s1", "SessionEnd", "2026-10-01 09:01:00"),
+        ],
+    )
+
+    async def summarise():
+        db = claude_events.DatabaseManager(str(db_path))
+        await db.connect()
+        try:
+            return (await db.get_session_summaries())[0]
+        finally:
+            await db.close()
+
+    first = asyncio.run(summarise())
+    conn = event_store.ensure_database(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM session_summaries").fetchone()[0] == 0
+    session_summaries.summarize(conn)
+    conn.close()
+    stored = asyncio.run(summarise())
+    store(db_path, [("s1", "Notification", "2026-10-01 09:00:30")])
+    second = asyncio.run(summarise())
+
+    assert (first.ended, first.error_count, first.tool_seconds) == (True, 1, 3.0)
+    assert first.tool_counts == {"Bash": 1}
+    assert stored == first
+    assert second.event_count == first.event_count + 1
+
+
+def test_a_subagents_tool_calls_are_counted_against_it_alone(tmp_path):
+    agent = {"agent_id": "agent-1", "agent_type": "Explore"}
+    db_path = store(
+        tmp_path / "events.db",
+        [
+            ("s1", "SubagentStart", "2026-10-01 09:00:00", agent),
+            (
+                "s1",
+                "PostToolUse",
+                "2026-10-01 09:00:01",
+                {"tool_name": "Read", **agent},
+            ),
+            (
+                "s1",
+                "PostToolUseFailure",
+                "2026-10-01 09:00:02",
+                {"tool_name": "Bash", **agent},
+            ),
+            ("s1", "PostToolUse", "2026-10-01 09:00:03", {"tool_name": "Read"}),
+            ("s1", "SubagentStop", "2026-10-01 09:00:05", agent),
+        ],
+    )
+
+    async def subagents():
+        db = claude_events.DatabaseManager(str(db_path))
+        await db.connect()
+        try:
+            return await db.get_subagents("s1")
+        finally:
+            await db.close()
+
+    (subagent,) = asyncio.run(subagents())
+
+    assert subagent.tool_counts == {"Read": 1, "Bash": 1}
+    assert (subagent.error_count, subagent.duration_seconds) == (1, 5.0)
+
+
+def test_error_clusters_count_errors_and_sessions_with_first_and_last_seen(tmp_path):
+    def failure(line):
+        return {"tool_name": "Bash", "error": f"exit 1 at /repo/x.py:{line}"}
+
+    db_path = store(
+        tmp_path / "events.db",
+        [
+            ("s1", "PostToolUseFailure", "2026-10-01 09:00:00", failure(3)),
+            ("s2", "PostToolUseFailure", "2026-10-02 09:00:00", failure(9)),
+            (
+                "s2",
+                "PostToolUseFailure",
+                "2026-10-02 10:00:00",
+                {"tool_name": "Read", "error": "denied"},
+            ),
+            ("s2", "PostToolUse", "2026-10-02 11:00:00", {"tool_name": "Bash"}),
+        ],
+    )
+
+    async def clusters():
+        db = claude_events.DatabaseManager(str(db_path))
+        await db.connect()
+        try:
+            return await db.get_error_clusters()
+        finally:
+            await db.close()
+
+    bash, read = asyncio.run(clusters())
+
+    assert (bash.count, bash.session_count) == (2, 2)
+    assert (bash.first_seen, bash.last_seen) == (
+        "2026-10-01 09:00:00",
+        "2026-10-02 09:00:00",
+    )
+    assert (bash.signature, bash.example_id) == ("exit <n> at <path>:<n>", "events-1")
+    assert (read.tool, read.count) == ("Read", 1)
+
+
+def test_token_burn_counts_only_the_window_and_the_selected_projects(db_path):
+    now = datetime.now(timezone.utc)
+    conn = event_store.ensure_database(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO token_usage VALUES (?, 's1', ?, 'model', ?, 100, 50, 150, 9000)",
+            [
+                (
+                    "recent",
+                    "app",
+                    (now - timedelta(minutes=5)).strftime(
+                        event_store.SQLITE_TIMESTAMP_FORMAT
+                    ),
+                ),
+                (
+                    "other",
+                    "lib",
+                    (now - timedelta(minutes=5)).strftime(
+                        event_store.SQLITE_TIMESTAMP_FORMAT
+                    ),
+                ),
+                (
+                    "old",
+                    "app",
+                    (now - timedelta(hours=2)).strftime(
+                        event_store.SQLITE_TIMESTAMP_FORMAT
+                    ),
+                ),
+            ],
+        )
+    conn.close()
+
+    async def burn():
+        db = claude_events.DatabaseManager(str(db_path))
+        await db.connect()
+        try:
+            return await db.get_token_burn(projects={"app"}, window_minutes=15)
+        finally:
+            await db.close()
+
+    assert asyncio.run(burn()) == {"tokens": 300, "per_minute": 20.0}
+
+
+def test_an_event_list_leaves_payloads_for_get_payload_to_read(tmp_path):
+    db_path = store(
+        tmp_path / "events.db",
+        [
+            (
+                "s1",
+                "PostToolUse",
+                "2026-10-01 09:00:00",
+                {"tool_name": "Read", "tool_output": {"content": "x" * 5000}},
+            )
+        ],
+    )
+
+    async def listed_then_opened():
+        db = claude_events.FederatedDatabase(
+            claude_events.parse_sources([f"laptop={db_path}"])
+        )
+        await db.connect()
+        try:
+            (event,) = await db.get_events()
+            return event, await db.get_payload(event)
+        finally:
+            await db.close()
+
+    event, payload = asyncio.run(listed_then_opened())
+
+    assert (event.tool, event.input, event.output) == ("Read", None, None)
+    assert payload["tool_output"] == '{"content": "' + "x" * 5000 + '"}'
+
+
+def test_the_session_list_can_be_limited_to_the_most_recent(db_path):
+    async def sessions():
+        db = claude_events.DatabaseManager(str(db_path))
+        await db.connect()
+        try:
+            return await db.get_unique_sessions(), await db.get_unique_sessions(limit=1)
+        finally:
+            await db.close()
+
+    assert asyncio.run(sessions()) == (["s1", "s2"], ["s1"])
+
+
+def test_a_search_combines_fields_phrases_times_and_patterns(tmp_path):
+    db_path = store(
+        tmp_path / "events.db",
+        [
+            (
+                "s1",
+                "PostToolUseFailure",
+                "2026-10-01 09:00:00",
+                {"tool_name": "Bash", "error": "exit 1"},
+            ),
+            (
+                "s1",
+                "PostToolUseFailure",
+                "2026-10-02 09:00:00",
+                {"tool_name": "Bash", "error": "exit 1"},
+            ),
+            ("s1", "PostToolUse", "2026-10-02 10:00:00", {"tool_name": "Bash"}),
+            (
+                "s2",
+                "UserPromptSubmit",
+                "2026-10-02 11:00:00",
+                {"prompt": "fix the flaky test"},
+            ),
+            (
+                "s2",
+                "UserPromptSubmit",
+                "2026-10-02 12:00:00",
+                {"prompt": "the test is flaky"},
+            ),
+        ],
+    )
+
+    def found(search):
+        return asyncio.run(collect(db_path, search=search))
+
+    assert found("tool:Bash status:error after:2026-10-02") == ["events-1"]
+    assert found('"flaky test"') == ["events-3"]
+    assert found("flaky test") == ["events-3", "events-4"]
+    assert found("re:^fix\\b session:s2") == ["events-3"]
+    assert found("tool:Read tool:Bash type:PostToolUse") == ["events-2"]
+
+
+@pytest.mark.parametrize(
+    "search, message",
+    [
+        ("status:failed", "status must be success, error or warning"),
+        ("after:yesterday", "after:"),
+        ("re:fail(", "re:fail\\("),
+    ],
+)
+def test_a_search_that_cannot_run_is_rejected_before_querying(search, message):
+    with pytest.raises(claude_events.SearchError, match=message):
+        claude_events.parse_search(search)
+
+
+def test_health_reads_the_file_now_and_the_index_sizes_from_the_last_pass(db_path):
+    async def health():
+        db = claude_events.DatabaseManager(str(db_path))
+        await db.connect()
+        conn = event_store.ensure_database(db_path)
+        try:
+            with conn:
+                conn.execute("DELETE FROM claude_events")
+            before = await db.get_health()
+            event_maintenance.maintain(conn, db_path)
+            return before, await db.get_health()
+        finally:
+            conn.close()
+            await db.close()
+
+    before, after = asyncio.run(health())
+
+    assert before.maintained is None and before.wal_bytes > 0
+    assert after.maintained["checkpoint"] == {
+        **after.maintained["checkpoint"],
+        "mode": "truncate",
+        "completed": True,
+    }
+    assert after.wal_bytes < before.wal_bytes
+    assert after.page_count * after.page_size == after.db_bytes
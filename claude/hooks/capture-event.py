@@ -4,170 +4,147 @@
 # dependencies = []
 # ///
 
+"""Store each Claude Code hook event in ~/.claude/events.db.
+
+By default the event is written to SQLite before the hook exits, so Claude
+Code waits for the transaction. With `--spool` (or CLAUDE_EVENTS_SPOOL=1) the
+hook only appends the payload to ~/.claude/events-spool and exits;
+bin/claude-events-drain moves spooled events into the database in batches.
+Spool mode needs the drainer running, or events pile up in the spool.
+
+Either way, capture_policy.POLICIES first decides how much of the event is
+kept, if any.
+
+A direct write waits up to CLAUDE_EVENTS_BUSY_TIMEOUT_MS (default 1000) for
+another connection's lock, and is retried with backoff when that runs out,
+as when the dashboard holds a long read or several agents write at once.
+The waits and retries together stop at CLAUDE_EVENTS_WRITE_BUDGET_MS
+(default 1200), since Claude Code waits on the hook meanwhile. An event
+that still cannot be written is spooled for the drainer instead, and
+only lost if the spool cannot be written either (log-event-jsonl.py's copy
+can still be replayed). The retries, fallbacks and losses are counted in
+~/.claude/events-spool/capture-metrics.json, which the dashboard shows.
+"""
+
 import json
 import os
 import sqlite3
 import sys
-from datetime import datetime, timezone
-from pathlib import Path
-
-
-def extract_project_name(project_dir=None, cwd=None):
-    """Extract project name from directory path."""
-    path = project_dir or cwd or os.getcwd()
-    # Handle special cases
-    if path == os.path.expanduser("~"):
-        return "home"
-    if path == "/":
-        return "root"
-    # Get last component of path
-    return os.path.basename(os.path.normpath(path))
-
-
-def get_claude_env_vars():
-    """Get all environment variables starting with CLAUDE_."""
-    return {k: v for k, v in os.environ.items() if k.startswith("CLAUDE_")}
-
-
-def ensure_database(db_path):
-    """Create database and tables if they don't exist."""
-    db_dir = db_path.parent
-    db_dir.mkdir(parents=True, exist_ok=True)
-
-    conn = sqlite3.connect(str(db_path))
-    conn.execute("PRAGMA journal_mode=WAL")  # Enable WAL for better concurrency
-
-    # Create table if it doesn't exist
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS claude_events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            event_id TEXT UNIQUE NOT NULL,
-            hook_type TEXT NOT NULL,
-            session_id TEXT,
-            project_name TEXT,
-            project_dir TEXT,
-            timestamp TEXT,
-            tool_name TEXT,
-            tool_input TEXT,
-            tool_output TEXT,
-            user_prompt TEXT,
-            transcript_path TEXT,
-            cwd TEXT,
-            environment TEXT,
-            full_event TEXT NOT NULL,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    # Create indexes
-    indexes = [
-        "CREATE INDEX IF NOT EXISTS idx_hook_type ON claude_events(hook_type)",
-        "CREATE INDEX IF NOT EXISTS idx_tool_name ON claude_events(tool_name)",
-        "CREATE INDEX IF NOT EXISTS idx_session_id ON claude_events(session_id)",
-        "CREATE INDEX IF NOT EXISTS idx_project_name ON claude_events(project_name)",
-        "CREATE INDEX IF NOT EXISTS idx_timestamp ON claude_events(timestamp)",
-    ]
+import time
 
-    for index in indexes:
-        conn.execute(index)
+import capture_policy
+import event_store
 
-    conn.commit()
-    return conn
+WRITER = "events.db"
+DEFAULT_BUSY_TIMEOUT_MS = 1000
+DEFAULT_WRITE_BUDGET_MS = 1200
 
 
-def generate_event_id(session_id, timestamp, hook_type):
-    """Generate a unique event ID."""
-    # Use session_id, timestamp, and hook_type to create unique ID
-    components = [
-        session_id or "no-session",
-        timestamp or datetime.now(timezone.utc).isoformat(),
-        hook_type or "unknown",
-    ]
-    return "-".join(str(c).replace(" ", "_") for c in components)
+def spool_requested(argv):
+    """True if this invocation should spool instead of writing to SQLite."""
+    return "--spool" in argv or os.environ.get("CLAUDE_EVENTS_SPOOL") == "1"
 
 
-def store_event(conn, event_data):
-    """Store event in database."""
+def milliseconds_setting(name, default):
+    """An environment variable of milliseconds, in seconds."""
     try:
-        # Extract fields from event data
-        hook_type = event_data.get("hook_event_name", "unknown")
-        session_id = event_data.get("session_id")
-        timestamp = event_data.get("timestamp")
-        transcript_path = event_data.get("transcript_path")
-        cwd = event_data.get("cwd")
-
-        # Tool-related fields
-        tool_name = event_data.get("tool_name")
-        tool_input = event_data.get("tool_input")
-        tool_output = event_data.get("tool_output")
-
-        # User prompt (for UserPromptSubmit events)
-        user_prompt = event_data.get("prompt")
-
-        # Get project info
-        project_dir = os.environ.get("CLAUDE_PROJECT_DIR", cwd)
-        project_name = extract_project_name(project_dir, cwd)
-
-        # Capture environment
-        env_vars = get_claude_env_vars()
-
-        # Generate unique event ID
-        event_id = generate_event_id(session_id, timestamp, hook_type)
-
-        # Convert complex fields to JSON strings
-        tool_input_json = json.dumps(tool_input) if tool_input else None
-        tool_output_json = json.dumps(tool_output) if tool_output else None
-        environment_json = json.dumps(env_vars)
-        full_event_json = json.dumps(event_data)
-
-        # Insert into database
-        conn.execute(
-            """
-            INSERT OR REPLACE INTO claude_events (
-                event_id, hook_type, session_id, project_name, project_dir,
-                timestamp, tool_name, tool_input, tool_output, user_prompt,
-                transcript_path, cwd, environment, full_event
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-            (
-                event_id,
-                hook_type,
-                session_id,
-                project_name,
-                project_dir,
-                timestamp,
-                tool_name,
-                tool_input_json,
-                tool_output_json,
-                user_prompt,
-                transcript_path,
-                cwd,
-                environment_json,
-                full_event_json,
-            ),
-        )
+        return max(int(os.environ[name]), 0) / 1000
+    except (KeyError, ValueError):
+        return default / 1000
 
-        conn.commit()
 
-    except Exception as e:
-        print(f"Error storing event: {e}", file=sys.stderr)
-        # Don't raise - we don't want to block Claude Code
+def busy_timeout():
+    """Seconds SQLite waits on another connection's lock before giving up."""
+    return milliseconds_setting(
+        "CLAUDE_EVENTS_BUSY_TIMEOUT_MS", DEFAULT_BUSY_TIMEOUT_MS
+    )
 
 
-def main():
+def write_budget():
+    """Seconds a direct write may take, retries included, before spooling."""
+    return milliseconds_setting(
+        "CLAUDE_EVENTS_WRITE_BUDGET_MS", DEFAULT_WRITE_BUDGET_MS
+    )
+
+
+def store_event(conn, event_data, context=None):
+    """Store event in database."""
+    context = context or event_store.capture_context(event_data)
+    row = event_store.build_row(event_data, context)
+    event_store.insert_rows(conn, [row])
+
+
+def count(counts, error=None, spool_dir=event_store.SPOOL_DIR):
+    """Add non-zero `counts` to the capture metrics; a failure only warns."""
+    if not any(counts.values()):
+        return
     try:
-        # Read JSON from stdin
-        input_data = json.load(sys.stdin)
+        event_store.count_capture(counts, error, spool_dir)
+    except OSError as e:
+        print(f"Error counting capture failures: {e}", file=sys.stderr)
+
+
+def write_directly(
+    event_data,
+    context,
+    db_path=event_store.DB_PATH,
+    spool_dir=event_store.SPOOL_DIR,
+    sleep=time.sleep,
+):
+    """Store one event before returning, spooling it if the database will not take it.
+
+    Gives up on the database once write_budget() has passed: each attempt's
+    lock wait is cut to what is left of it, and no retry starts after it.
+    """
+    retries = []
+    deadline = time.monotonic() + write_budget()
+
+    def attempt():
+        timeout = min(busy_timeout(), max(deadline - time.monotonic(), 0))
+        conn = event_store.ensure_database(db_path, timeout=timeout)
+        try:
+            store_event(conn, event_data, context)
+        finally:
+            conn.close()
 
-        # Set up database
-        db_path = Path.home() / ".claude" / "events.db"
-        conn = ensure_database(db_path)
+    try:
+        event_store.retry_when_locked(
+            attempt, sleep=sleep, on_retry=retries.append, deadline=deadline
+        )
+    except sqlite3.Error as e:
+        try:
+            event_store.spool_event(event_data, context, spool_dir)
+        except OSError as spool_error:
+            print(
+                f"Error storing event ({e}) and spooling it ({spool_error}); event lost",
+                file=sys.stderr,
+            )
+            count({"retries": len(retries), "dropped": 1}, e, spool_dir)
+            return
+        print(f"Error storing event, spooled for the drainer: {e}", file=sys.stderr)
+        count({"retries": len(retries), "spooled": 1}, e, spool_dir)
+        return
+    count({"retries": len(retries)}, spool_dir=spool_dir)
 
-        # Store the event
-        store_event(conn, input_data)
 
-        # Close connection
-        conn.close()
+def main():
+    try:
+        # Read JSON from stdin
+        input_data = capture_policy.capture(WRITER, json.load(sys.stdin))
+        if input_data is None:
+            sys.exit(0)
+        context = event_store.capture_context(input_data)
+
+        if spool_requested(sys.argv[1:]):
+            try:
+                event_store.spool_event(input_data, context)
+            except OSError as e:
+                # An unwritable spool would lose the event; the slow path
+                # still has a chance of keeping it.
+                print(f"Error spooling event, writing directly: {e}", file=sys.stderr)
+                write_directly(input_data, context)
+        else:
+            write_directly(input_data, context)
 
         # Always exit successfully to avoid blocking
         sys.exit(0)
@@ -177,6 +154,7 @@ def main():
         sys.exit(0)
     except Exception as e:
         print(f"Unexpected error: {e}", file=sys.stderr)
+        count({"dropped": 1}, e)
         sys.exit(0)
 
 
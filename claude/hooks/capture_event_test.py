@@ -0,0 +1,112 @@
+"""Tests for capture-event.py's direct write under lock contention.
+
+A hook that cannot get the write lock must neither block Claude Code for
+long nor lose the event, so the properties pinned here are that it gives up
+on the database after its retries or its time budget, spools the event for
+the drainer, and counts what happened for the dashboard.
+
+Run with: uv run --with pytest pytest claude/hooks/capture_event_test.py
+"""
+
+import importlib.util
+import sqlite3
+import time
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+import pytest
+
+import event_store
+
+MODULE = Path(__file__).parent / "capture-event.py"
+_spec = importlib.util.spec_from_file_location(
+    "capture_event", MODULE, loader=SourceFileLoader("capture_event", str(MODULE))
+)
+capture_event = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(capture_event)
+
+EVENT = {
+    "hook_event_name": "PreToolUse",
+    "session_id": "s1",
+    "cwd": "/dev/app",
+    "tool_name": "Bash",
+}
+
+
+@pytest.fixture
+def context():
+    return {
+        "event_id": "e1",
+        "project_dir": "/dev/app",
+        "environment": {},
+        "created_at": "2026-10-01 09:00:00",
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("CLAUDE_EVENTS_BUSY_TIMEOUT_MS", "0")
+    path = tmp_path / "events.db"
+    event_store.ensure_database(path).close()
+    return path
+
+
+def test_an_event_the_locked_database_will_not_take_is_spooled_and_counted(
+    db_path, tmp_path, context
+):
+    spool = tmp_path / "spool"
+    writer = sqlite3.connect(db_path)
+    writer.execute("BEGIN IMMEDIATE")
+
+    capture_event.write_directly(EVENT, context, db_path, spool, sleep=lambda _: None)
+    writer.rollback()
+
+    assert event_store.spool_depth(spool)["events"] == 1
+    metrics = event_store.read_capture_metrics(spool)
+    assert (metrics["retries"], metrics["spooled"]) == (
+        event_store.LOCK_RETRY_ATTEMPTS - 1,
+        1,
+    )
+    assert "locked" in metrics["last_error"]
+
+
+def test_a_held_lock_keeps_the_hook_waiting_no_longer_than_its_budget(
+    db_path, tmp_path, context, monkeypatch
+):
+    monkeypatch.delenv("CLAUDE_EVENTS_BUSY_TIMEOUT_MS")
+    spool = tmp_path / "spool"
+    writer = sqlite3.connect(db_path)
+    writer.execute("BEGIN IMMEDIATE")
+
+    started = time.monotonic()
+    capture_event.write_directly(EVENT, context, db_path, spool)
+    elapsed = time.monotonic() - started
+    writer.rollback()
+
+    assert elapsed < 1.5
+    assert event_store.spool_depth(spool)["events"] == 1
+
+
+def test_a_write_that_waits_out_the_lock_is_stored_and_its_retries_counted(
+    db_path, tmp_path, context
+):
+    spool = tmp_path / "spool"
+    writer = sqlite3.connect(db_path)
+    writer.execute("BEGIN IMMEDIATE")
+
+    capture_event.write_directly(
+        EVENT, context, db_path, spool, sleep=lambda _: writer.rollback()
+    )
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT event_id FROM claude_events").fetchall() == [("e1",)]
+    assert event_store.read_capture_metrics(spool) == {"retries": 1}
+    assert not (spool / event_store.PENDING_NAME).exists()
+
+
+def test_a_write_that_needed_no_retry_leaves_no_counts(db_path, tmp_path, context):
+    spool = tmp_path / "spool"
+
+    capture_event.write_directly(EVENT, context, db_path, spool)
+
+    assert not spool.exists()
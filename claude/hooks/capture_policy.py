@@ -0,0 +1,226 @@
+"""How much of each hook event the capture hooks keep.
+
+capture-event.py and log-event-jsonl.py both write every event they are
+given, in full, and a Read-heavy session spends most of its hook time and
+disk on file contents nobody looks at again. POLICIES trades that detail
+away per hook type and tool. Both hooks read it, so the database and the
+JSONL log keep the same events:
+
+    full          the payload as Claude Code sent it
+    metadata      no tool input, tool output or prompt; the fields that say
+                  whether a call failed, and why, are kept
+    truncate:N    every string longer than N bytes cut to N, with a note of
+                  how much was cut
+    sample:N      one event in N kept, the rest dropped; a tool call's Pre
+                  and Post events are kept or dropped together, except
+                  that an error is always kept, so a failed call can be
+                  stored without its Pre
+
+A rule is keyed "Hook:Tool", "*:Tool", "Hook" or "*", and the first of those
+that matches an event decides it. An event that is not kept whole carries
+its policy in `capture_policy`, so a reader knows the payload is partial.
+A rule that does not parse keeps its events whole rather than lose them.
+
+What each hook left out is counted in COUNTS_PATH, per hook and tool, and
+so is each event an invalid rule was skipped for; bin/claude-events-capture
+shows the counts alongside the rules.
+
+Standard library only, like event_store.py.
+"""
+
+import fcntl
+import json
+import os
+import sys
+import zlib
+from pathlib import Path
+
+POLICIES = {
+    "*": "full",
+    # "PostToolUse:Read": "truncate:4096",
+    # "PreToolUse:Read": "metadata",
+    # "*:Glob": "sample:10",
+}
+
+COUNTS_PATH = Path.home() / ".claude" / "capture-counts.json"
+
+# Where a payload's contents are, and which of their fields survive
+# `metadata`: the ones event_store.derive_status and error_text read.
+PAYLOAD_KEYS = ("tool_input", "tool_output", "tool_response", "prompt")
+STATUS_KEYS = ("error", "exit_code", "warning", "stderr")
+KEPT_ERROR_BYTES = 1000
+
+ACTIONS = ("sampled_out", "metadata", "truncated", "invalid_policy")
+
+
+def parse_policy(text):
+    """A policy string as (kind, n); raises ValueError if it is not one."""
+    kind, _, number = text.partition(":")
+    if kind in ("full", "metadata") and not number:
+        return kind, None
+    if kind in ("truncate", "sample") and number.isdigit() and int(number) > 0:
+        return kind, int(number)
+    raise ValueError(
+        f"not a capture policy: {text!r} (full, metadata, truncate:N or sample:N)"
+    )
+
+
+def policy_for(hook_type, tool_name, policies=POLICIES):
+    """The (kind, n) policy that decides an event."""
+    for key in (f"{hook_type}:{tool_name}", f"*:{tool_name}", hook_type, "*"):
+        if key in policies:
+            return parse_policy(policies[key])
+    return "full", None
+
+
+def truncate(value, limit):
+    """`value` with every string over `limit` bytes cut; (value, bytes cut)."""
+    if isinstance(value, str):
+        encoded = value.encode()
+        if len(encoded) <= limit:
+            return value, 0
+        cut = len(encoded) - limit
+        return encoded[:limit].decode(
+            errors="ignore"
+        ) + f"… [{cut} bytes truncated]", cut
+    if isinstance(value, dict):
+        cut = 0
+        kept = {}
+        for key, item in value.items():
+            kept[key], n = truncate(item, limit)
+            cut += n
+        return kept, cut
+    if isinstance(value, list):
+        cut = 0
+        kept = []
+        for item in value:
+            item, n = truncate(item, limit)
+            kept.append(item)
+            cut += n
+        return kept, cut
+    return value, 0
+
+
+def status_fields(value):
+    """What `metadata` keeps of a payload: its error fields, cut short, or None."""
+    if not isinstance(value, dict):
+        return None
+    kept = {key: value[key] for key in STATUS_KEYS if value.get(key) not in (None, "")}
+    return truncate(kept, KEPT_ERROR_BYTES)[0] or None
+
+
+def is_error(event_data):
+    """Whether an event reports a failed call, which sampling always keeps."""
+    if event_data.get("hook_event_name") == "PostToolUseFailure" or event_data.get(
+        "error"
+    ):
+        return True
+    output = event_data.get("tool_output") or event_data.get("tool_response")
+    return isinstance(output, dict) and bool(
+        output.get("error") or output.get("exit_code", 0)
+    )
+
+
+def sampled_in(event_data, every):
+    """True for the one event in `every` that is kept.
+
+    Keyed on the tool call where there is one, so both hooks, and both ends
+    of the call, make the same choice. apply() keeps an error regardless,
+    and the Pre cannot know its call will fail, so a failed call that was
+    not sampled in is stored as a Post alone; the tool time queries count
+    it as a call with no time (see event_rollups.py).
+    """
+    key = event_data.get("tool_use_id") or (
+        f"{event_data.get('session_id')}\0{event_data.get('timestamp')}\0{event_data.get('hook_event_name')}"
+    )
+    return zlib.crc32(key.encode()) % every == 0
+
+
+def apply(event_data, policies=POLICIES):
+    """The event to store under its policy, or None; and what was done to it.
+
+    The action is None for an event kept whole, else one of ACTIONS.
+    """
+    kind, n = policy_for(
+        event_data.get("hook_event_name"), event_data.get("tool_name"), policies
+    )
+    if kind == "full":
+        return event_data, None
+    if kind == "sample":
+        if n == 1 or is_error(event_data) or sampled_in(event_data, n):
+            return event_data, None
+        return None, "sampled_out"
+
+    reduced = dict(event_data)
+    if kind == "metadata":
+        for key in PAYLOAD_KEYS:
+            if key in reduced:
+                fields = status_fields(reduced.pop(key))
+                if fields:
+                    reduced[key] = fields
+        reduced["capture_policy"] = "metadata"
+        return reduced, "metadata"
+
+    cut = 0
+    for key in PAYLOAD_KEYS:
+        if key in reduced:
+            reduced[key], n_cut = truncate(reduced[key], n)
+            cut += n_cut
+    if not cut:
+        return event_data, None
+    reduced["capture_policy"] = f"truncate:{n}"
+    return reduced, "truncated"
+
+
+def record(writer, event_data, kept, action, counts_path=COUNTS_PATH):
+    """Count one event that `writer` did not keep whole, and the bytes saved.
+
+    A read-modify-write of a small file under an exclusive lock, which only
+    events the policies touched pay for.
+    """
+    saved = len(json.dumps(event_data)) - (
+        len(json.dumps(kept)) if kept is not None else 0
+    )
+    counts_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(counts_path, os.O_RDWR | os.O_CREAT, 0o600)
+    with os.fdopen(fd, "r+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            counts = json.loads(f.read() or "{}")
+        except ValueError:
+            counts = {}
+        key = f"{event_data.get('hook_event_name')}:{event_data.get('tool_name') or ''}"
+        entry = counts.setdefault(writer, {}).setdefault(key, {})
+        entry[action] = entry.get(action, 0) + 1
+        entry["bytes_saved"] = entry.get("bytes_saved", 0) + max(saved, 0)
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps(counts, indent=2, sort_keys=True))
+
+
+def capture(writer, event_data, policies=POLICIES, counts_path=COUNTS_PATH):
+    """Apply the policy to one event for `writer`; return what to write, or None.
+
+    An invalid rule keeps the event whole, is counted as `invalid_policy`,
+    and is reported on stderr, where Claude Code shows a hook's warnings.
+    """
+    try:
+        kept, action = apply(event_data, policies)
+    except ValueError as e:
+        print(f"capture_policy: {e}; keeping the event in full", file=sys.stderr)
+        kept, action = event_data, "invalid_policy"
+    if action:
+        try:
+            record(writer, event_data, kept, action, counts_path)
+        except OSError:
+            # A count is not worth losing the event over.
+            pass
+    return kept
+
+
+def read_counts(counts_path=COUNTS_PATH):
+    """What each writer left out so far, or an empty dict."""
+    try:
+        return json.loads(counts_path.read_text())
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,165 @@
+"""Tests for the capture policies the event hooks share.
+
+Both hooks make their own decision about the same event, so what is pinned
+here is that the decision depends only on the event: a sampled tool call is
+kept or dropped whole unless it failed, a reduced payload still says whether
+it failed, and a rule that does not parse loses nothing.
+
+Run with: uv run --with pytest pytest claude/hooks/capture_policy_test.py
+"""
+
+import pytest
+
+import capture_policy
+import event_store
+
+
+def event(hook, tool="Read", **fields):
+    return {"session_id": "s1", "hook_event_name": hook, "tool_name": tool, **fields}
+
+
+def test_the_most_specific_rule_decides_an_event():
+    policies = {
+        "*": "full",
+        "PostToolUse": "metadata",
+        "*:Read": "sample:5",
+        "PostToolUse:Read": "truncate:10",
+    }
+
+    assert capture_policy.policy_for("PostToolUse", "Read", policies) == (
+        "truncate",
+        10,
+    )
+    assert capture_policy.policy_for("PreToolUse", "Read", policies) == ("sample", 5)
+    assert capture_policy.policy_for("PostToolUse", "Bash", policies) == (
+        "metadata",
+        None,
+    )
+    assert capture_policy.policy_for("Stop", None, policies) == ("full", None)
+
+
+def test_metadata_drops_contents_but_keeps_what_says_a_call_failed():
+    failed = event(
+        "PostToolUse",
+        "Bash",
+        tool_input={"command": "make"},
+        tool_output={"stdout": "x" * 100, "exit_code": 2, "stderr": "boom"},
+    )
+
+    kept, action = capture_policy.apply(failed, {"*": "metadata"})
+    row = event_store.build_row(
+        kept, {"event_id": "e1", "created_at": "2026-10-01 09:00:00"}
+    )
+
+    assert action == "metadata"
+    assert (kept["tool_output"], kept["capture_policy"]) == (
+        {"exit_code": 2, "stderr": "boom"},
+        "metadata",
+    )
+    assert "tool_input" not in kept
+    assert row[14] == "error" and row[16] is not None
+
+
+def test_truncation_cuts_long_strings_and_leaves_short_events_whole():
+    long_read = event(
+        "PostToolUse", tool_response={"file": {"content": "é" * 100, "numLines": 100}}
+    )
+
+    kept, action = capture_policy.apply(long_read, {"*": "truncate:11"})
+    short, untouched = capture_policy.apply(
+        event("PostToolUse", tool_response={"ok": True}), {"*": "truncate:11"}
+    )
+
+    assert action == "truncated"
+    assert kept["tool_response"]["file"] == {
+        "content": "ééééé… [189 bytes truncated]",
+        "numLines": 100,
+    }
+    assert untouched is None and "capture_policy" not in short
+
+
+def test_sampling_keeps_both_ends_of_a_call_and_every_error():
+    policies = {"*": "sample:4"}
+    calls = [f"toolu_{n}" for n in range(400)]
+
+    kept = [
+        call
+        for call in calls
+        if capture_policy.apply(event("PreToolUse", tool_use_id=call), policies)[0]
+        is not None
+    ]
+    posts = [
+        call
+        for call in calls
+        if capture_policy.apply(event("PostToolUse", tool_use_id=call), policies)[0]
+        is not None
+    ]
+    failures = [
+        capture_policy.apply(event("PostToolUseFailure", tool_use_id=call), policies)
+        for call in calls
+    ]
+
+    assert kept == posts
+    assert 60 < len(kept) < 140
+    assert all(action is None for _, action in failures)
+
+
+def test_a_failed_call_is_kept_even_when_its_pre_was_sampled_out():
+    policies = {"*": "sample:4"}
+    dropped = next(
+        f"toolu_{n}"
+        for n in range(100)
+        if capture_policy.apply(
+            event("PreToolUse", tool_use_id=f"toolu_{n}"), policies
+        )[0]
+        is None
+    )
+
+    kept, action = capture_policy.apply(
+        event("PostToolUse", tool_use_id=dropped, tool_response={"error": "denied"}),
+        policies,
+    )
+
+    assert kept is not None and action is None
+
+
+def test_what_was_left_out_is_counted_per_writer_hook_and_tool(tmp_path):
+    counts = tmp_path / "counts.json"
+    policies = {"PostToolUse": "metadata"}
+    read = event("PostToolUse", tool_output={"content": "x" * 1000})
+
+    for writer in ("events.db", "events-log", "events-log"):
+        capture_policy.capture(writer, read, policies, counts)
+    capture_policy.capture("events.db", event("Stop", None), policies, counts)
+
+    saved = capture_policy.read_counts(counts)
+    assert saved["events-log"]["PostToolUse:Read"]["metadata"] == 2
+    assert saved["events.db"]["PostToolUse:Read"]["bytes_saved"] > 1000
+    assert list(saved["events.db"]) == ["PostToolUse:Read"]
+
+
+def test_an_invalid_rule_keeps_the_event_and_is_counted(tmp_path, capsys):
+    counts = tmp_path / "counts.json"
+    read = event("PostToolUse", tool_output={"content": "x" * 100})
+
+    kept = capture_policy.capture("events.db", read, {"*:Read": "truncate"}, counts)
+
+    assert kept == read
+    assert capture_policy.read_counts(counts)["events.db"]["PostToolUse:Read"] == {
+        "invalid_policy": 1,
+        "bytes_saved": 0,
+    }
+    assert "not a capture policy: 'truncate'" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "policy", ["truncate", "sample:0", "truncate:ten", "metadata:1", "all"]
+)
+def test_a_malformed_policy_is_rejected(policy):
+    with pytest.raises(ValueError, match="not a capture policy"):
+        capture_policy.parse_policy(policy)
+
+
+def test_the_shipped_rules_all_parse():
+    for policy in capture_policy.POLICIES.values():
+        capture_policy.parse_policy(policy)
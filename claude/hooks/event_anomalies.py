@@ -0,0 +1,296 @@
+"""Alerts on trouble the events table shows as it happens.
+
+The herdr alert poller watches panes; this watches the events themselves
+for three things a glance at the dashboard would catch, if someone were
+looking:
+
+- a burst: one session calling one tool TOOL_BURST_CALLS times within
+  TOOL_BURST_SECONDS, as a loop that never converges does;
+- an error spike: most of a session's recent tool results failing;
+- a silent session: one that stopped in the middle of a turn, with no Stop
+  or Notification, and has stored nothing since.
+
+New events are read by id from where the last pass stopped, and folded into
+counters per session and per session and tool. A counter keeps a count per
+WINDOW_BUCKET_SECONDS slice of its window rather than every event's time, so
+its state is a dozen numbers however busy the session, and all of it is
+saved in the checkpoint row with the id it is current to. A pass after a
+restart loads one row and carries on.
+
+Each alert fires once when its condition starts, and again only after the
+condition has cleared, as the herdr poller does for a blocked pane. A burst
+or spike whose events are older than STALE_AFTER_SECONDS is counted but not
+alerted on, so catching up after a night off does not replay the night.
+
+Alerts go to a sink, any callable taking one alert dict; bin/claude-events-alerts
+has the ones it offers.
+
+Standard library only, like event_store.py.
+"""
+
+import sqlite3
+from datetime import datetime, timezone
+
+import event_rollups
+import event_store
+
+CHECKPOINT = "event_anomalies.state"
+
+# Events read per query.
+STEP = 10_000
+
+TOOL_BURST_CALLS = 50
+TOOL_BURST_SECONDS = 60
+
+# An error spike is at least ERROR_SPIKE_MIN_ERRORS failed tool results in
+# ERROR_SPIKE_SECONDS, making up at least ERROR_SPIKE_RATIO of them.
+ERROR_SPIKE_SECONDS = 300
+ERROR_SPIKE_MIN_ERRORS = 5
+ERROR_SPIKE_RATIO = 0.5
+
+# Silence mid-turn for this long is worth a look. A session quiet for
+# SESSION_FORGET_SECONDS is forgotten without one: the machine slept, or the
+# detector was not running, and an alert hours late says nothing useful.
+SILENT_AFTER_SECONDS = 600
+SESSION_FORGET_SECONDS = 3600
+
+# The events after which a session is waiting on the user, not working.
+RESTING_HOOKS = ("Stop", "Notification", "SessionEnd")
+
+STALE_AFTER_SECONDS = 300
+
+WINDOW_BUCKET_SECONDS = 5
+
+TOOL_RESULT_HOOKS = ("PostToolUse", "PostToolUseFailure")
+
+STEP_SQL = """
+    SELECT id, event_id, session_id, project_name, hook_type, tool_name, status, created_at,
+           CASE WHEN status IS NULL THEN tool_output END AS legacy_output
+    FROM claude_events
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+
+
+def empty_state(last_id=0):
+    return {
+        "last_id": last_id,
+        "calls": {},
+        "results": {},
+        "errors": {},
+        "sessions": {},
+        "alerted": [],
+    }
+
+
+def epoch_seconds(created_at):
+    moment = datetime.strptime(created_at, event_store.SQLITE_TIMESTAMP_FORMAT)
+    return int(moment.replace(tzinfo=timezone.utc).timestamp())
+
+
+def count(counters, key, moment):
+    """Add one at `moment` to a windowed counter."""
+    buckets = counters.setdefault(key, {})
+    bucket = str(moment - moment % WINDOW_BUCKET_SECONDS)
+    buckets[bucket] = buckets.get(bucket, 0) + 1
+
+
+def total(counters, key, moment, window):
+    """A counter's count over the `window` seconds up to `moment`."""
+    start = moment - window
+    return sum(
+        n
+        for bucket, n in counters.get(key, {}).items()
+        if int(bucket) > start - WINDOW_BUCKET_SECONDS
+    )
+
+
+def prune(counters, moment, window):
+    """Drop buckets that have left the window, and counters left empty."""
+    start = moment - window - WINDOW_BUCKET_SECONDS
+    for key in list(counters):
+        buckets = {
+            bucket: n for bucket, n in counters[key].items() if int(bucket) > start
+        }
+        if buckets:
+            counters[key] = buckets
+        else:
+            del counters[key]
+
+
+def alert(kind, row, detail):
+    return {
+        "kind": kind,
+        "session_id": row["session_id"],
+        "project": row["project_name"],
+        "tool": row.get("tool_name"),
+        "event_id": row.get("event_id"),
+        "at": row["created_at"],
+        "detail": detail,
+    }
+
+
+def once(alerts, alerted, key, firing, new_alert):
+    """Fire `new_alert` when `firing` starts; re-arm when it stops.
+
+    A stale condition passes a false `new_alert`, and stays armed: if it is
+    still firing when a fresh event arrives, that one alerts.
+    """
+    if not firing:
+        alerted.discard(key)
+    elif key not in alerted and new_alert:
+        alerted.add(key)
+        alerts.append(new_alert())
+
+
+def decide_alerts(rows, state, now):
+    """Fold new events into `state`; give the alerts they raise, and the state.
+
+    `rows` are events in id order, as STEP_SQL reads them; `now` is the
+    epoch time silence is measured to. `state` is what the previous call
+    gave, or empty_state().
+    """
+    alerts = []
+    alerted = set(state["alerted"])
+    calls, results, errors, sessions = (
+        state["calls"],
+        state["results"],
+        state["errors"],
+        state["sessions"],
+    )
+
+    for row in rows:
+        state["last_id"] = row["id"]
+        session = row["session_id"]
+        if not session or not row["created_at"]:
+            continue
+        moment = epoch_seconds(row["created_at"])
+        fresh = now - moment <= STALE_AFTER_SECONDS
+
+        if row["hook_type"] == "SessionEnd":
+            sessions.pop(session, None)
+        else:
+            previous = sessions.get(session)
+            if previous is None or moment >= previous[0]:
+                sessions[session] = [
+                    moment,
+                    row["hook_type"],
+                    row["project_name"],
+                    row["created_at"],
+                ]
+                alerted.discard(f"silent\t{session}")
+
+        tool = row["tool_name"]
+        if row["hook_type"] == "PreToolUse" and tool:
+            key = f"{session}\t{tool}"
+            count(calls, key, moment)
+            burst = total(calls, key, moment, TOOL_BURST_SECONDS)
+            once(
+                alerts,
+                alerted,
+                f"burst\t{key}",
+                burst >= TOOL_BURST_CALLS,
+                fresh
+                and (
+                    lambda: alert(
+                        "burst",
+                        row,
+                        f"{tool} called {burst} times in {TOOL_BURST_SECONDS}s",
+                    )
+                ),
+            )
+
+        if row["hook_type"] in TOOL_RESULT_HOOKS:
+            count(results, session, moment)
+            if event_rollups.row_status(row) == "error":
+                count(errors, session, moment)
+            failed = total(errors, session, moment, ERROR_SPIKE_SECONDS)
+            finished = total(results, session, moment, ERROR_SPIKE_SECONDS)
+            spiking = (
+                failed >= ERROR_SPIKE_MIN_ERRORS
+                and failed >= finished * ERROR_SPIKE_RATIO
+            )
+            once(
+                alerts,
+                alerted,
+                f"errors\t{session}",
+                spiking,
+                fresh
+                and (
+                    lambda: alert(
+                        "errors",
+                        row,
+                        f"{failed} of {finished} tool calls failed in {ERROR_SPIKE_SECONDS // 60}m",
+                    )
+                ),
+            )
+
+    for session, (moment, hook, project, created_at) in list(sessions.items()):
+        quiet = now - moment
+        if quiet >= SESSION_FORGET_SECONDS:
+            del sessions[session]
+            alerted.discard(f"silent\t{session}")
+            continue
+        once(
+            alerts,
+            alerted,
+            f"silent\t{session}",
+            hook not in RESTING_HOOKS and quiet >= SILENT_AFTER_SECONDS,
+            lambda: alert(
+                "silent",
+                {
+                    "session_id": session,
+                    "project_name": project,
+                    "created_at": created_at,
+                },
+                f"nothing since {hook}, {quiet // 60}m ago",
+            ),
+        )
+
+    prune(calls, now, TOOL_BURST_SECONDS)
+    prune(results, now, ERROR_SPIKE_SECONDS)
+    prune(errors, now, ERROR_SPIKE_SECONDS)
+    # A flag whose counter has emptied has nothing left to clear it.
+    tracked = {"burst": calls, "errors": results, "silent": sessions}
+    state["alerted"] = sorted(
+        key
+        for key in alerted
+        if key.split("\t", 1)[1] in tracked[key.split("\t", 1)[0]]
+    )
+    return alerts, state
+
+
+def watch_once(conn, sink, now=None, step=STEP):
+    """Alert on the events stored since the last pass; return how many were read.
+
+    The first pass starts from the newest event, not the oldest: history is
+    what the dashboard and the reports are for.
+    """
+    now = int(now if now is not None else datetime.now(timezone.utc).timestamp())
+    state = event_store.read_checkpoint(conn, CHECKPOINT)
+    if state is None:
+        newest = conn.execute("SELECT MAX(id) FROM claude_events").fetchone()[0] or 0
+        state = empty_state(newest)
+
+    read, alerts = 0, []
+    while True:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        rows = [dict(row) for row in cursor.execute(STEP_SQL, (state["last_id"], step))]
+        raised, state = decide_alerts(rows, state, now)
+        alerts += raised
+        read += len(rows)
+        if len(rows) < step:
+            break
+
+    def commit():
+        with conn:
+            event_store.write_checkpoint(conn, CHECKPOINT, state)
+
+    # The state is saved before the alerts go out: a sink that fails loses
+    # its alerts rather than sending every one again on each pass after.
+    event_store.retry_when_locked(commit)
+    for raised in alerts:
+        sink(raised)
+    return read
@@ -0,0 +1,125 @@
+"""Tests for the alerts on bursts, error spikes and silent sessions.
+
+An alert should fire once per episode, whether the events arrive in one
+pass or several, and a restart should pick up the counters where they were.
+
+Run with: uv run --with pytest pytest claude/hooks/event_anomalies_test.py
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import event_anomalies
+import event_store
+
+NOW = datetime(2026, 10, 1, 9, 30, tzinfo=timezone.utc)
+
+
+def at(seconds_ago):
+    return (NOW - timedelta(seconds=seconds_ago)).strftime(
+        event_store.SQLITE_TIMESTAMP_FORMAT
+    )
+
+
+def store(conn, events):
+    """Store `events`, each (session, hook, seconds before NOW[, tool[, error]])."""
+    stored = conn.execute("SELECT COUNT(*) FROM claude_events").fetchone()[0]
+    rows = []
+    for number, (session, hook, seconds_ago, *rest) in enumerate(events, start=stored):
+        event = {"session_id": session, "hook_event_name": hook, "cwd": "/tmp/app"}
+        if rest:
+            event["tool_name"] = rest[0]
+        if len(rest) > 1:
+            event["error"] = rest[1]
+        context = {
+            "event_id": f"e{number}",
+            "project_dir": "/tmp/app",
+            "environment": {},
+            "created_at": at(seconds_ago),
+        }
+        rows.append(event_store.build_row(event, context))
+    event_store.insert_rows(conn, rows)
+
+
+def watch(conn, seconds_later=0):
+    alerts = []
+    event_anomalies.watch_once(conn, alerts.append, now=NOW.timestamp() + seconds_later)
+    return alerts
+
+
+def test_a_tool_called_fifty_times_in_a_minute_alerts_once_across_passes(tmp_path):
+    conn = event_store.ensure_database(tmp_path / "events.db")
+    watch(conn)
+    store(conn, [("s1", "PreToolUse", 59 - n, "Bash") for n in range(30)])
+    first = watch(conn)
+    store(conn, [("s1", "PreToolUse", 29 - n, "Bash") for n in range(25)])
+    store(conn, [("s2", "PreToolUse", 5, "Bash")])
+    second = watch(conn)
+    store(conn, [("s1", "PreToolUse", 1, "Bash")])
+    third = watch(conn)
+
+    assert first == []
+    assert [(a["kind"], a["session_id"], a["tool"]) for a in second] == [
+        ("burst", "s1", "Bash")
+    ]
+    assert third == []
+
+
+def test_the_history_before_the_first_pass_raises_nothing(tmp_path):
+    conn = event_store.ensure_database(tmp_path / "events.db")
+    store(conn, [("s1", "PreToolUse", 10, "Bash") for _ in range(60)])
+
+    assert watch(conn) == []
+
+
+def test_mostly_failing_tool_calls_alert_but_a_few_among_many_do_not(tmp_path):
+    conn = event_store.ensure_database(tmp_path / "events.db")
+    watch(conn)
+    store(conn, [("ok", "PostToolUse", 100, "Read") for _ in range(20)])
+    store(conn, [("ok", "PostToolUseFailure", 50, "Bash", "exit 1") for _ in range(5)])
+    store(conn, [("bad", "PostToolUse", 100, "Read")])
+    store(conn, [("bad", "PostToolUseFailure", 50, "Bash", "exit 1") for _ in range(5)])
+
+    (spike,) = watch(conn)
+
+    assert (spike["kind"], spike["session_id"]) == ("errors", "bad")
+    assert spike["detail"] == "5 of 6 tool calls failed in 5m"
+
+
+def test_a_session_silent_mid_turn_alerts_and_one_waiting_on_the_user_does_not(
+    tmp_path,
+):
+    conn = event_store.ensure_database(tmp_path / "events.db")
+    watch(conn)
+    store(conn, [("stuck", "PreToolUse", 0, "Bash"), ("done", "Stop", 0)])
+
+    assert watch(conn, seconds_later=60) == []
+    (silent,) = watch(conn, seconds_later=event_anomalies.SILENT_AFTER_SECONDS)
+    assert (silent["kind"], silent["session_id"]) == ("silent", "stuck")
+    assert watch(conn, seconds_later=event_anomalies.SILENT_AFTER_SECONDS + 60) == []
+
+
+def test_a_restart_resumes_the_saved_counters_in_a_compact_checkpoint(tmp_path):
+    path = tmp_path / "events.db"
+    conn = event_store.ensure_database(path)
+    watch(conn)
+    store(conn, [("s1", "PreToolUse", 40, "Bash") for _ in range(49)])
+    watch(conn)
+    conn.close()
+
+    conn = event_store.ensure_database(path)
+    saved = conn.execute(
+        "SELECT value FROM checkpoints WHERE name = ?", (event_anomalies.CHECKPOINT,)
+    ).fetchone()[0]
+    store(conn, [("s1", "PreToolUse", 10, "Bash")])
+
+    assert len(json.loads(saved)["calls"]["s1\tBash"]) == 1
+    assert [a["kind"] for a in watch(conn)] == ["burst"]
+
+
+def test_a_burst_older_than_the_stale_limit_is_counted_without_alerting(tmp_path):
+    conn = event_store.ensure_database(tmp_path / "events.db")
+    watch(conn)
+    store(conn, [("s1", "PreToolUse", 20, "Bash") for _ in range(50)])
+
+    assert watch(conn, seconds_later=event_anomalies.STALE_AFTER_SECONDS) == []
@@ -0,0 +1,248 @@
+"""Random access to the daily JSONL event logs.
+
+log-event-jsonl.py appends one line per hook event to
+~/.claude/events-log/events-YYYY-MM-DD.jsonl, and a tool that wants the
+events of one session, or of the last hour, would otherwise decode every
+line of the day to find them. EventLog keeps an index beside each log, in
+INDEX_DIRNAME: the byte offset, capture time and session of every line. With
+it, and the file mapped into memory, the nth event, the events in a time
+range or a session's events are each a lookup and a slice, and only the
+lines asked for are decoded.
+
+The index is built from the raw bytes: the session and time are found by
+searching each line for their keys, not by decoding it, which is several
+times faster. It is brought up to date on open, reading only what was
+appended since it was last saved; a log that was replaced or truncated is
+indexed again from the start. A line still being written (no newline yet) is
+left for the next open.
+
+Compressed logs cannot be mapped; read those whole, as claude-events-replay
+does.
+
+Standard library only, like event_store.py.
+"""
+
+import json
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+from itertools import accumulate
+from pathlib import Path
+
+LOG_DIR = Path.home() / ".claude" / "events-log"
+LOG_GLOB = "events-*.jsonl"
+INDEX_DIRNAME = ".index"
+INDEX_VERSION = 1
+
+# The payload's own session_id is its first key; logged_at is added after
+# the payload by log-event-jsonl.py, so its last occurrence is the real one.
+SESSION_KEY = re.compile(rb'"session_id":\s*"([^"\\]*)"')
+LOGGED_AT_KEY = b'"logged_at":'
+
+
+def epoch(timestamp):
+    """A stored timestamp ("2026-10-01 09:00:00") or ISO time as epoch seconds."""
+    moment = datetime.fromisoformat(timestamp.replace(" ", "T", 1))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def line_keys(line):
+    """The session and capture time of one raw log line, without decoding it."""
+    match = SESSION_KEY.search(line)
+    session = match[1].decode() if match else ""
+    at = line.rfind(LOGGED_AT_KEY)
+    start = line.find(b'"', at + len(LOGGED_AT_KEY)) + 1 if at >= 0 else 0
+    end = line.find(b'"', start) if start else -1
+    try:
+        moment = epoch(line[start:end].decode()) if end > start else 0.0
+    except ValueError:
+        moment = 0.0
+    return session, moment
+
+
+class EventLog:
+    """One daily log, indexed by line; `log[n]` decodes the nth event."""
+
+    def __init__(self, path, index_dir=None):
+        self.path = Path(path)
+        self.index_path = (
+            index_dir or self.path.parent / INDEX_DIRNAME
+        ) / f"{self.path.name}.idx"
+        self.offsets = array("Q")
+        self.times = array("d")
+        self.session_ids = array("I")
+        self.sessions = []
+        self.session_numbers = {}
+        self.indexed_size = 0
+        self.inode = None
+        self.file = None
+        self.map = None
+        self._latest = None
+        self._postings = None
+        self.refresh()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, ordinal):
+        return json.loads(self.raw(ordinal))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        if self.file is not None:
+            self.file.close()
+        self.map = self.file = None
+
+    def raw(self, ordinal):
+        """The nth line's bytes, newline included."""
+        if ordinal < 0:
+            ordinal += len(self)
+        start = self.offsets[ordinal]
+        end = (
+            self.offsets[ordinal + 1] if ordinal + 1 < len(self) else self.indexed_size
+        )
+        return self.map[start:end]
+
+    def refresh(self):
+        """Index what was appended since the last refresh; return how many lines."""
+        stat = os.stat(self.path)
+        if self.inode is None:
+            self._load_index(stat)
+        if stat.st_ino != self.inode or stat.st_size < self.indexed_size:
+            self._reset(stat.st_ino)
+        if stat.st_size == 0:
+            return 0
+
+        self.close()
+        self.file = open(self.path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        before = len(self)
+        position = self.indexed_size
+        while (end := self.map.find(b"\n", position)) != -1:
+            session, moment = line_keys(self.map[position:end])
+            number = self.session_numbers.get(session)
+            if number is None:
+                number = self.session_numbers[session] = len(self.sessions)
+                self.sessions.append(session)
+            self.offsets.append(position)
+            self.times.append(moment)
+            self.session_ids.append(number)
+            position = end + 1
+        self.indexed_size = position
+        added = len(self) - before
+        if added:
+            self._latest = self._postings = None
+            self._save_index()
+        return added
+
+    def ordinals_between(self, since=None, until=None):
+        """Lines captured at or after `since` and before `until`, in file order.
+
+        Hooks append in roughly, not strictly, time order, so the first
+        candidate is found on the running maximum of the times, and the
+        rest are checked one by one.
+        """
+        low = epoch(since) if since else float("-inf")
+        high = epoch(until) if until else float("inf")
+        if self._latest is None:
+            self._latest = list(accumulate(self.times, max))
+        start = bisect_left(self._latest, low)
+        return [n for n in range(start, len(self)) if low <= self.times[n] < high]
+
+    def ordinals_for_session(self, session_id):
+        """The lines of one session, in file order."""
+        if self._postings is None:
+            postings = {}
+            for ordinal, number in enumerate(self.session_ids):
+                postings.setdefault(number, []).append(ordinal)
+            self._postings = postings
+        number = self.session_numbers.get(session_id)
+        return self._postings.get(number, []) if number is not None else []
+
+    def between(self, since=None, until=None):
+        return (self[n] for n in self.ordinals_between(since, until))
+
+    def session(self, session_id):
+        return (self[n] for n in self.ordinals_for_session(session_id))
+
+    def _reset(self, inode):
+        self.offsets, self.times, self.session_ids = array("Q"), array("d"), array("I")
+        self.sessions, self.session_numbers = [], {}
+        self.indexed_size, self.inode = 0, inode
+
+    def _load_index(self, stat):
+        """Take up the saved index, if it is for this file as it was."""
+        self._reset(stat.st_ino)
+        try:
+            with open(self.index_path, "rb") as f:
+                header = json.loads(f.readline())
+                if header["version"] != INDEX_VERSION or header["inode"] != stat.st_ino:
+                    return
+                lines = header["lines"]
+                for column in (self.offsets, self.times, self.session_ids):
+                    column.fromfile(f, lines)
+        except (OSError, ValueError, KeyError, EOFError):
+            self._reset(stat.st_ino)
+            return
+        self.sessions = header["sessions"]
+        self.session_numbers = {session: n for n, session in enumerate(self.sessions)}
+        self.indexed_size = header["size"]
+
+    def _save_index(self):
+        """Write the index whole, under a new name, then rename it into place."""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            "version": INDEX_VERSION,
+            "inode": self.inode,
+            "size": self.indexed_size,
+            "lines": len(self),
+            "sessions": self.sessions,
+        }
+        temporary = self.index_path.with_name(
+            f"{self.index_path.name}.{os.getpid()}.new"
+        )
+        try:
+            with open(temporary, "wb") as f:
+                f.write(json.dumps(header).encode() + b"\n")
+                for column in (self.offsets, self.times, self.session_ids):
+                    column.tofile(f)
+            os.replace(temporary, self.index_path)
+        except OSError:
+            # An index that cannot be saved is built again next time.
+            temporary.unlink(missing_ok=True)
+
+
+def daily_logs(log_dir=LOG_DIR, since=None, until=None):
+    """The uncompressed daily logs that can hold events in [since, until).
+
+    Logs are named by the local date they were written on, and events carry
+    UTC times, so a day either side of the range is included.
+    """
+    first = (since or "0000-00-00")[:10]
+    last = (until or "9999-99-99")[:10]
+    paths = []
+    for path in sorted(log_dir.glob(LOG_GLOB)):
+        day = path.name[len("events-") : -len(".jsonl")]
+        if shift(first, -1) <= day <= shift(last, 1):
+            paths.append(path)
+    return paths
+
+
+def shift(day, days):
+    try:
+        moment = datetime.strptime(day, "%Y-%m-%d").toordinal() + days
+    except ValueError:
+        return day
+    return datetime.fromordinal(moment).strftime("%Y-%m-%d")
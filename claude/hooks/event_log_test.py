@@ -0,0 +1,101 @@
+"""Tests for the indexed reader over the daily JSONL event logs.
+
+The index is saved and picked up again as the log grows, so what is pinned
+here is that a reader opening a log part way through its day finds the same
+events a full read would, and never a half-written line.
+
+Run with: uv run --with pytest pytest claude/hooks/event_log_test.py
+"""
+
+import json
+import os
+
+import pytest
+
+import event_log
+
+
+def line(session, logged_at, **fields):
+    event = {
+        "session_id": session,
+        "hook_event_name": "PostToolUse",
+        **fields,
+        "logged_at": logged_at,
+        "project_name": "app",
+        "claude_env": {},
+    }
+    return json.dumps(event, separators=(",", ":")) + "\n"
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / "events-2026-10-01.jsonl"
+    path.write_text(
+        line("s1", "2026-10-01T09:00:00+00:00", tool_input={"session_id": "decoy"})
+        + line("s2", "2026-10-01T09:05:00+00:00")
+        + line(
+            "s1",
+            "2026-10-01T09:04:59+00:00",
+            tool_output={"note": '"logged_at":"2001-01-01"'},
+        )
+        + line("s1", "2026-10-01T09:10:00+00:00")
+    )
+    return path
+
+
+def test_events_are_found_by_ordinal_time_and_session(log_path):
+    with event_log.EventLog(log_path) as log:
+        assert len(log) == 4
+        assert log[-1]["logged_at"] == "2026-10-01T09:10:00+00:00"
+        assert log.ordinals_between("2026-10-01 09:04:00", "2026-10-01 09:10:00") == [
+            1,
+            2,
+        ]
+        assert [event["logged_at"][11:16] for event in log.session("s1")] == [
+            "09:00",
+            "09:04",
+            "09:10",
+        ]
+        assert log.ordinals_for_session("decoy") == []
+
+
+def test_a_growing_log_is_indexed_from_where_the_saved_index_stopped(log_path):
+    event_log.EventLog(log_path).close()
+    with open(log_path, "a") as f:
+        f.write(
+            line("s3", "2026-10-01T10:00:00+00:00")
+            + '{"session_id":"s3","logged_at":"2026-10-01T10'
+        )
+
+    with event_log.EventLog(log_path) as log:
+        assert len(log) == 5
+        assert log.ordinals_for_session("s3") == [4]
+        with open(log_path, "a") as f:
+            f.write(':01:00+00:00"}\n')
+        assert log.refresh() == 1
+        assert log[5]["logged_at"] == "2026-10-01T10:01:00+00:00"
+
+
+def test_a_replaced_log_is_indexed_again_from_the_start(log_path):
+    event_log.EventLog(log_path).close()
+    replacement = log_path.with_name("replacement")
+    replacement.write_text(line("s9", "2026-10-01T11:00:00+00:00"))
+    os.replace(replacement, log_path)
+
+    with event_log.EventLog(log_path) as log:
+        assert (len(log), log[0]["session_id"]) == (1, "s9")
+
+
+def test_daily_logs_include_a_day_either_side_of_the_range(tmp_path):
+    for day in ("2026-09-29", "2026-09-30", "2026-10-01", "2026-10-02", "2026-10-04"):
+        (tmp_path / f"events-{day}.jsonl").touch()
+
+    paths = event_log.daily_logs(
+        tmp_path, since="2026-10-01 00:00:00", until="2026-10-02 12:00:00"
+    )
+
+    assert [path.name[7:17] for path in paths] == [
+        "2026-09-30",
+        "2026-10-01",
+        "2026-10-02",
+    ]
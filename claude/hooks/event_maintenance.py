@@ -0,0 +1,135 @@
+"""Keeps events.db's write-ahead log short, and reports how the file is doing.
+
+Every hook commits to the WAL, and SQLite copies it back into the database
+(a checkpoint) once it passes a thousand pages, but only as far as the
+oldest open reader lets it, and never shrinks the file. With the dashboard
+polling all day the log can grow to hundreds of megabytes, and every
+reader then searches it on every page it reads.
+
+A pass here runs a checkpoint of its own. While events are arriving it is
+PASSIVE: it copies what no reader still needs and waits on nobody. Once
+nothing has been stored for IDLE_AFTER_SECONDS it is TRUNCATE, which waits
+up to the connection's busy timeout for readers to move on, then empties
+the log file. A pass that cannot finish leaves the rest to the next one.
+
+Each pass also measures the file and saves what it found in the checkpoint
+row HEALTH, where the dashboard's health view reads it:
+- the database and WAL sizes, the page count, and how many pages are free
+  (left by deletes, and only returned by a VACUUM);
+- each index's size, from the dbstat table when SQLite was built with it;
+- any of event_store.INDEXES that is missing, as after a bulk load that
+  stopped before rebuilding them. SQLite keeps no count of how often an
+  index is used, so size and presence are what can be reported.
+
+Before its checkpoint a pass also stores the summaries of the sessions that
+have ended since the last one (see session_summaries.py), the one cache the
+read-only readers rely on someone else to write.
+
+Standard library only, like event_store.py.
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import event_store
+import session_summaries
+
+HEALTH = "event_maintenance.health"
+
+IDLE_AFTER_SECONDS = 120
+
+# How long a pass waits for the lock, and an idle pass for readers to
+# finish. Hooks wait on the pass meanwhile, so it is kept short.
+BUSY_TIMEOUT_SECONDS = 1.0
+
+INDEX_SIZES_SQL = """
+    SELECT name, SUM(pgsize) FROM dbstat
+    WHERE name IN (SELECT name FROM sqlite_master WHERE type = 'index')
+    GROUP BY name
+"""
+
+
+def wal_path(db_path):
+    return Path(f"{db_path}-wal")
+
+
+def file_size(path):
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def index_sizes(conn):
+    """Bytes per index, or None when SQLite was built without dbstat."""
+    try:
+        return dict(conn.execute(INDEX_SIZES_SQL).fetchall())
+    except sqlite3.OperationalError:
+        return None
+
+
+def health(conn, db_path):
+    """The file's sizes, free pages and indexes as they are now."""
+    present = {
+        name
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+    }
+    return {
+        "db_bytes": file_size(db_path),
+        "wal_bytes": file_size(wal_path(db_path)),
+        "page_size": conn.execute("PRAGMA page_size").fetchone()[0],
+        "page_count": conn.execute("PRAGMA page_count").fetchone()[0],
+        "freelist_count": conn.execute("PRAGMA freelist_count").fetchone()[0],
+        "indexes": index_sizes(conn),
+        "missing_indexes": [
+            name
+            for name in map(event_store.index_name, event_store.INDEXES)
+            if name not in present
+        ],
+    }
+
+
+def is_idle(conn, now):
+    """True when no event has been stored for IDLE_AFTER_SECONDS."""
+    newest = conn.execute("SELECT MAX(created_at) FROM claude_events").fetchone()[0]
+    quiet_since = (now - timedelta(seconds=IDLE_AFTER_SECONDS)).strftime(
+        event_store.SQLITE_TIMESTAMP_FORMAT
+    )
+    return newest is None or newest < quiet_since
+
+
+def maintain(conn, db_path, now=None):
+    """Store ended sessions' summaries, then checkpoint the WAL as far as it
+    is safe to now; save and return the health."""
+    now = now or datetime.now(timezone.utc)
+    summarized = session_summaries.summarize(conn)
+    idle = is_idle(conn, now)
+    mode = "TRUNCATE" if idle else "PASSIVE"
+    wal_before = file_size(wal_path(db_path))
+    busy, log_pages, copied_pages = conn.execute(
+        f"PRAGMA wal_checkpoint({mode})"
+    ).fetchone()
+
+    report = {
+        **health(conn, db_path),
+        "checked_at": now.strftime(event_store.SQLITE_TIMESTAMP_FORMAT),
+        "sessions_summarized": summarized,
+        "checkpoint": {
+            "mode": mode.lower(),
+            "completed": not busy,
+            "wal_bytes_before": wal_before,
+            "log_pages": log_pages,
+            "copied_pages": copied_pages,
+        },
+    }
+
+    def commit():
+        with conn:
+            event_store.write_checkpoint(conn, HEALTH, report)
+
+    event_store.retry_when_locked(commit)
+    return report
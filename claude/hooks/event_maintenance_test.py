@@ -0,0 +1,109 @@
+"""Tests for checkpointing the events database's WAL and reporting its health.
+
+A pass must empty the log only when that cannot hold up a hook, must give
+up rather than wait on a reader that will not let go, and must leave behind
+a report the dashboard can read without measuring the file itself.
+
+Run with: uv run --with pytest pytest claude/hooks/event_maintenance_test.py
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import event_maintenance
+import event_store
+
+NOW = datetime(2026, 10, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "events.db"
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = event_store.ensure_database(db_path)
+    conn.execute("PRAGMA busy_timeout = 0")
+    yield conn
+    conn.close()
+
+
+def store_at(conn, when, count=200):
+    rows = []
+    for number in range(count):
+        event = {
+            "session_id": "s1",
+            "hook_event_name": "PreToolUse",
+            "tool_name": "Bash",
+            "tool_input": {"command": "x" * 500},
+        }
+        context = {
+            "event_id": f"e{when:%H%M%S}-{number}",
+            "project_dir": "/dev/app",
+            "environment": {},
+            "created_at": when.strftime(event_store.SQLITE_TIMESTAMP_FORMAT),
+        }
+        rows.append(event_store.build_row(event, context))
+    event_store.insert_rows(conn, rows)
+
+
+def test_an_idle_database_has_its_log_emptied(conn, db_path):
+    store_at(conn, NOW - timedelta(hours=1))
+    wal = event_maintenance.wal_path(db_path)
+    assert wal.stat().st_size > 0
+
+    report = event_maintenance.maintain(conn, db_path, NOW)
+
+    assert (
+        report["checkpoint"]["mode"] == "truncate" and report["checkpoint"]["completed"]
+    )
+    assert report["checkpoint"]["wal_bytes_before"] > 0 and report["wal_bytes"] == 0
+    assert event_store.read_checkpoint(conn, event_maintenance.HEALTH) == report
+
+
+def test_while_events_arrive_the_log_is_copied_back_but_left_in_place(conn, db_path):
+    store_at(conn, NOW - timedelta(seconds=5))
+
+    report = event_maintenance.maintain(conn, db_path, NOW)
+
+    assert report["checkpoint"] == {
+        **report["checkpoint"],
+        "mode": "passive",
+        "completed": True,
+    }
+    assert report["checkpoint"]["copied_pages"] == report["checkpoint"]["log_pages"] > 0
+    assert report["wal_bytes"] > 0
+
+
+def test_a_reader_holding_the_log_is_not_waited_on(conn, db_path):
+    store_at(conn, NOW - timedelta(hours=1))
+    reader = sqlite3.connect(db_path)
+    reader.execute("BEGIN")
+    reader.execute("SELECT COUNT(*) FROM claude_events").fetchone()
+    store_at(conn, NOW - timedelta(hours=1) + timedelta(seconds=1))
+
+    report = event_maintenance.maintain(conn, db_path, NOW)
+    reader.rollback()
+
+    assert (
+        report["checkpoint"]["mode"] == "truncate"
+        and not report["checkpoint"]["completed"]
+    )
+    assert report["wal_bytes"] > 0
+
+
+def test_the_report_names_an_index_a_bulk_load_never_rebuilt(conn, db_path):
+    conn.execute("DROP INDEX idx_tool_name")
+
+    report = event_maintenance.maintain(conn, db_path, NOW)
+
+    assert report["missing_indexes"] == ["idx_tool_name"]
+    assert report["page_count"] * report["page_size"] == report["db_bytes"]
+    if report["indexes"] is not None:
+        assert (
+            "idx_created_at" in report["indexes"]
+            and "idx_tool_name" not in report["indexes"]
+        )
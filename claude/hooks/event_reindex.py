@@ -0,0 +1,223 @@
+"""Recompute the derived columns of every stored event.
+
+project_name, status, agent_id and error_cluster are computed when an event
+is stored (event_store.DERIVED_COLUMNS). When the rules change, as project
+naming did with project_names.py, the rows stored before keep the old
+answers. This runs the current rules over every row again, from each row's
+own payload and project directory.
+
+The table is walked by id, STEP rows at a time, and only rows whose columns
+changed are written, each step in its own short transaction with the
+checkpoint. Hooks writing meanwhile wait at most one step for the lock, and
+an interrupted run carries on from the last committed step. Rows stored
+after the run started were stored under the current rules, so the walk
+stops at the newest id it saw when it began.
+
+Everything computed from those columns is then rebuilt from them:
+- the hourly rollups, whose checkpoint is cleared so the next report
+  rebuilds them (see event_rollups.py);
+- the session summaries, with each session's tool time, which the next
+  maintenance pass stores again (see session_summaries.py);
+- the token usage's project names, taken again from each session's events,
+  with the per-session and per-project-day usage totals.
+
+That is done in short transactions too: the rows whose project changed are
+found by reading, then renamed AGGREGATE_STEP at a time, and the project
+totals rebuilt a day at a time. The transcript indexer's inserts land
+between them, and its triggers keep every total right meanwhile. An
+interrupted rebuild starts over, since every step can be run again.
+
+Standard library only, like event_store.py.
+"""
+
+import json
+import sqlite3
+import time
+
+import event_rollups
+import event_store
+import session_summaries
+
+CHECKPOINT = "event_reindex.progress"
+
+# Rows recomputed per transaction; the lock is held while this many rows'
+# changes are written.
+STEP = 2_000
+
+# Usage rows renamed per transaction while the aggregates are rebuilt.
+AGGREGATE_STEP = 2_000
+
+STEP_SQL = f"""
+    SELECT id, project_dir, full_event, {", ".join(event_store.DERIVED_COLUMNS)}
+    FROM claude_events
+    WHERE id > ? AND id <= ?
+    ORDER BY id
+"""
+
+UPDATE_SQL = f"""
+    UPDATE claude_events SET {", ".join(f"{column} = ?" for column in event_store.DERIVED_COLUMNS)}
+    WHERE id = ?
+"""
+
+ROLLUP_TABLES = ("event_rollups", "tool_rollups", "error_rollups")
+
+SESSION_PROJECTS_SQL = """
+    SELECT t.session_id, MIN(e.project_name)
+    FROM (SELECT DISTINCT session_id FROM token_usage) t
+    JOIN claude_events e ON e.session_id = t.session_id
+    GROUP BY t.session_id
+"""
+
+# One day's project totals, read through idx_token_usage_created.
+PROJECT_DAY_SQL = """
+    INSERT INTO project_usage
+    SELECT project_name, substr(created_at, 1, 10), model, COUNT(*),
+           SUM(input_tokens), SUM(output_tokens), SUM(cache_creation_tokens), SUM(cache_read_tokens)
+    FROM token_usage WHERE created_at >= ? AND created_at < date(?, '+1 day')
+    GROUP BY 1, 2, 3
+"""
+
+
+def recompute(rows):
+    """The (columns..., id) updates for the rows whose derived columns changed."""
+    updates = []
+    for row in rows:
+        try:
+            event_data = json.loads(row["full_event"])
+        except ValueError:
+            continue
+        if not isinstance(event_data, dict):
+            continue
+        derived = event_store.derive_columns(event_data, row["project_dir"])
+        if derived != tuple(row[column] for column in event_store.DERIVED_COLUMNS):
+            updates.append((*derived, row["id"]))
+    return updates
+
+
+def in_steps(conn, items, step, write, pause=0.0, sleep=time.sleep):
+    """Call write(batch) on `step` items at a time, each in its own transaction."""
+    for start in range(0, len(items), step):
+
+        def commit(batch=items[start : start + step]):
+            with conn:
+                write(batch)
+
+        event_store.retry_when_locked(commit, sleep=sleep)
+        if pause:
+            sleep(pause)
+
+
+def rename_projects(
+    conn, table, keys, projects, step=AGGREGATE_STEP, pause=0.0, sleep=time.sleep
+):
+    """Give each of `table`'s rows its session's project; return how many changed.
+
+    Rows are found by reading the table and renamed by their `keys`, the
+    primary key, since none of these tables is indexed by session.
+    """
+    select = f"SELECT session_id, project_name, {', '.join(keys)} FROM {table}"
+    update = f"UPDATE {table} SET project_name = ? WHERE {' AND '.join(f'{key} = ?' for key in keys)}"
+    changed = [
+        (projects[session], *key)
+        for session, project, *key in conn.execute(select)
+        if session in projects and projects[session] != project
+    ]
+    in_steps(
+        conn, changed, step, lambda batch: conn.executemany(update, batch), pause, sleep
+    )
+    return len(changed)
+
+
+def rebuild_aggregates(conn, step=AGGREGATE_STEP, pause=0.0, sleep=time.sleep):
+    """Clear what was computed from the old columns; fix usage's project names."""
+
+    def clear():
+        with conn:
+            for table in ROLLUP_TABLES:
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute(
+                "DELETE FROM checkpoints WHERE name = ?", (event_rollups.CHECKPOINT,)
+            )
+            conn.execute("DELETE FROM session_summaries")
+            conn.execute(
+                "DELETE FROM checkpoints WHERE name = ?",
+                (session_summaries.CHECKPOINT,),
+            )
+
+    event_store.retry_when_locked(clear, sleep=sleep)
+
+    sessions = conn.execute(SESSION_PROJECTS_SQL).fetchall()
+    rename_projects(
+        conn,
+        "transcript_offsets",
+        ("transcript_path",),
+        dict(sessions),
+        step,
+        pause,
+        sleep,
+    )
+    # Usage keys an unknown project as '', as transcript_usage.py stores it.
+    projects = {session: project or "" for session, project in sessions}
+    # Renaming a message fires trg_token_usage_update, which leaves the
+    # totals as they were; a session's are moved with it, and each day's
+    # project totals are rebuilt, whether or not this run renamed anything,
+    # in case the run before stopped in between.
+    rename_projects(conn, "token_usage", ("message_id",), projects, step, pause, sleep)
+    rename_projects(
+        conn, "session_usage", ("session_id", "model"), projects, step, pause, sleep
+    )
+    days = conn.execute(
+        "SELECT DISTINCT substr(created_at, 1, 10) FROM token_usage UNION SELECT day FROM project_usage"
+    ).fetchall()
+
+    def rebuild_days(batch):
+        for (day,) in batch:
+            conn.execute("DELETE FROM project_usage WHERE day = ?", (day,))
+            conn.execute(PROJECT_DAY_SQL, (day, day))
+
+    in_steps(conn, days, 1, rebuild_days, pause, sleep)
+
+    def finish():
+        with conn:
+            conn.execute("DELETE FROM checkpoints WHERE name = ?", (CHECKPOINT,))
+
+    event_store.retry_when_locked(finish, sleep=sleep)
+
+
+def reindex(conn, step=STEP, pause=0.0, restart=False, progress=None, sleep=time.sleep):
+    """Recompute every row's derived columns; return the progress so far.
+
+    `pause` seconds between steps leave the lock free for a while longer.
+    `progress`, if given, is called with the progress after each step.
+    """
+    state = None if restart else event_store.read_checkpoint(conn, CHECKPOINT)
+    if state is None:
+        newest = conn.execute("SELECT MAX(id) FROM claude_events").fetchone()[0] or 0
+        state = {"last_id": 0, "until": newest, "read": 0, "changed": 0}
+
+    while state["last_id"] < state["until"]:
+        upper = min(state["last_id"] + step, state["until"])
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        rows = cursor.execute(STEP_SQL, (state["last_id"], upper)).fetchall()
+        updates = recompute(rows)
+        state = {
+            **state,
+            "last_id": upper,
+            "read": state["read"] + len(rows),
+            "changed": state["changed"] + len(updates),
+        }
+
+        def commit(updates=updates, state=state):
+            with conn:
+                conn.executemany(UPDATE_SQL, updates)
+                event_store.write_checkpoint(conn, CHECKPOINT, state)
+
+        event_store.retry_when_locked(commit, sleep=sleep)
+        if progress:
+            progress(state)
+        if pause:
+            sleep(pause)
+
+    rebuild_aggregates(conn, pause=pause, sleep=sleep)
+    return state
@@ -0,0 +1,194 @@
+"""Tests for recomputing the derived columns of stored events.
+
+The job runs over a live database a step at a time, so the properties
+worth pinning are that stopping and resuming gives the same result as one
+run, that nothing computed from the old values survives it, and that hooks
+get the lock between its steps.
+
+Run with: uv run --with pytest pytest claude/hooks/event_reindex_test.py
+"""
+
+import sqlite3
+
+import pytest
+
+import event_reindex
+import event_rollups
+import event_store
+
+
+def store(conn, events):
+    rows = []
+    for number, (session, hook, project_dir, fields) in enumerate(events):
+        event = {
+            "session_id": session,
+            "hook_event_name": hook,
+            "cwd": project_dir,
+            **fields,
+        }
+        context = {
+            "event_id": f"e{number}",
+            "project_dir": project_dir,
+            "environment": {},
+            "created_at": f"2026-10-01 09:00:{number:02d}",
+        }
+        rows.append(event_store.build_row(event, context))
+    event_store.insert_rows(conn, rows)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = event_store.ensure_database(tmp_path / "events.db")
+    store(
+        conn,
+        [
+            ("s1", "PreToolUse", "/dev/app", {"tool_name": "Bash"}),
+            (
+                "s1",
+                "PostToolUse",
+                "/dev/app",
+                {"tool_name": "Bash", "tool_output": {"exit_code": 2}},
+            ),
+            ("s2", "Stop", "/dev/lib", {}),
+            (
+                "s1",
+                "PostToolUseFailure",
+                "/dev/app",
+                {"tool_name": "Read", "error": "denied"},
+            ),
+        ],
+    )
+    # As stored before the current rules: old names, no status or cluster.
+    with conn:
+        conn.execute(
+            "UPDATE claude_events SET project_name = 'fix-login', status = NULL, error_cluster = NULL "
+            "WHERE session_id = 's1'"
+        )
+        conn.execute(
+            "INSERT INTO token_usage VALUES ('m1', 's1', 'fix-login', 'model', '2026-10-01 09:00:00', 1, 2, 3, 4)"
+        )
+    event_rollups.update_rollups(conn)
+    return conn
+
+
+def derived(conn):
+    return conn.execute(
+        f"SELECT {', '.join(event_store.DERIVED_COLUMNS)} FROM claude_events ORDER BY id"
+    ).fetchall()
+
+
+def test_a_reindex_stopped_part_way_resumes_to_the_same_result(conn, tmp_path):
+    expected = [
+        event_store.derive_columns(*args)
+        for args in [
+            ({"hook_event_name": "PreToolUse", "cwd": "/dev/app"}, "/dev/app"),
+            (
+                {
+                    "hook_event_name": "PostToolUse",
+                    "tool_name": "Bash",
+                    "tool_output": {"exit_code": 2},
+                },
+                "/dev/app",
+            ),
+            ({"hook_event_name": "Stop"}, "/dev/lib"),
+            (
+                {
+                    "hook_event_name": "PostToolUseFailure",
+                    "tool_name": "Read",
+                    "error": "denied",
+                },
+                "/dev/app",
+            ),
+        ]
+    ]
+
+    class Stop(Exception):
+        pass
+
+    def stop_after_first_step(state):
+        raise Stop
+
+    with pytest.raises(Stop):
+        event_reindex.reindex(conn, step=2, progress=stop_after_first_step)
+    assert event_store.read_checkpoint(conn, event_reindex.CHECKPOINT)["last_id"] == 2
+
+    state = event_reindex.reindex(conn, step=2)
+
+    assert derived(conn) == expected
+    assert (state["read"], state["changed"]) == (4, 3)
+    assert event_store.read_checkpoint(conn, event_reindex.CHECKPOINT) is None
+
+
+def test_what_was_computed_from_the_old_values_is_rebuilt(conn):
+    event_reindex.reindex(conn)
+
+    def names(table):
+        return {
+            row[0] for row in conn.execute(f"SELECT DISTINCT project_name FROM {table}")
+        }
+
+    assert conn.execute("SELECT COUNT(*) FROM event_rollups").fetchone()[0] == 0
+    assert event_store.read_checkpoint(conn, event_rollups.CHECKPOINT) is None
+    assert (
+        names("token_usage")
+        == names("session_usage")
+        == names("project_usage")
+        == {"app"}
+    )
+    assert conn.execute(
+        "SELECT messages, output_tokens FROM project_usage"
+    ).fetchall() == [(1, 2)]
+
+    event_rollups.update_rollups(conn)
+    assert names("event_rollups") == {"app", "lib"}
+
+
+def test_the_job_waits_for_a_writer_holding_the_lock(conn, tmp_path):
+    other = sqlite3.connect(tmp_path / "events.db", timeout=0)
+    other.execute("BEGIN IMMEDIATE")
+    conn.execute("PRAGMA busy_timeout = 0")
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        other.rollback()
+
+    event_reindex.reindex(conn, sleep=sleep)
+
+    assert waits and derived(conn)[0][0] == "app"
+
+
+def test_hooks_can_write_between_the_rebuilds_steps(conn, tmp_path):
+    with conn:
+        conn.execute(
+            "UPDATE claude_events SET project_name = 'app' WHERE session_id = 's1'"
+        )
+        conn.execute(
+            "INSERT INTO token_usage VALUES ('m2', 's1', 'fix-login', 'model', '2026-10-02 09:00:00', 1, 2, 3, 4)"
+        )
+    hook = sqlite3.connect(tmp_path / "events.db", timeout=0)
+    written = []
+
+    def sleep(seconds):
+        with hook:
+            hook.execute(
+                "INSERT INTO token_usage VALUES (?, 's2', 'lib', 'model', '2026-10-02 10:00:00', 1, 1, 1, 1)",
+                (f"hook{len(written)}",),
+            )
+        written.append(seconds)
+
+    event_reindex.rebuild_aggregates(conn, step=1, pause=0.01, sleep=sleep)
+
+    assert len(written) > 4
+    totals = conn.execute(
+        "SELECT SUM(messages), SUM(output_tokens) FROM project_usage"
+    ).fetchone()
+    assert (
+        totals
+        == conn.execute(
+            "SELECT COUNT(*), SUM(output_tokens) FROM token_usage"
+        ).fetchone()
+    )
+    assert conn.execute(
+        "SELECT DISTINCT project_name FROM session_usage WHERE session_id = 's1'"
+    ).fetchall() == [("app",)]
@@ -0,0 +1,174 @@
+"""Hourly rollups of the events table, for reports over long windows.
+
+A report over a month of activity should not read a month of events, whose
+rows carry every tool's input and output. These tables count the events by
+hour, project, hook type, tool and status; total each tool's call time; and
+count each error cluster, so a report reads a few thousand small rows
+instead (see MIGRATIONS[6] in event_store.py).
+
+They are brought up to date by id from a checkpoint, a bounded transaction
+per step, so an update after a day of activity reads only that day's rows,
+and an update interrupted part way carries on where it stopped.
+
+Tool time pairs each PostToolUse(Failure) with the event just before it for
+the same session and tool, when that is a PreToolUse, as the session
+summaries do (see session_summaries.py). A Post with no Pre before it, as
+when a sampling policy dropped the Pre of a call that then failed, is
+counted as a call with no time.
+
+Standard library only, like event_store.py.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+
+import event_store
+
+CHECKPOINT = "event_rollups.last_event_id"
+
+# Events folded per transaction.
+STEP = 50_000
+
+TOOL_HOOKS = ("PreToolUse", "PostToolUse", "PostToolUseFailure")
+
+# Each step's events in id order. The window pairs tool events within the
+# step; the first of each session and tool in a step is paired in Python
+# with the last one of the step before. Payloads are read only for rows
+# stored before status was recorded, which need it derived.
+STEP_SQL = """
+    SELECT id, session_id, project_name, hook_type, tool_name, status, error_cluster, created_at,
+           CASE WHEN status IS NULL THEN tool_output END AS legacy_output,
+           LAG(hook_type) OVER w AS previous_hook,
+           ROUND((julianday(created_at) - julianday(LAG(created_at) OVER w)) * 86400, 1) AS since_previous
+    FROM claude_events
+    WHERE id > ? AND id <= ?
+    WINDOW w AS (
+        PARTITION BY session_id, tool_name, hook_type IN ('PreToolUse', 'PostToolUse', 'PostToolUseFailure')
+        ORDER BY id
+    )
+    ORDER BY id
+"""
+
+# The tool event before a step, for a session and tool first seen in it.
+PREVIOUS_CALL_SQL = """
+    SELECT hook_type, created_at FROM claude_events
+    WHERE session_id = ? AND tool_name IS ? AND id <= ?
+      AND hook_type IN ('PreToolUse', 'PostToolUse', 'PostToolUseFailure')
+    ORDER BY created_at DESC, id DESC LIMIT 1
+"""
+
+UPSERT_EVENTS_SQL = """
+    INSERT INTO event_rollups VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (hour, project_name, hook_type, tool_name, status)
+    DO UPDATE SET events = events + excluded.events
+"""
+
+UPSERT_TOOLS_SQL = """
+    INSERT INTO tool_rollups VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (hour, project_name, tool_name) DO UPDATE SET
+        calls = calls + excluded.calls,
+        seconds = seconds + excluded.seconds,
+        max_seconds = MAX(max_seconds, excluded.max_seconds)
+"""
+
+UPSERT_ERRORS_SQL = """
+    INSERT INTO error_rollups VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (hour, error_cluster, project_name) DO UPDATE SET
+        errors = errors + excluded.errors,
+        last_id = MAX(last_id, excluded.last_id)
+"""
+
+
+def hour_of(created_at):
+    """The start of a stored timestamp's hour, as rollups are keyed."""
+    return f"{created_at[:13]}:00:00"
+
+
+def seconds_between(earlier, later):
+    parse = datetime.strptime
+    fmt = event_store.SQLITE_TIMESTAMP_FORMAT
+    return (parse(later, fmt) - parse(earlier, fmt)).total_seconds()
+
+
+def row_status(row):
+    if row["status"] is not None:
+        return row["status"]
+    try:
+        tool_output = json.loads(row["legacy_output"] or "null")
+    except ValueError:
+        tool_output = None
+    return event_store.derive_status(row["hook_type"], tool_output)
+
+
+def fold(rows, last_calls, resumed_from, conn):
+    """Count one step's rows; return the (events, tools, errors) upserts."""
+    events, tools, errors = {}, {}, {}
+    for row in rows:
+        hour = hour_of(row["created_at"] or "")
+        project = row["project_name"] or ""
+        tool = row["tool_name"] or ""
+        key = (hour, project, row["hook_type"] or "", tool, row_status(row) or "")
+        events[key] = events.get(key, 0) + 1
+
+        if row["error_cluster"]:
+            key = (hour, row["error_cluster"], project)
+            count, last_id = errors.get(key, (0, 0))
+            errors[key] = (count + 1, max(last_id, row["id"]))
+
+        if row["hook_type"] not in TOOL_HOOKS:
+            continue
+        call = (row["session_id"], row["tool_name"])
+        if row["previous_hook"] is not None:
+            previous_hook, seconds = row["previous_hook"], row["since_previous"]
+        else:
+            previous = last_calls.get(call)
+            if previous is None and resumed_from:
+                previous = conn.execute(
+                    PREVIOUS_CALL_SQL, (*call, resumed_from)
+                ).fetchone()
+            previous_hook, seconds = None, None
+            if previous is not None and previous[1] and row["created_at"]:
+                previous_hook = previous[0]
+                seconds = seconds_between(previous[1], row["created_at"])
+        last_calls[call] = (row["hook_type"], row["created_at"])
+
+        if row["hook_type"] == "PreToolUse":
+            continue
+        paired = previous_hook == "PreToolUse" and seconds is not None
+        seconds = max(seconds, 0.0) if paired else 0.0
+        key = (hour, project, tool)
+        calls, total, longest = tools.get(key, (0, 0.0, 0.0))
+        tools[key] = (calls + 1, total + seconds, max(longest, seconds))
+
+    return (
+        [(*key, count) for key, count in events.items()],
+        [(*key, *totals) for key, totals in tools.items()],
+        [(*key, *counts) for key, counts in errors.items()],
+    )
+
+
+def update_rollups(conn, step=STEP):
+    """Fold the events stored since the last update into the rollups; return how many."""
+    resumed_from = last_id = event_store.read_checkpoint(conn, CHECKPOINT, 0)
+    newest = conn.execute("SELECT MAX(id) FROM claude_events").fetchone()[0] or 0
+    last_calls = {}
+    folded = 0
+    while last_id < newest:
+        upper = min(last_id + step, newest)
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        rows = cursor.execute(STEP_SQL, (last_id, upper)).fetchall()
+        events, tools, errors = fold(rows, last_calls, resumed_from, conn)
+
+        def commit(upper=upper):
+            with conn:
+                conn.executemany(UPSERT_EVENTS_SQL, events)
+                conn.executemany(UPSERT_TOOLS_SQL, tools)
+                conn.executemany(UPSERT_ERRORS_SQL, errors)
+                event_store.write_checkpoint(conn, CHECKPOINT, upper)
+
+        event_store.retry_when_locked(commit)
+        folded += len(rows)
+        last_id = upper
+    return folded
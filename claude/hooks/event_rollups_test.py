@@ -0,0 +1,95 @@
+"""Tests for the hourly rollups of the events table.
+
+The rollups are built a step at a time and picked up again from a
+checkpoint, so the property worth pinning is that where the steps and runs
+fall makes no difference to the totals.
+
+Run with: uv run --with pytest pytest claude/hooks/event_rollups_test.py
+"""
+
+import pytest
+
+import event_rollups
+import event_store
+
+EVENTS = [
+    ("s1", "PreToolUse", "2026-10-01 09:00:00", "Bash"),
+    ("s2", "PreToolUse", "2026-10-01 09:00:01", "Bash"),
+    ("s1", "PostToolUse", "2026-10-01 09:00:04", "Bash"),
+    ("s1", "PreToolUse", "2026-10-01 09:59:58", "Read"),
+    ("s2", "PostToolUseFailure", "2026-10-01 09:59:59", "Bash"),
+    ("s1", "PostToolUse", "2026-10-01 10:00:00", "Read"),
+    ("s1", "Stop", "2026-10-01 10:00:01", None),
+]
+
+
+def store(conn, events):
+    rows = []
+    for number, (session, hook, created_at, tool) in enumerate(events):
+        event = {
+            "session_id": session,
+            "hook_event_name": hook,
+            "cwd": "/tmp/app",
+            "tool_name": tool,
+        }
+        if hook == "PostToolUseFailure":
+            event["error"] = "exit 1"
+        context = {
+            "event_id": f"{session}-{created_at}-{hook}",
+            "project_dir": "/tmp/app",
+            "environment": {},
+            "created_at": created_at,
+        }
+        rows.append(event_store.build_row(event, context))
+    event_store.insert_rows(conn, rows)
+
+
+def rollups(conn):
+    return (
+        conn.execute("SELECT * FROM event_rollups ORDER BY 1, 2, 3, 4, 5").fetchall(),
+        conn.execute("SELECT * FROM tool_rollups ORDER BY 1, 2, 3").fetchall(),
+        conn.execute("SELECT hour, project_name, errors FROM error_rollups").fetchall(),
+    )
+
+
+@pytest.fixture
+def connect(tmp_path):
+    opened = []
+
+    def connect(name):
+        conn = event_store.ensure_database(tmp_path / name)
+        opened.append(conn)
+        return conn
+
+    yield connect
+    for conn in opened:
+        conn.close()
+
+
+def test_tool_time_is_counted_per_hour_and_tool(connect):
+    conn = connect("events.db")
+    store(conn, EVENTS)
+
+    assert event_rollups.update_rollups(conn) == len(EVENTS)
+
+    _, tools, errors = rollups(conn)
+    assert tools == [
+        ("2026-10-01 09:00:00", "app", "Bash", 2, 4.0 + 3598.0, 3598.0),
+        ("2026-10-01 10:00:00", "app", "Read", 1, 2.0, 2.0),
+    ]
+    assert errors == [("2026-10-01 09:00:00", "app", 1)]
+
+
+def test_small_steps_and_resumed_runs_add_up_to_one_pass(connect):
+    whole = connect("whole.db")
+    store(whole, EVENTS)
+    event_rollups.update_rollups(whole)
+
+    pieces = connect("pieces.db")
+    store(pieces, EVENTS[:3])
+    event_rollups.update_rollups(pieces, step=2)
+    store(pieces, EVENTS[3:])
+    event_rollups.update_rollups(pieces, step=2)
+
+    assert rollups(pieces) == rollups(whole)
+    assert event_rollups.update_rollups(pieces) == 0
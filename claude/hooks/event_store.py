@@ -0,0 +1,873 @@
+"""Shared storage for the Claude Code event hooks and the tools that read them.
+
+capture-event.py turns each hook payload into one row of `claude_events` in
+~/.claude/events.db. It can write the row itself, or, in spool mode, append
+the payload to a spool directory and leave the SQLite write to a drainer
+(bin/claude-events-drain). Everything both paths need to agree on — the
+schema, the shape of a row, the spool format — lives here, so a payload
+drained a minute late lands exactly as a direct write would have put it.
+
+Standard library only: the hooks run on every tool call, under `uv run`, and
+a dependency would have to be resolved before each one.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import project_names
+
+DB_PATH = Path.home() / ".claude" / "events.db"
+SPOOL_DIR = Path.home() / ".claude" / "events-spool"
+
+# Hooks append to the pending file; the drainer renames it to a batch file
+# before reading, so nothing it reads is still being written.
+PENDING_NAME = "pending.jsonl"
+BATCH_GLOB = "batch-*.jsonl"
+REJECTED_NAME = "rejected.jsonl"
+DRAIN_LOCK_NAME = "drain.lock"
+METRICS_NAME = "metrics.json"
+CAPTURE_METRICS_NAME = "capture-metrics.json"
+
+# The `created_at` format SQLite's CURRENT_TIMESTAMP produces. The dashboard
+# parses exactly this, so a spooled event must carry its capture time in it.
+SQLITE_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# An age for --since/--until options: 90m, 6h, 7d.
+AGE = re.compile(r"^(\d+)([smhd])$")
+AGE_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+LOCK_RETRY_ATTEMPTS = 6
+LOCK_RETRY_BASE_DELAY_SECONDS = 0.05
+LOCK_RETRY_MAX_DELAY_SECONDS = 1.0
+
+WAL_SIZE_LIMIT_BYTES = 64 * 1024 * 1024
+
+EVENT_COLUMNS = (
+    "event_id",
+    "hook_type",
+    "session_id",
+    "project_name",
+    "project_dir",
+    "timestamp",
+    "tool_name",
+    "tool_input",
+    "tool_output",
+    "user_prompt",
+    "transcript_path",
+    "cwd",
+    "environment",
+    "full_event",
+    "status",
+    "agent_id",
+    "error_cluster",
+    "created_at",
+)
+
+# OR IGNORE rather than OR REPLACE: a drain or replay that runs twice must not
+# give an event a new `id`, because readers page through the table by id.
+# created_at is bound explicitly so a late write keeps the capture time.
+INSERT_EVENT_SQL = f"""
+    INSERT OR IGNORE INTO claude_events ({", ".join(EVENT_COLUMNS)})
+    VALUES ({", ".join("?" * (len(EVENT_COLUMNS) - 1))}, COALESCE(?, CURRENT_TIMESTAMP))
+"""
+
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS claude_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id TEXT UNIQUE NOT NULL,
+        hook_type TEXT NOT NULL,
+        session_id TEXT,
+        project_name TEXT,
+        project_dir TEXT,
+        timestamp TEXT,
+        tool_name TEXT,
+        tool_input TEXT,
+        tool_output TEXT,
+        user_prompt TEXT,
+        transcript_path TEXT,
+        cwd TEXT,
+        environment TEXT,
+        full_event TEXT NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Schema changes since the table above, keyed by the version they produce and
+# applied in order. The table is never recreated, so a fresh database and one
+# from before a change end up identical.
+MIGRATIONS = {
+    # Derived at ingest so the dashboard's stats can count statuses in SQL
+    # instead of decoding every row's tool_output. Rows stored before this
+    # have NULL, and readers derive it from tool_output as they always did.
+    1: (
+        "ALTER TABLE claude_events ADD COLUMN status TEXT",
+        # Replaced by the composite indexes below, whose first column still
+        # serves every lookup these did.
+        "DROP INDEX IF EXISTS idx_hook_type",
+        "DROP INDEX IF EXISTS idx_session_id",
+        "DROP INDEX IF EXISTS idx_project_name",
+    ),
+    # Per-session aggregates, filled in once a session has ended so comparing
+    # sessions does not mean re-aggregating their events (session_summaries.py).
+    # last_id is the session's newest event when the row was computed; a
+    # replay that adds older events to the session makes it stale.
+    2: (
+        """
+        CREATE TABLE IF NOT EXISTS session_summaries (
+            session_id TEXT PRIMARY KEY,
+            project_name TEXT,
+            started_at TEXT,
+            ended_at TEXT,
+            event_count INTEGER NOT NULL,
+            error_count INTEGER NOT NULL,
+            tool_seconds REAL NOT NULL,
+            type_counts TEXT NOT NULL,
+            tool_counts TEXT NOT NULL,
+            last_id INTEGER NOT NULL
+        )
+        """,
+    ),
+    # Subagents. Hooks that fire inside a subagent carry its agent_id, which
+    # ties its tool calls to it. The edge table links each subagent to the
+    # session that spawned it. A trigger fills it in from SubagentStart and
+    # SubagentStop, so every ingest path gets it: direct writes, the spool
+    # drainer and replay. The backfill reads only those two event types.
+    3: (
+        "ALTER TABLE claude_events ADD COLUMN agent_id TEXT",
+        """
+        CREATE TABLE IF NOT EXISTS agent_edges (
+            parent_session_id TEXT NOT NULL,
+            agent_id TEXT NOT NULL,
+            agent_type TEXT,
+            started_at TEXT,
+            stopped_at TEXT,
+            PRIMARY KEY (parent_session_id, agent_id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_agent_edges_agent ON agent_edges(agent_id)",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_agent_edges AFTER INSERT ON claude_events
+        WHEN NEW.hook_type IN ('SubagentStart', 'SubagentStop')
+            AND NEW.session_id IS NOT NULL
+            AND json_valid(NEW.full_event)
+            AND json_extract(NEW.full_event, '$.agent_id') IS NOT NULL
+        BEGIN
+            INSERT INTO agent_edges (parent_session_id, agent_id, agent_type, started_at, stopped_at)
+            VALUES (
+                NEW.session_id,
+                json_extract(NEW.full_event, '$.agent_id'),
+                json_extract(NEW.full_event, '$.agent_type'),
+                CASE NEW.hook_type WHEN 'SubagentStart' THEN NEW.created_at END,
+                CASE NEW.hook_type WHEN 'SubagentStop' THEN NEW.created_at END
+            )
+            ON CONFLICT (parent_session_id, agent_id) DO UPDATE SET
+                agent_type = COALESCE(agent_type, excluded.agent_type),
+                started_at = COALESCE(started_at, excluded.started_at),
+                stopped_at = COALESCE(excluded.stopped_at, stopped_at);
+        END
+        """,
+        """
+        INSERT OR IGNORE INTO agent_edges (parent_session_id, agent_id, agent_type, started_at, stopped_at)
+        SELECT session_id,
+               json_extract(full_event, '$.agent_id'),
+               MAX(json_extract(full_event, '$.agent_type')),
+               MIN(CASE hook_type WHEN 'SubagentStart' THEN created_at END),
+               MAX(CASE hook_type WHEN 'SubagentStop' THEN created_at END)
+        FROM claude_events
+        WHERE hook_type IN ('SubagentStart', 'SubagentStop')
+          AND session_id IS NOT NULL
+          AND json_valid(full_event)
+          AND json_extract(full_event, '$.agent_id') IS NOT NULL
+        GROUP BY 1, 2
+        """,
+    ),
+    # A fingerprint of each error's normalized text, so the hundred rows of
+    # an agent retrying the same failing call group under one cluster ID.
+    # Rows stored before this have NULL.
+    4: ("ALTER TABLE claude_events ADD COLUMN error_cluster TEXT",),
+    # Token usage, read from the transcripts the events point at (see
+    # transcript_usage.py). One row per API message; triggers keep the
+    # per-session and per-project-day rollups in step, including when a
+    # message is re-read with larger counts. Unknown project or model is ''
+    # since they are part of the rollup keys.
+    5: (
+        """
+        CREATE TABLE IF NOT EXISTS transcript_offsets (
+            transcript_path TEXT PRIMARY KEY,
+            session_id TEXT,
+            project_name TEXT,
+            inode INTEGER,
+            offset INTEGER NOT NULL DEFAULT 0,
+            indexed_at TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS token_usage (
+            message_id TEXT PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            project_name TEXT NOT NULL,
+            model TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            input_tokens INTEGER NOT NULL,
+            output_tokens INTEGER NOT NULL,
+            cache_creation_tokens INTEGER NOT NULL,
+            cache_read_tokens INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+        # Burn rate over a recent window reads only this index.
+        "CREATE INDEX IF NOT EXISTS idx_token_usage_created ON token_usage("
+        "created_at, project_name, input_tokens, output_tokens, cache_creation_tokens)",
+        """
+        CREATE TABLE IF NOT EXISTS session_usage (
+            session_id TEXT NOT NULL,
+            model TEXT NOT NULL,
+            project_name TEXT NOT NULL,
+            messages INTEGER NOT NULL,
+            input_tokens INTEGER NOT NULL,
+            output_tokens INTEGER NOT NULL,
+            cache_creation_tokens INTEGER NOT NULL,
+            cache_read_tokens INTEGER NOT NULL,
+            first_at TEXT,
+            last_at TEXT,
+            PRIMARY KEY (session_id, model)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS project_usage (
+            project_name TEXT NOT NULL,
+            day TEXT NOT NULL,
+            model TEXT NOT NULL,
+            messages INTEGER NOT NULL,
+            input_tokens INTEGER NOT NULL,
+            output_tokens INTEGER NOT NULL,
+            cache_creation_tokens INTEGER NOT NULL,
+            cache_read_tokens INTEGER NOT NULL,
+            PRIMARY KEY (project_name, day, model)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_token_usage_insert AFTER INSERT ON token_usage
+        BEGIN
+            INSERT INTO session_usage VALUES (
+                NEW.session_id, NEW.model, NEW.project_name, 1,
+                NEW.input_tokens, NEW.output_tokens,
+                NEW.cache_creation_tokens, NEW.cache_read_tokens,
+                NEW.created_at, NEW.created_at
+            )
+            ON CONFLICT (session_id, model) DO UPDATE SET
+                messages = messages + 1,
+                input_tokens = input_tokens + excluded.input_tokens,
+                output_tokens = output_tokens + excluded.output_tokens,
+                cache_creation_tokens = cache_creation_tokens + excluded.cache_creation_tokens,
+                cache_read_tokens = cache_read_tokens + excluded.cache_read_tokens,
+                first_at = MIN(first_at, excluded.first_at),
+                last_at = MAX(last_at, excluded.last_at);
+            INSERT INTO project_usage VALUES (
+                NEW.project_name, substr(NEW.created_at, 1, 10), NEW.model, 1,
+                NEW.input_tokens, NEW.output_tokens,
+                NEW.cache_creation_tokens, NEW.cache_read_tokens
+            )
+            ON CONFLICT (project_name, day, model) DO UPDATE SET
+                messages = messages + 1,
+                input_tokens = input_tokens + excluded.input_tokens,
+                output_tokens = output_tokens + excluded.output_tokens,
+                cache_creation_tokens = cache_creation_tokens + excluded.cache_creation_tokens,
+                cache_read_tokens = cache_read_tokens + excluded.cache_read_tokens;
+        END
+        """,
+        # Usage is only ever re-read with the same or larger counts, and the
+        # session, model and day do not change, so the rollup rows exist.
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_token_usage_update AFTER UPDATE ON token_usage
+        BEGIN
+            UPDATE session_usage SET
+                input_tokens = input_tokens + NEW.input_tokens - OLD.input_tokens,
+                output_tokens = output_tokens + NEW.output_tokens - OLD.output_tokens,
+                cache_creation_tokens = cache_creation_tokens + NEW.cache_creation_tokens - OLD.cache_creation_tokens,
+                cache_read_tokens = cache_read_tokens + NEW.cache_read_tokens - OLD.cache_read_tokens
+            WHERE session_id = OLD.session_id AND model = OLD.model;
+            UPDATE project_usage SET
+                input_tokens = input_tokens + NEW.input_tokens - OLD.input_tokens,
+                output_tokens = output_tokens + NEW.output_tokens - OLD.output_tokens,
+                cache_creation_tokens = cache_creation_tokens + NEW.cache_creation_tokens - OLD.cache_creation_tokens,
+                cache_read_tokens = cache_read_tokens + NEW.cache_read_tokens - OLD.cache_read_tokens
+            WHERE project_name = OLD.project_name AND day = substr(OLD.created_at, 1, 10)
+              AND model = OLD.model;
+        END
+        """,
+        # Progress of the background jobs that read the events table, so a
+        # restart carries on where the last run stopped.
+        """
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            name TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            updated_at TEXT
+        )
+        """,
+    ),
+    # Hourly rollups of the events, for reports over long windows that
+    # should not read the events themselves (see event_rollups.py). Kept
+    # up to date by id, from a checkpoint, rather than by a trigger, so the
+    # first build on a large database is not paid for inside a hook. Unknown
+    # project, tool or status is '' since they are part of the keys.
+    6: (
+        """
+        CREATE TABLE IF NOT EXISTS event_rollups (
+            hour TEXT NOT NULL,
+            project_name TEXT NOT NULL,
+            hook_type TEXT NOT NULL,
+            tool_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            events INTEGER NOT NULL,
+            PRIMARY KEY (hour, project_name, hook_type, tool_name, status)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tool_rollups (
+            hour TEXT NOT NULL,
+            project_name TEXT NOT NULL,
+            tool_name TEXT NOT NULL,
+            calls INTEGER NOT NULL,
+            seconds REAL NOT NULL,
+            max_seconds REAL NOT NULL,
+            PRIMARY KEY (hour, project_name, tool_name)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS error_rollups (
+            hour TEXT NOT NULL,
+            error_cluster TEXT NOT NULL,
+            project_name TEXT NOT NULL,
+            errors INTEGER NOT NULL,
+            last_id INTEGER NOT NULL,
+            PRIMARY KEY (hour, error_cluster, project_name)
+        ) WITHOUT ROWID
+        """,
+    ),
+}
+SCHEMA_VERSION = max(MIGRATIONS)
+
+INDEXES = (
+    # A type filter's status count reads only this index.
+    "CREATE INDEX IF NOT EXISTS idx_hook_status ON claude_events(hook_type, status)",
+    "CREATE INDEX IF NOT EXISTS idx_tool_name ON claude_events(tool_name)",
+    # Session and project filters list newest first; with created_at in the
+    # index the list comes out in order instead of being sorted per refresh.
+    # Projects hold most of the table, so status rides along for their
+    # status counts too.
+    "CREATE INDEX IF NOT EXISTS idx_session_created ON claude_events(session_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_project_created ON claude_events(project_name, created_at, status)",
+    "CREATE INDEX IF NOT EXISTS idx_timestamp ON claude_events(timestamp)",
+    # The dashboard orders by created_at and polls MAX(created_at); without
+    # this both sort or scan the whole table.
+    "CREATE INDEX IF NOT EXISTS idx_created_at ON claude_events(created_at)",
+    # Lets an unfiltered status count read this index instead of the table,
+    # whose status column sits behind every row's payload.
+    "CREATE INDEX IF NOT EXISTS idx_status ON claude_events(status)",
+    # Per-subagent tool counts. Partial, since most events are not from one.
+    "CREATE INDEX IF NOT EXISTS idx_session_agent ON claude_events(session_id, agent_id) "
+    "WHERE agent_id IS NOT NULL",
+    # Cluster counts, first and last seen, and affected sessions all come
+    # from this index alone, and it holds only the error rows.
+    "CREATE INDEX IF NOT EXISTS idx_error_cluster ON claude_events(error_cluster, created_at, session_id) "
+    "WHERE error_cluster IS NOT NULL",
+)
+
+# Replaced in order, so a URL is not half-eaten as a path, nor a UUID as
+# numbers. What is left is the shape of the message, which is what repeats.
+ERROR_NOISE = (
+    (re.compile(r"https?://\S+"), "<url>"),
+    (
+        re.compile(
+            r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+        ),
+        "<uuid>",
+    ),
+    (re.compile(r"(?:~|\.{1,2})?(?:/[^\s/:'\"(),]+)+/?"), "<path>"),
+    (re.compile(r"\b(?=[0-9a-fA-F]*\d)[0-9a-fA-F]{7,}\b"), "<hex>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+    (re.compile(r"\s+"), " "),
+)
+ERROR_SIGNATURE_LENGTH = 500
+
+
+def get_claude_env_vars():
+    """Get all environment variables starting with CLAUDE_."""
+    return {k: v for k, v in os.environ.items() if k.startswith("CLAUDE_")}
+
+
+def ensure_database(db_path, timeout=5.0):
+    """Open the database, creating or upgrading the schema if needed.
+
+    Every hook call opens the database, so a current schema costs one PRAGMA
+    read. An upgrade runs under BEGIN IMMEDIATE, so two hooks arriving at
+    once cannot both add the same column.
+    """
+    db_dir = db_path.parent
+    db_dir.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(str(db_path), timeout=timeout)
+    conn.execute("PRAGMA journal_mode=WAL")  # Enable WAL for better concurrency
+    # Once a checkpoint has copied the whole log back, the next writer to
+    # start it over cuts the file down to this, rather than leaving it at
+    # its largest (see event_maintenance.py).
+    conn.execute(f"PRAGMA journal_size_limit = {WAL_SIZE_LIMIT_BYTES}")
+
+    if schema_version(conn) == SCHEMA_VERSION:
+        return conn
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(CREATE_TABLE_SQL)
+        for version in range(schema_version(conn) + 1, SCHEMA_VERSION + 1):
+            for statement in MIGRATIONS[version]:
+                conn.execute(statement)
+        for index in INDEXES:
+            conn.execute(index)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        conn.close()
+        raise
+    return conn
+
+
+def schema_version(conn):
+    """The migration the database was last upgraded to."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def begin_bulk_load(conn):
+    """Trade durability for speed while loading a file nobody else has open."""
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-262144")  # 256 MiB
+    conn.execute("PRAGMA temp_store=MEMORY")
+    for index in INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {index_name(index)}")
+
+
+def end_bulk_load(conn):
+    """Rebuild the indexes and return the file to the hooks' WAL settings."""
+    for index in INDEXES:
+        conn.execute(index)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("ANALYZE")
+
+
+def index_name(create_statement):
+    """The index name in a CREATE INDEX IF NOT EXISTS <name> ON ... statement."""
+    return create_statement.split(" ON ")[0].split()[-1]
+
+
+def parse_when(value, now=None):
+    """A UTC date or time, or an age like 6h or 7d, as a stored timestamp.
+
+    Raises ValueError for anything else.
+    """
+    now = now or datetime.now(timezone.utc)
+    if match := AGE.match(value):
+        moment = now - timedelta(**{AGE_UNITS[match[2]]: int(match[1])})
+    else:
+        try:
+            moment = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"not a date, time or age: {value!r}") from None
+        if moment.tzinfo:
+            moment = moment.astimezone(timezone.utc)
+    return moment.strftime(SQLITE_TIMESTAMP_FORMAT)
+
+
+def generate_event_id(session_id, timestamp, hook_type):
+    """Generate a unique event ID."""
+    # Use session_id, timestamp, and hook_type to create unique ID
+    components = [
+        session_id or "no-session",
+        timestamp or datetime.now(timezone.utc).isoformat(),
+        hook_type or "unknown",
+    ]
+    return "-".join(str(c).replace(" ", "_") for c in components)
+
+
+def capture_context(event_data, now=None):
+    """Record what only the hook process knows about an event.
+
+    The drainer runs later, in a process with none of the hook's environment,
+    so the project directory, the CLAUDE_ variables, the event ID and the
+    capture time all have to travel with the payload.
+    """
+    now = now or datetime.now(timezone.utc)
+    hook_type = event_data.get("hook_event_name", "unknown")
+    return {
+        "event_id": generate_event_id(
+            event_data.get("session_id"),
+            event_data.get("timestamp") or now.isoformat(),
+            hook_type,
+        ),
+        "project_dir": os.environ.get("CLAUDE_PROJECT_DIR", event_data.get("cwd")),
+        "environment": get_claude_env_vars(),
+        "created_at": now.strftime(SQLITE_TIMESTAMP_FORMAT),
+    }
+
+
+def derive_status(hook_type, tool_output):
+    """Classify an event as "success", "error" or "warning".
+
+    The dashboard's original rule, read from tool_output, plus the one case
+    where the hook type alone says it: PostToolUseFailure only fires when a
+    tool call failed.
+    """
+    if hook_type == "PostToolUseFailure":
+        return "error"
+    if isinstance(tool_output, dict):
+        if tool_output.get("error") or tool_output.get("exit_code", 0) != 0:
+            return "error"
+        if tool_output.get("warning"):
+            return "warning"
+    return "success"
+
+
+def error_text(event_data, tool_output):
+    """The message of a failed tool call, wherever the payload put it."""
+    message = event_data.get("error")
+    if not message and isinstance(tool_output, dict):
+        message = tool_output.get("error") or tool_output.get("stderr")
+    return str(message) if message else None
+
+
+def normalize_error(text):
+    """`text` with paths, numbers, hashes and IDs replaced by placeholders."""
+    for pattern, placeholder in ERROR_NOISE:
+        text = pattern.sub(placeholder, text)
+    return text.strip()[:ERROR_SIGNATURE_LENGTH]
+
+
+def error_cluster(tool_name, text):
+    """The cluster ID for an error: a hash of its tool and normalized text."""
+    signature = f"{tool_name or ''}\0{normalize_error(text)}"
+    return hashlib.sha1(signature.encode()).hexdigest()[:16]
+
+
+# The columns computed from a payload rather than copied out of it, in the
+# order derive_columns gives them; event_reindex.py recomputes these.
+DERIVED_COLUMNS = ("project_name", "status", "agent_id", "error_cluster")
+
+
+def derive_columns(event_data, project_dir, project_name=None):
+    """The DERIVED_COLUMNS of a payload captured in `project_dir`.
+
+    The project is named by project_names.py unless `project_name` is given.
+    """
+    hook_type = event_data.get("hook_event_name", "unknown")
+    tool_output = event_data.get("tool_output")
+    status = derive_status(hook_type, tool_output)
+    message = error_text(event_data, tool_output) if status == "error" else None
+    return (
+        project_name or project_names.project_name(project_dir, event_data.get("cwd")),
+        status,
+        event_data.get("agent_id"),
+        error_cluster(event_data.get("tool_name"), message) if message else None,
+    )
+
+
+def build_row(event_data, context):
+    """Turn a hook payload and its capture context into a `claude_events` row.
+
+    A context that already knows the project's name, as a synthetic fixture
+    does, can carry it as `project_name`; the directory is then not looked up.
+    """
+    project_dir = context.get("project_dir")
+    tool_input = event_data.get("tool_input")
+    tool_output = event_data.get("tool_output")
+    project_name, status, agent_id, cluster = derive_columns(
+        event_data, project_dir, context.get("project_name")
+    )
+
+    return (
+        context["event_id"],
+        event_data.get("hook_event_name", "unknown"),
+        event_data.get("session_id"),
+        project_name,
+        project_dir,
+        event_data.get("timestamp"),
+        event_data.get("tool_name"),
+        json.dumps(tool_input) if tool_input else None,
+        json.dumps(tool_output) if tool_output else None,
+        event_data.get("prompt"),
+        event_data.get("transcript_path"),
+        event_data.get("cwd"),
+        json.dumps(context.get("environment") or {}),
+        json.dumps(event_data),
+        status,
+        agent_id,
+        cluster,
+        context.get("created_at"),
+    )
+
+
+def insert_rows(conn, rows):
+    """Insert rows built by `build_row` in one transaction."""
+    with conn:
+        conn.executemany(INSERT_EVENT_SQL, rows)
+
+
+def is_lock_error(error):
+    """True for the SQLite errors that mean another connection holds the lock."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and (
+        "locked" in message or "busy" in message
+    )
+
+
+def retry_when_locked(
+    operation,
+    attempts=LOCK_RETRY_ATTEMPTS,
+    base_delay=LOCK_RETRY_BASE_DELAY_SECONDS,
+    sleep=time.sleep,
+    on_retry=None,
+    deadline=None,
+):
+    """Run `operation`, retrying with exponential backoff while the DB is locked.
+
+    Each wait is between half and all of its doubling delay, capped at
+    LOCK_RETRY_MAX_DELAY_SECONDS, so writers that collided once do not all
+    come back at the same moment to collide again. `on_retry` is called with
+    each lock error that is retried. No wait runs past `deadline`, a
+    time.monotonic() value. Any other error, and the lock error from the
+    final attempt, propagates.
+    """
+    for attempt in range(attempts):
+        try:
+            return operation()
+        except sqlite3.OperationalError as error:
+            if not is_lock_error(error) or attempt == attempts - 1:
+                raise
+            delay = min(base_delay * (2**attempt), LOCK_RETRY_MAX_DELAY_SECONDS)
+            wait = delay / 2 + random.uniform(0, delay / 2)
+            if deadline is not None and time.monotonic() + wait >= deadline:
+                raise
+            if on_retry:
+                on_retry(error)
+            sleep(wait)
+
+
+def read_checkpoint(conn, name, default=None):
+    """A background job's saved progress, decoded, or `default`."""
+    row = conn.execute(
+        "SELECT value FROM checkpoints WHERE name = ?", (name,)
+    ).fetchone()
+    return json.loads(row[0]) if row else default
+
+
+def write_checkpoint(conn, name, value):
+    """Save a job's progress; commits with the caller's transaction."""
+    conn.execute(
+        "INSERT INTO checkpoints (name, value, updated_at) VALUES (?, ?, ?) "
+        "ON CONFLICT (name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+        (
+            name,
+            json.dumps(value),
+            datetime.now(timezone.utc).strftime(SQLITE_TIMESTAMP_FORMAT),
+        ),
+    )
+
+
+# --- spool -----------------------------------------------------------------
+
+
+def spool_event(event_data, context, spool_dir=SPOOL_DIR):
+    """Append one payload to the spool with a single O_APPEND write.
+
+    Writers share the pending file under LOCK_SH, so concurrent hooks never
+    wait on each other; O_APPEND keeps their lines whole. The drainer takes
+    LOCK_EX to rename the file, which waits for in-flight writes to finish.
+    A writer that opened the file just before that rename finds, once it holds
+    its lock, that the path now names a different file, and reopens.
+
+    There is no fsync. Once write() returns the event survives the hook
+    exiting, which is what the spool is for; a power cut can still lose the
+    last few events, and that risk is not worth a disk flush per tool call.
+    """
+    record = {"event": event_data, "context": context}
+    line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    path = spool_dir / PENDING_NAME
+
+    while True:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            if _is_current(fd, path):
+                os.write(fd, line)
+                return
+        finally:
+            os.close(fd)
+
+
+def _is_current(fd, path):
+    """True if `path` still names the file open on `fd`."""
+    try:
+        return os.stat(path).st_ino == os.fstat(fd).st_ino
+    except FileNotFoundError:
+        return False
+
+
+def seal_pending(spool_dir=SPOOL_DIR):
+    """Rename the pending file to a batch file, or return None if it is empty."""
+    path = spool_dir / PENDING_NAME
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        if not _is_current(fd, path) or os.fstat(fd).st_size == 0:
+            return None
+        sealed = spool_dir / f"batch-{time.time_ns()}.jsonl"
+        os.rename(path, sealed)
+        return sealed
+    finally:
+        os.close(fd)
+
+
+def read_batch(batch_path):
+    """Yield (row, None) for each spooled record, or (None, line) if unreadable.
+
+    A hook killed mid-write leaves a truncated last line. It cannot be
+    repaired, but it is handed back so the drainer can set it aside rather
+    than drop it unseen.
+    """
+    with open(batch_path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                yield build_row(record["event"], record["context"]), None
+            except (ValueError, KeyError, TypeError, AttributeError):
+                yield None, line
+
+
+def drain_spool(conn, spool_dir=SPOOL_DIR, batch_size=500, sleep=time.sleep):
+    """Move every spooled event into the database; return (drained, rejected).
+
+    A batch file is removed only after all of its rows are committed. If a
+    drain dies part way through, the next one replays the file from the start,
+    and INSERT OR IGNORE on the unique event_id makes that harmless.
+    """
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    lock_fd = os.open(spool_dir / DRAIN_LOCK_NAME, os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Another drainer is already running; it will pick these up.
+            return 0, 0
+
+        seal_pending(spool_dir)
+        drained = rejected = 0
+
+        for batch_path in sorted(spool_dir.glob(BATCH_GLOB)):
+            rows = []
+            for row, bad_line in read_batch(batch_path):
+                if bad_line is not None:
+                    _reject(spool_dir, bad_line)
+                    rejected += 1
+                    continue
+                rows.append(row)
+                if len(rows) >= batch_size:
+                    retry_when_locked(lambda: insert_rows(conn, rows), sleep=sleep)
+                    drained += len(rows)
+                    rows = []
+            if rows:
+                retry_when_locked(lambda: insert_rows(conn, rows), sleep=sleep)
+                drained += len(rows)
+            batch_path.unlink()
+
+        return drained, rejected
+    finally:
+        os.close(lock_fd)
+
+
+def _reject(spool_dir, line):
+    """Keep an unreadable spool line for inspection instead of discarding it."""
+    with open(spool_dir / REJECTED_NAME, "ab") as f:
+        f.write(line if line.endswith(b"\n") else line + b"\n")
+
+
+def spool_depth(spool_dir=SPOOL_DIR):
+    """Count the events and bytes still waiting to be drained."""
+    paths = [spool_dir / PENDING_NAME, *sorted(spool_dir.glob(BATCH_GLOB))]
+    events = size = files = 0
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                for _ in f:
+                    events += 1
+            size += path.stat().st_size
+            files += 1
+        except FileNotFoundError:
+            continue
+    return {"events": events, "bytes": size, "files": files}
+
+
+def write_metrics(metrics, spool_dir=SPOOL_DIR):
+    """Publish drain metrics where other tools can read them without locking."""
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    path = spool_dir / METRICS_NAME
+    temporary = path.with_name(path.name + ".new")
+    temporary.write_text(json.dumps(metrics, indent=2))
+    os.replace(temporary, path)
+
+
+def read_metrics(spool_dir=SPOOL_DIR):
+    """Read the last published drain metrics, or an empty dict."""
+    try:
+        return json.loads((spool_dir / METRICS_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def count_capture(counts, error=None, spool_dir=SPOOL_DIR):
+    """Add to the capture hook's running counts of retries and fallbacks.
+
+    Hooks run concurrently, so the file is read and rewritten under a lock;
+    only an event that was retried or fell back pays for it.
+    """
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    path = spool_dir / CAPTURE_METRICS_NAME
+    with open(path.with_name(path.name + ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        metrics = read_capture_metrics(spool_dir)
+        for name, n in counts.items():
+            metrics[name] = metrics.get(name, 0) + n
+        if error is not None:
+            metrics["last_error"] = str(error)
+            metrics["last_error_at"] = datetime.now(timezone.utc).strftime(
+                SQLITE_TIMESTAMP_FORMAT
+            )
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.new")
+        temporary.write_text(json.dumps(metrics, indent=2))
+        os.replace(temporary, path)
+
+
+def read_capture_metrics(spool_dir=SPOOL_DIR):
+    """The capture hook's counts of retried, spooled and lost events, or {}."""
+    try:
+        metrics = json.loads((spool_dir / CAPTURE_METRICS_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+    return metrics if isinstance(metrics, dict) else {}
@@ -0,0 +1,282 @@
+"""Tests for the event store shared by capture-event.py and its drainer.
+
+The spool exists so a hook can hand off an event and exit. These tests check
+the two promises that makes: a spooled event reaches the database as the same
+row a direct write would produce, and no event is lost or doubled by the
+hand-off itself.
+
+Run with: uv run --with pytest pytest claude/hooks/event_store_test.py
+"""
+
+import importlib.util
+import sqlite3
+import time
+from datetime import datetime, timezone
+from importlib.machinery import SourceFileLoader
+from pathlib import Path
+
+import pytest
+
+MODULE = Path(__file__).parent / "event_store.py"
+_spec = importlib.util.spec_from_file_location(
+    "event_store", MODULE, loader=SourceFileLoader("event_store", str(MODULE))
+)
+event_store = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(event_store)
+
+CAPTURED_AT = datetime(2026, 10, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def payload(hook="PostToolUse", session="s1", **fields):
+    """A hook payload shaped like the one Claude Code writes to stdin."""
+    return {"hook_event_name": hook, "session_id": session, "cwd": "/tmp/app", **fields}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = event_store.ensure_database(tmp_path / "events.db")
+    yield connection
+    connection.close()
+
+
+def rows(conn):
+    return conn.execute(
+        "SELECT event_id, hook_type, project_name, created_at FROM claude_events ORDER BY id"
+    ).fetchall()
+
+
+def test_a_spooled_event_lands_as_the_row_a_direct_write_would_make(tmp_path, conn):
+    event = payload(tool_name="Bash", tool_output={"stdout": "ok"})
+    context = event_store.capture_context(event, now=CAPTURED_AT)
+
+    event_store.spool_event(event, context, tmp_path / "spool")
+    event_store.drain_spool(conn, tmp_path / "spool")
+
+    expected = event_store.build_row(event, context)
+    stored = conn.execute(
+        f"SELECT {', '.join(event_store.EVENT_COLUMNS)} FROM claude_events"
+    ).fetchone()
+    assert stored == expected
+
+
+def test_a_spooled_event_keeps_its_capture_time_not_its_drain_time(tmp_path, conn):
+    event = payload()
+    event_store.spool_event(
+        event, event_store.capture_context(event, now=CAPTURED_AT), tmp_path
+    )
+
+    event_store.drain_spool(conn, tmp_path)
+
+    assert rows(conn)[0][3] == "2026-10-01 12:00:00"
+
+
+def test_draining_twice_does_not_duplicate_or_renumber_events(tmp_path, conn):
+    """A drain that dies after committing but before unlinking is replayed."""
+    event = payload()
+    context = event_store.capture_context(event, now=CAPTURED_AT)
+    event_store.spool_event(event, context, tmp_path)
+    event_store.drain_spool(conn, tmp_path)
+    first_id = conn.execute("SELECT id FROM claude_events").fetchone()[0]
+
+    event_store.spool_event(event, context, tmp_path)
+    event_store.drain_spool(conn, tmp_path)
+
+    assert conn.execute("SELECT id FROM claude_events").fetchall() == [(first_id,)]
+
+
+def test_a_truncated_line_is_set_aside_and_the_rest_are_drained(tmp_path, conn):
+    event_store.spool_event(
+        payload(session="a"),
+        event_store.capture_context(payload(session="a")),
+        tmp_path,
+    )
+    with open(tmp_path / event_store.PENDING_NAME, "ab") as f:
+        f.write(b'{"event": {"hook_event_na')
+
+    drained, rejected = event_store.drain_spool(conn, tmp_path)
+
+    assert (drained, rejected) == (1, 1)
+    assert (tmp_path / event_store.REJECTED_NAME).read_bytes().startswith(b'{"event"')
+
+
+def test_a_write_after_sealing_goes_to_a_fresh_pending_file(tmp_path):
+    event_store.spool_event(payload(), event_store.capture_context(payload()), tmp_path)
+    sealed = event_store.seal_pending(tmp_path)
+
+    event_store.spool_event(payload(), event_store.capture_context(payload()), tmp_path)
+
+    assert len(sealed.read_bytes().splitlines()) == 1
+    assert (tmp_path / event_store.PENDING_NAME).exists()
+
+
+def test_spool_depth_counts_pending_and_sealed_events(tmp_path):
+    for _ in range(2):
+        event_store.spool_event(
+            payload(), event_store.capture_context(payload()), tmp_path
+        )
+    event_store.seal_pending(tmp_path)
+    event_store.spool_event(payload(), event_store.capture_context(payload()), tmp_path)
+
+    depth = event_store.spool_depth(tmp_path)
+
+    assert (depth["events"], depth["files"]) == (3, 2)
+
+
+def test_a_locked_database_is_retried_until_it_frees_up():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        return "stored"
+
+    assert event_store.retry_when_locked(flaky, sleep=lambda _: None) == "stored"
+    assert len(attempts) == 3
+
+
+def test_errors_other_than_locking_are_not_retried():
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise sqlite3.OperationalError("no such table: claude_events")
+
+    with pytest.raises(sqlite3.OperationalError):
+        event_store.retry_when_locked(broken, sleep=lambda _: None)
+    assert len(attempts) == 1
+
+
+def test_a_context_that_names_the_project_skips_the_lookup(monkeypatch):
+    def lookup(*args):
+        raise AssertionError("project looked up")
+
+    monkeypatch.setattr(event_store.project_names, "project_name", lookup)
+    context = {**event_store.capture_context(payload()), "project_name": "fixture"}
+
+    assert event_store.build_row(payload(), context)[3] == "fixture"
+
+
+def test_the_waits_between_retries_are_jittered_and_capped():
+    waits, retried = [], []
+
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    with pytest.raises(sqlite3.OperationalError):
+        event_store.retry_when_locked(
+            locked, attempts=10, sleep=waits.append, on_retry=retried.append
+        )
+
+    assert len(waits) == len(retried) == 9
+    for attempt, wait in enumerate(waits):
+        delay = min(
+            event_store.LOCK_RETRY_BASE_DELAY_SECONDS * 2**attempt,
+            event_store.LOCK_RETRY_MAX_DELAY_SECONDS,
+        )
+        assert delay / 2 <= wait <= delay
+
+
+def test_no_wait_runs_past_the_deadline():
+    retried = []
+
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    started = time.monotonic()
+    with pytest.raises(sqlite3.OperationalError):
+        event_store.retry_when_locked(
+            locked, attempts=10, on_retry=retried.append, deadline=started + 0.3
+        )
+
+    assert retried and time.monotonic() - started < 0.3
+
+
+def test_capture_counts_add_up_and_keep_the_last_error(tmp_path):
+    event_store.count_capture({"retries": 2}, spool_dir=tmp_path)
+    event_store.count_capture(
+        {"retries": 5, "spooled": 1}, "database is locked", tmp_path
+    )
+
+    metrics = event_store.read_capture_metrics(tmp_path)
+    assert (metrics["retries"], metrics["spooled"], metrics["last_error"]) == (
+        7,
+        1,
+        "database is locked",
+    )
+
+
+def test_metrics_round_trip(tmp_path):
+    event_store.write_metrics({"drained": 3}, tmp_path)
+
+    assert event_store.read_metrics(tmp_path) == {"drained": 3}
+
+
+def test_a_database_from_before_the_status_column_is_upgraded_in_place(tmp_path):
+    """Old rows keep NULL status, which readers derive; new rows get it stored."""
+    db = tmp_path / "events.db"
+    with sqlite3.connect(db) as old:
+        old.execute(event_store.CREATE_TABLE_SQL)
+        old.execute("CREATE INDEX idx_session_id ON claude_events(session_id)")
+        old.execute(
+            "INSERT INTO claude_events (event_id, hook_type, full_event) VALUES ('old', 'Stop', '{}')"
+        )
+
+    conn = event_store.ensure_database(db)
+    event = payload(hook="PostToolUseFailure", tool_name="Bash")
+    event_store.insert_rows(
+        conn, [event_store.build_row(event, event_store.capture_context(event))]
+    )
+
+    statuses = conn.execute(
+        "SELECT event_id, status FROM claude_events ORDER BY id"
+    ).fetchall()
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(claude_events)")}
+    assert event_store.schema_version(conn) == event_store.SCHEMA_VERSION
+    assert statuses[0] == ("old", None) and statuses[1][1] == "error"
+    assert "idx_session_id" not in indexes and "idx_session_created" in indexes
+    conn.close()
+
+
+def test_subagent_start_and_stop_become_one_edge_from_the_parent_session(conn):
+    agent = {"agent_id": "agent-1", "agent_type": "Explore"}
+    for hook, second in (("SubagentStart", "00"), ("SubagentStop", "09")):
+        event = payload(hook=hook, **agent)
+        context = event_store.capture_context(
+            event, now=CAPTURED_AT.replace(second=int(second))
+        )
+        event_store.insert_rows(conn, [event_store.build_row(event, context)])
+
+    edges = conn.execute("SELECT * FROM agent_edges").fetchall()
+
+    assert edges == [
+        ("s1", "agent-1", "Explore", "2026-10-01 12:00:00", "2026-10-01 12:00:09")
+    ]
+
+
+def test_errors_differing_only_in_paths_numbers_and_hashes_share_a_cluster(conn):
+    texts = [
+        'File "/Users/dev/app/lib/x.py", line 42\nNameError: commit a1b2c3d4e5 missing',
+        'File "/home/ci/app/src/y.py", line 397\nNameError: commit 0f9e8d7c6b missing',
+        'File "/home/ci/app/src/y.py", line 397\nKeyError: commit 0f9e8d7c6b missing',
+    ]
+    for text in texts:
+        event = payload(hook="PostToolUseFailure", tool_name="Bash", error=text)
+        event_store.insert_rows(
+            conn, [event_store.build_row(event, event_store.capture_context(event))]
+        )
+    event = payload(tool_name="Bash", tool_output={"stdout": "ok"})
+    event_store.insert_rows(
+        conn, [event_store.build_row(event, event_store.capture_context(event))]
+    )
+
+    clusters = [
+        row[0]
+        for row in conn.execute("SELECT error_cluster FROM claude_events ORDER BY id")
+    ]
+
+    assert clusters[0] == clusters[1] != clusters[2]
+    assert clusters[3] is None
+    assert event_store.normalize_error(texts[0]) == (
+        'File "<path>", line <n> NameError: commit <hex> missing'
+    )
@@ -8,6 +8,8 @@
 
 Reads the hook event JSON from stdin, enriches it with metadata,
 and appends a single JSON line to ~/.claude/events-log/events-YYYY-MM-DD.jsonl.
+capture_policy.POLICIES decides how much of the event is kept, as it does
+for capture-event.py.
 
 Supports all 12 hook event types:
   SessionStart, UserPromptSubmit, PreToolUse, PermissionRequest,
@@ -22,17 +24,11 @@ import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
-LOG_DIR = Path.home() / ".claude" / "events-log"
-
+import capture_policy
+import project_names
 
-def extract_project_name(project_dir=None, cwd=None):
-    """Extract project name from directory path."""
-    path = project_dir or cwd or os.getcwd()
-    if path == os.path.expanduser("~"):
-        return "home"
-    if path == "/":
-        return "root"
-    return os.path.basename(os.path.normpath(path))
+LOG_DIR = Path.home() / ".claude" / "events-log"
+WRITER = "events-log"
 
 
 def enrich_event(event_data, now):
@@ -41,7 +37,7 @@ def enrich_event(event_data, now):
     claude_env = {k: v for k, v in os.environ.items() if k.startswith("CLAUDE_")}
 
     event_data["logged_at"] = now.isoformat()
-    event_data["project_name"] = extract_project_name(
+    event_data["project_name"] = project_names.project_name(
         project_dir, event_data.get("cwd")
     )
     event_data["claude_env"] = claude_env
@@ -70,6 +66,9 @@ def main():
         sys.exit(0)
 
     try:
+        input_data = capture_policy.capture(WRITER, input_data)
+        if input_data is None:
+            sys.exit(0)
         now = datetime.now(timezone.utc)
         enriched = enrich_event(input_data, now)
         append_event(enriched, now)
@@ -0,0 +1,188 @@
+"""The project a directory belongs to, named once and remembered.
+
+The event hooks and the herdr notification used to name a project after the
+last component of its directory. Two checkouts called `api` then share a
+name, a subdirectory is a project of its own, and a worktrunk worktree
+(`<repo>.worktrees/<branch>`) is named after its branch. This names the
+repository instead: its main checkout, found through git, so every worktree
+and subdirectory of it has the same name.
+
+Asking git costs two subprocesses, too much to pay on every tool call, so
+each directory's answer is kept in CACHE_PATH and asked again only after
+CACHE_TTL_SECONDS (in case a remote moved or a repository was cloned where
+there was none). The same file holds the registry of names given out: the
+first repository to claim a name keeps it, and a different one that would
+collide with it is named after its remote's owner/repo, or failing that
+after its parent directory.
+
+Standard library only, like event_store.py.
+"""
+
+import fcntl
+import json
+import os
+import re
+import subprocess
+import time
+from pathlib import Path
+
+CACHE_PATH = Path.home() / ".claude" / "project-names.json"
+CACHE_TTL_SECONDS = 24 * 60 * 60
+GIT_TIMEOUT_SECONDS = 2
+
+HOME = os.path.expanduser("~")
+
+# worktrunk's sibling directory for a repository's worktrees, as in
+# herdr/plugins/notifications/agent_alerts.py; used when git cannot say.
+WORKTREE_SUFFIX = ".worktrees"
+
+REMOTE_SLUG = re.compile(r"(?:[:/])([^/:]+/[^/]+?)(?:\.git)?/?$")
+
+_cache = None
+
+
+def git(path, *args):
+    """git's output in `path`, or None if it fails or is not installed."""
+    try:
+        completed = subprocess.run(
+            ["git", "-C", path, *args],
+            capture_output=True,
+            text=True,
+            timeout=GIT_TIMEOUT_SECONDS,
+            check=False,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() if completed.returncode == 0 else None
+
+
+def inspect(path):
+    """Ask git where `path`'s repository is checked out, and its origin."""
+    found = git(
+        path,
+        "rev-parse",
+        "--path-format=absolute",
+        "--show-toplevel",
+        "--git-common-dir",
+    )
+    if not found or len(found.splitlines()) != 2:
+        parent = os.path.dirname(path)
+        if os.path.basename(parent).endswith(WORKTREE_SUFFIX):
+            return {
+                "toplevel": path,
+                "repository": parent[: -len(WORKTREE_SUFFIX)],
+                "remote": None,
+            }
+        return {"toplevel": None, "repository": None, "remote": None}
+    toplevel, common_dir = found.splitlines()
+    # The common git directory is the main checkout's .git, for a worktree
+    # as for the checkout itself; a bare repository has no .git to strip.
+    repository = (
+        os.path.dirname(common_dir)
+        if os.path.basename(common_dir) == ".git"
+        else common_dir
+    )
+    return {
+        "toplevel": toplevel,
+        "repository": repository,
+        "remote": git(path, "config", "--get", "remote.origin.url"),
+    }
+
+
+def load_cache(cache_path=CACHE_PATH):
+    try:
+        cache = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        return {"paths": {}, "names": {}}
+    return (
+        cache
+        if isinstance(cache, dict) and {"paths", "names"} <= cache.keys()
+        else {"paths": {}, "names": {}}
+    )
+
+
+def claim_name(names, repository, remote):
+    """The name for a repository, registering it if it is new."""
+    identity = remote or repository
+    for name, owner in names.items():
+        if owner == identity:
+            return name
+    candidates = [os.path.basename(repository.rstrip("/"))]
+    if remote and (match := REMOTE_SLUG.search(remote)):
+        candidates.append(match[1])
+    candidates.append(
+        f"{os.path.basename(os.path.dirname(repository.rstrip('/')))}/{candidates[0]}"
+    )
+    for name in candidates:
+        if names.get(name, identity) == identity:
+            names[name] = identity
+            return name
+    names[repository] = identity
+    return repository
+
+
+def save(path, entry, cache_path):
+    """Add one directory's answer to the cache file, naming its repository.
+
+    The file is re-read under a lock, so two hooks resolving new
+    directories at once cannot lose one another's entry or give one name
+    to two repositories, and replaced whole, so a reader never sees half.
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path.with_name(cache_path.name + ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        cache = load_cache(cache_path)
+        if entry["repository"]:
+            entry["name"] = claim_name(
+                cache["names"], entry["repository"], entry["remote"]
+            )
+        cache["paths"][path] = entry
+        temporary = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.new")
+        temporary.write_text(json.dumps(cache, indent=2, sort_keys=True))
+        os.replace(temporary, cache_path)
+    return cache
+
+
+def resolve(path, cache_path=CACHE_PATH, now=None):
+    """Everything known about the project at `path`.
+
+    A dict of its name, the toplevel of the checkout it is in, the main
+    checkout of that repository and its origin remote; the last three are
+    None outside a repository.
+    """
+    global _cache
+    now = now if now is not None else time.time()
+    path = os.path.normpath(path)
+    if _cache is None or _cache[0] != cache_path:
+        _cache = (cache_path, load_cache(cache_path))
+    entry = _cache[1]["paths"].get(path)
+    if entry and now - entry.get("checked_at", 0) < CACHE_TTL_SECONDS:
+        return entry
+
+    entry = {**inspect(path), "name": fallback_name(path), "checked_at": now}
+    try:
+        _cache = (cache_path, save(path, entry, cache_path))
+    except OSError:
+        # Unsaved, the answer still serves this process.
+        if entry["repository"]:
+            entry["name"] = claim_name(
+                _cache[1]["names"], entry["repository"], entry["remote"]
+            )
+        _cache[1]["paths"][path] = entry
+    return entry
+
+
+def fallback_name(path):
+    if path == HOME:
+        return "home"
+    if path == "/":
+        return "root"
+    return os.path.basename(path)
+
+
+def project_name(project_dir=None, cwd=None):
+    """The name of the project at `project_dir`, or else `cwd`, or else here."""
+    path = os.path.normpath(project_dir or cwd or os.getcwd())
+    if path in (HOME, "/"):
+        return fallback_name(path)
+    return resolve(path)["name"]
@@ -0,0 +1,122 @@
+"""Tests for naming projects by repository, through a cache.
+
+A project's name is written into every event, so it has to be the same for
+every directory of a repository, different for two repositories, and come
+from the cache, without running git, once a directory has been seen.
+
+Run with: uv run --with pytest pytest claude/hooks/project_names_test.py
+"""
+
+import os
+import subprocess
+
+import pytest
+
+import project_names
+
+
+def repository(path, remote=None):
+    path.mkdir(parents=True)
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    subprocess.run(
+        [
+            "git",
+            "-C",
+            str(path),
+            "-c",
+            "user.name=t",
+            "-c",
+            "user.email=t@t",
+            "commit",
+            "-q",
+            "--allow-empty",
+            "-m",
+            "init",
+        ],
+        check=True,
+    )
+    if remote:
+        subprocess.run(
+            ["git", "-C", str(path), "remote", "add", "origin", remote], check=True
+        )
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(project_names, "_cache", None)
+    return tmp_path / "project-names.json"
+
+
+def name(path, cache):
+    return project_names.resolve(str(path), cache)["name"]
+
+
+def test_worktrees_and_subdirectories_are_named_after_the_repository(tmp_path, cache):
+    app = repository(tmp_path / "app")
+    (app / "src").mkdir()
+    worktree = tmp_path / "app.worktrees" / "fix-login"
+    subprocess.run(
+        ["git", "-C", str(app), "worktree", "add", "-q", str(worktree)], check=True
+    )
+
+    assert [name(path, cache) for path in (app, app / "src", worktree)] == [
+        "app",
+        "app",
+        "app",
+    ]
+    assert project_names.resolve(str(worktree), cache)["toplevel"] == os.path.realpath(
+        worktree
+    )
+
+
+def test_two_checkouts_with_one_name_are_told_apart_by_their_remotes(tmp_path, cache):
+    work = repository(tmp_path / "work" / "api", "git@github.com:acme/api.git")
+    side = repository(tmp_path / "side" / "api", "https://github.com/me/api")
+    plain = repository(tmp_path / "scratch" / "api")
+
+    assert [name(path, cache) for path in (work, side, plain)] == [
+        "api",
+        "me/api",
+        "scratch/api",
+    ]
+    project_names._cache = None
+    assert name(side, cache) == "me/api"
+
+
+def test_a_directory_seen_before_is_named_without_running_git(
+    tmp_path, cache, monkeypatch
+):
+    app = repository(tmp_path / "app")
+    name(app, cache)
+    project_names._cache = None
+
+    def no_git(*args, **kwargs):
+        raise AssertionError("git was run")
+
+    monkeypatch.setattr(project_names.subprocess, "run", no_git)
+
+    assert name(app, cache) == "app"
+
+
+def test_a_cached_answer_is_checked_again_once_it_expires(tmp_path, cache):
+    plain = tmp_path / "later"
+    plain.mkdir()
+    assert project_names.resolve(str(plain), cache, now=0)["repository"] is None
+
+    subprocess.run(["git", "init", "-q", str(plain)], check=True)
+
+    assert project_names.resolve(str(plain), cache, now=1)["repository"] is None
+    assert project_names.resolve(
+        str(plain), cache, now=project_names.CACHE_TTL_SECONDS
+    )["repository"] == os.path.realpath(plain)
+
+
+def test_outside_a_repository_a_worktree_directory_still_names_its_repository(
+    tmp_path, cache
+):
+    branch = tmp_path / "app.worktrees" / "fix-login"
+    branch.mkdir(parents=True)
+
+    assert name(branch, cache) == "app"
+    assert name(tmp_path, cache) == tmp_path.name
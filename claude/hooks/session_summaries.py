@@ -0,0 +1,149 @@
+"""The per-session aggregates of sessions that have ended.
+
+Comparing sessions means aggregating each one's events: how many of each
+type and tool, the errors, the time spent in tools. An ended session no
+longer changes, so its aggregates are stored once in session_summaries and
+read back from there.
+
+Only this machine's maintenance pass writes them (see event_maintenance.py).
+The dashboard and the other readers open every database read-only,
+including copies synced from other machines, which arrive with their own
+machine's summaries. What is not stored yet, such as a running session or
+one that ended since the last pass, a reader aggregates and keeps in memory.
+
+A pass summarizes the sessions with events stored since the last one, read
+by id from the CHECKPOINT row, STEP sessions to a transaction. A row keeps
+the newest event id it counted, so a replay that adds older events to an
+ended session shows the stored row is stale until the next pass redoes it.
+
+Standard library only, like event_store.py.
+"""
+
+import sqlite3
+
+import event_store
+
+CHECKPOINT = "session_summaries.last_id"
+
+# Sessions aggregated and stored per transaction.
+STEP = 200
+
+# One pass over the sessions' events through idx_session_created. Tool time
+# pairs each PostToolUse(Failure) with the PreToolUse just before it for the
+# same tool; created_at has one-second resolution, so short calls count 0.
+# A Post whose Pre was sampled out (see capture_policy.py) counts as a call
+# with no time.
+SESSION_SUMMARY_SQL = """
+    WITH ev AS (
+        SELECT id, session_id, project_name, hook_type, tool_name, status, created_at
+        FROM claude_events WHERE session_id IN ({placeholders})
+    ),
+    calls AS (
+        SELECT session_id, hook_type, created_at,
+               LAG(hook_type) OVER w AS previous_hook,
+               LAG(created_at) OVER w AS previous_at
+        FROM ev
+        WHERE hook_type IN ('PreToolUse', 'PostToolUse', 'PostToolUseFailure')
+        WINDOW w AS (PARTITION BY session_id, tool_name ORDER BY id)
+    ),
+    tool_time AS (
+        SELECT session_id,
+               ROUND(SUM((julianday(created_at) - julianday(previous_at)) * 86400), 1) AS seconds
+        FROM calls
+        WHERE hook_type != 'PreToolUse' AND previous_hook = 'PreToolUse'
+        GROUP BY session_id
+    ),
+    types AS (
+        SELECT session_id, json_group_object(hook_type, n) AS counts
+        FROM (SELECT session_id, hook_type, COUNT(*) AS n FROM ev GROUP BY 1, 2)
+        GROUP BY session_id
+    ),
+    tools AS (
+        SELECT session_id, json_group_object(tool_name, n) AS counts
+        FROM (
+            SELECT session_id, tool_name, COUNT(*) AS n FROM ev
+            WHERE hook_type IN ('PostToolUse', 'PostToolUseFailure') GROUP BY 1, 2
+        )
+        GROUP BY session_id
+    ),
+    totals AS (
+        SELECT session_id,
+               MAX(project_name) AS project_name,
+               MIN(created_at) AS started_at,
+               MAX(created_at) AS ended_at,
+               COUNT(*) AS event_count,
+               SUM(status = 'error') AS error_count,
+               MAX(hook_type = 'SessionEnd') AS ended,
+               MAX(id) AS last_id
+        FROM ev GROUP BY session_id
+    )
+    SELECT totals.*,
+           COALESCE(tool_time.seconds, 0) AS tool_seconds,
+           types.counts AS type_counts,
+           COALESCE(tools.counts, '{{}}') AS tool_counts
+    FROM totals
+    JOIN types USING (session_id)
+    LEFT JOIN tools USING (session_id)
+    LEFT JOIN tool_time USING (session_id)
+"""
+
+STORE_SQL = """
+    INSERT OR REPLACE INTO session_summaries (
+        session_id, project_name, started_at, ended_at, event_count,
+        error_count, tool_seconds, type_counts, tool_counts, last_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+STORED_COLUMNS = (
+    "session_id",
+    "project_name",
+    "started_at",
+    "ended_at",
+    "event_count",
+    "error_count",
+    "tool_seconds",
+    "type_counts",
+    "tool_counts",
+    "last_id",
+)
+
+
+def summarize(conn, step=STEP):
+    """Store the summaries of ended sessions with new events; return how many."""
+    last_id = (event_store.read_checkpoint(conn, CHECKPOINT) or {}).get("last_id", 0)
+    newest = conn.execute("SELECT MAX(id) FROM claude_events").fetchone()[0] or 0
+    sessions = [
+        session
+        for (session,) in conn.execute(
+            "SELECT DISTINCT session_id FROM claude_events WHERE id > ? AND id <= ? AND session_id IS NOT NULL",
+            (last_id, newest),
+        )
+    ]
+
+    stored = 0
+    for start in range(0, len(sessions), step):
+        batch = sessions[start : start + step]
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        computed = cursor.execute(
+            SESSION_SUMMARY_SQL.format(placeholders=",".join("?" * len(batch))), batch
+        )
+        ended = [
+            tuple(row[column] for column in STORED_COLUMNS)
+            for row in computed
+            if row["ended"]
+        ]
+
+        def commit(ended=ended):
+            with conn:
+                conn.executemany(STORE_SQL, ended)
+
+        event_store.retry_when_locked(commit)
+        stored += len(ended)
+
+    def finish():
+        with conn:
+            event_store.write_checkpoint(conn, CHECKPOINT, {"last_id": newest})
+
+    event_store.retry_when_locked(finish)
+    return stored
@@ -0,0 +1,96 @@
+"""Tests for storing the summaries of ended sessions.
+
+Only ended sessions may be stored, each pass must pick up only the
+sessions with new events, and a stored row must be redone when an ended
+session gains events later.
+
+Run with: uv run --with pytest pytest claude/hooks/session_summaries_test.py
+"""
+
+import pytest
+
+import event_store
+import session_summaries
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = event_store.ensure_database(tmp_path / "events.db")
+    yield conn
+    conn.close()
+
+
+def store(conn, events):
+    stored = conn.execute("SELECT COUNT(*) FROM claude_events").fetchone()[0]
+    rows = []
+    for number, (session, hook, created_at) in enumerate(events, start=stored):
+        event = {"session_id": session, "hook_event_name": hook, "tool_name": "Bash"}
+        context = {
+            "event_id": f"e{number}",
+            "project_dir": "/dev/app",
+            "environment": {},
+            "created_at": created_at,
+        }
+        rows.append(event_store.build_row(event, context))
+    event_store.insert_rows(conn, rows)
+
+
+def stored(conn):
+    return dict(
+        conn.execute("SELECT session_id, event_count FROM session_summaries").fetchall()
+    )
+
+
+def test_only_ended_sessions_are_stored(conn):
+    store(
+        conn,
+        [
+            ("done", "SessionStart", "2026-10-01 09:00:00"),
+            ("done", "PreToolUse", "2026-10-01 09:00:01"),
+            ("done", "PostToolUse", "2026-10-01 09:00:03"),
+            ("done", "SessionEnd", "2026-10-01 09:01:00"),
+            ("running", "SessionStart", "2026-10-01 09:02:00"),
+        ],
+    )
+
+    assert session_summaries.summarize(conn) == 1
+    assert stored(conn) == {"done": 4}
+    assert (
+        conn.execute("SELECT tool_seconds FROM session_summaries").fetchone()[0] == 2.0
+    )
+
+
+def test_a_pass_only_redoes_sessions_with_new_events(conn):
+    store(
+        conn,
+        [
+            ("a", "SessionEnd", "2026-10-01 09:00:00"),
+            ("b", "SessionEnd", "2026-10-01 09:00:00"),
+        ],
+    )
+    session_summaries.summarize(conn)
+
+    assert session_summaries.summarize(conn) == 0
+
+    store(conn, [("b", "Notification", "2026-10-01 08:59:00")])
+    assert session_summaries.summarize(conn, step=1) == 1
+    assert stored(conn) == {"a": 1, "b": 2}
+
+
+def test_a_failed_call_stored_without_its_pre_counts_with_no_time(conn):
+    store(
+        conn,
+        [
+            ("s", "PreToolUse", "2026-10-01 09:00:00"),
+            ("s", "PostToolUse", "2026-10-01 09:00:02"),
+            ("s", "PostToolUseFailure", "2026-10-01 09:00:09"),
+            ("s", "SessionEnd", "2026-10-01 09:01:00"),
+        ],
+    )
+
+    session_summaries.summarize(conn)
+
+    row = conn.execute(
+        "SELECT tool_seconds, tool_counts FROM session_summaries"
+    ).fetchone()
+    assert row == (2.0, '{"Bash":2}')
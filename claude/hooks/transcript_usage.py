@@ -0,0 +1,203 @@
+"""Token usage from the transcripts Claude Code events point at.
+
+Every hook payload carries `transcript_path`, the session's JSONL
+transcript. Each assistant line in it has the API message's model and token
+usage. This reads those into `token_usage`, whose triggers keep the
+per-session and per-project rollups (see MIGRATIONS[5] in event_store.py).
+
+Transcripts are appended to all session long and grow large, so nothing is
+read twice: each transcript's byte offset is stored with the rows read up to
+it, in the same transaction. Only complete lines are consumed; a line still
+being written is picked up on the next pass. A transcript that shrinks or is
+replaced (a different inode) is read again from the start, and the message
+ID keeps its messages from being counted twice.
+
+New transcripts are found from the events stored since the last pass, by id,
+so finding them does not scan the events table either.
+
+Standard library only, like event_store.py.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+import event_store
+
+CHECKPOINT = "transcript_usage.last_event_id"
+
+# Discovery walks new events in id ranges of this size, one transaction each.
+DISCOVERY_STEP = 50_000
+
+# At most this much of one transcript is read per transaction.
+MAX_CHUNK_BYTES = 8 * 1024 * 1024
+
+UPSERT_USAGE_SQL = """
+    INSERT INTO token_usage VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (message_id) DO UPDATE SET
+        input_tokens = excluded.input_tokens,
+        output_tokens = excluded.output_tokens,
+        cache_creation_tokens = excluded.cache_creation_tokens,
+        cache_read_tokens = excluded.cache_read_tokens
+    WHERE excluded.input_tokens + excluded.output_tokens
+          + excluded.cache_creation_tokens + excluded.cache_read_tokens
+        > token_usage.input_tokens + token_usage.output_tokens
+          + token_usage.cache_creation_tokens + token_usage.cache_read_tokens
+"""
+
+
+def discover_transcripts(conn, step=DISCOVERY_STEP):
+    """Record the transcripts of events stored since the last pass; return how many are new."""
+    last_id = event_store.read_checkpoint(conn, CHECKPOINT, 0)
+    newest = conn.execute("SELECT MAX(id) FROM claude_events").fetchone()[0] or 0
+    found = 0
+    while last_id < newest:
+        upper = min(last_id + step, newest)
+
+        def record(lower=last_id, upper=upper):
+            with conn:
+                cursor = conn.execute(
+                    """
+                    INSERT OR IGNORE INTO transcript_offsets (transcript_path, session_id, project_name)
+                    SELECT transcript_path, MIN(session_id), MIN(project_name)
+                    FROM claude_events
+                    WHERE id > ? AND id <= ? AND transcript_path IS NOT NULL
+                    GROUP BY transcript_path
+                    """,
+                    (lower, upper),
+                )
+                event_store.write_checkpoint(conn, CHECKPOINT, upper)
+                return cursor.rowcount
+
+        found += event_store.retry_when_locked(record)
+        last_id = upper
+    return found
+
+
+def parse_usage(line):
+    """(message_id, session_id, model, created_at, usage) for an assistant line, else None."""
+    # Most lines are tool results and user turns; skip them unparsed.
+    if b'"usage"' not in line:
+        return None
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(entry, dict) or entry.get("type") != "assistant":
+        return None
+    message = entry.get("message")
+    if not isinstance(message, dict):
+        return None
+    usage = message.get("usage")
+    message_id = message.get("id") or entry.get("uuid")
+    # Claude Code writes "<synthetic>" messages for its own notices; no API call.
+    if (
+        not isinstance(usage, dict)
+        or not message_id
+        or message.get("model") == "<synthetic>"
+    ):
+        return None
+    return (
+        message_id,
+        entry.get("sessionId"),
+        message.get("model") or "",
+        transcript_time(entry.get("timestamp")),
+        usage,
+    )
+
+
+def transcript_time(value):
+    """A transcript's ISO timestamp as a stored UTC timestamp."""
+    try:
+        moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        moment = datetime.now(timezone.utc)
+    if moment.tzinfo:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime(event_store.SQLITE_TIMESTAMP_FORMAT)
+
+
+def index_transcript(
+    conn, path, session_id, project_name, inode, offset, max_bytes=MAX_CHUNK_BYTES
+):
+    """Read what was appended to one transcript since `offset`; return messages stored."""
+    stored = 0
+    try:
+        f = open(path, "rb")
+    except OSError:
+        # Deleted, or on a machine that synced the database but not the
+        # transcripts. The offset stays, in case it comes back.
+        return 0
+    with f:
+        info = os.fstat(f.fileno())
+        if info.st_ino != inode or info.st_size < offset:
+            offset = 0
+        while offset < info.st_size:
+            f.seek(offset)
+            data = f.read(max_bytes)
+            if len(data) == max_bytes and b"\n" not in data:
+                data += f.readline()  # one line larger than a chunk
+            end = data.rfind(b"\n") + 1
+            if not end:
+                break  # the last line is still being written
+            rows = []
+            for line in data[:end].splitlines():
+                parsed = parse_usage(line)
+                if parsed is None:
+                    continue
+                message_id, line_session, model, created_at, usage = parsed
+                rows.append(
+                    (
+                        message_id,
+                        line_session or session_id or "",
+                        project_name or "",
+                        model,
+                        created_at,
+                        int(usage.get("input_tokens") or 0),
+                        int(usage.get("output_tokens") or 0),
+                        int(usage.get("cache_creation_input_tokens") or 0),
+                        int(usage.get("cache_read_input_tokens") or 0),
+                    )
+                )
+            offset += end
+
+            def commit(rows=rows, offset=offset):
+                with conn:
+                    conn.executemany(UPSERT_USAGE_SQL, rows)
+                    conn.execute(
+                        "UPDATE transcript_offsets SET inode = ?, offset = ?, indexed_at = ? "
+                        "WHERE transcript_path = ?",
+                        (
+                            info.st_ino,
+                            offset,
+                            datetime.now(timezone.utc).strftime(
+                                event_store.SQLITE_TIMESTAMP_FORMAT
+                            ),
+                            str(path),
+                        ),
+                    )
+
+            event_store.retry_when_locked(commit)
+            stored += len(rows)
+    return stored
+
+
+def index_transcripts(conn, max_bytes=MAX_CHUNK_BYTES):
+    """One indexing pass over every known transcript; return its counts."""
+    discovered = discover_transcripts(conn)
+    transcripts = conn.execute(
+        "SELECT transcript_path, session_id, project_name, inode, offset FROM transcript_offsets"
+    ).fetchall()
+    read = messages = 0
+    for path, session_id, project_name, inode, offset in transcripts:
+        try:
+            info = os.stat(path)
+        except OSError:
+            continue
+        if info.st_ino == inode and info.st_size == offset:
+            continue
+        read += 1
+        messages += index_transcript(
+            conn, path, session_id, project_name, inode, offset, max_bytes
+        )
+    return {"discovered": discovered, "read": read, "messages": messages}
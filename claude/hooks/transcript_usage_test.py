@@ -0,0 +1,101 @@
+"""Tests for reading token usage out of session transcripts.
+
+Transcripts are read a piece at a time as they grow, so what matters is that
+the rollups come out the same however the appends fall between passes: a
+message is counted once, and a line is read only when it is complete.
+
+Run with: uv run --with pytest pytest claude/hooks/transcript_usage_test.py
+"""
+
+import json
+
+import pytest
+
+import event_store
+import transcript_usage
+
+
+def assistant(message_id, output_tokens, timestamp="2026-10-01T12:00:00.000Z"):
+    line = {
+        "type": "assistant",
+        "sessionId": "s1",
+        "timestamp": timestamp,
+        "message": {
+            "id": message_id,
+            "model": "claude-sonnet-4-5",
+            "usage": {
+                "input_tokens": 10,
+                "output_tokens": output_tokens,
+                "cache_creation_input_tokens": 100,
+                "cache_read_input_tokens": 1000,
+            },
+        },
+    }
+    return json.dumps(line) + "\n"
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = event_store.ensure_database(tmp_path / "events.db")
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def transcript(tmp_path, conn):
+    path = tmp_path / "s1.jsonl"
+    path.write_text("")
+    event = {
+        "hook_event_name": "Stop",
+        "session_id": "s1",
+        "cwd": "/tmp/app",
+        "transcript_path": str(path),
+    }
+    event_store.insert_rows(
+        conn, [event_store.build_row(event, event_store.capture_context(event))]
+    )
+    return path
+
+
+def session_usage(conn):
+    return conn.execute(
+        "SELECT project_name, model, messages, input_tokens, output_tokens, "
+        "cache_creation_tokens, cache_read_tokens FROM session_usage WHERE session_id = 's1'"
+    ).fetchall()
+
+
+def test_appends_across_passes_count_each_message_once_at_its_final_size(
+    conn, transcript
+):
+    user_turn = json.dumps({"type": "user", "message": {"content": "hi"}}) + "\n"
+    second = assistant("msg_2", 7)
+    with open(transcript, "a") as f:
+        # A message split over two lines, its usage growing, then half a line.
+        f.write(user_turn + assistant("msg_1", 1) + assistant("msg_1", 5) + second[:20])
+    transcript_usage.index_transcripts(conn)
+    first_pass = session_usage(conn)
+
+    with open(transcript, "a") as f:
+        f.write(second[20:])
+    transcript_usage.index_transcripts(conn)
+
+    assert first_pass == [("app", "claude-sonnet-4-5", 1, 10, 5, 100, 1000)]
+    assert session_usage(conn) == [("app", "claude-sonnet-4-5", 2, 20, 12, 200, 2000)]
+    assert conn.execute("SELECT offset FROM transcript_offsets").fetchone()[0] == (
+        transcript.stat().st_size
+    )
+
+
+def test_a_transcript_rewritten_from_scratch_is_read_again_without_double_counting(
+    conn, transcript
+):
+    transcript.write_text(assistant("msg_1", 5) + assistant("msg_2", 7))
+    transcript_usage.index_transcripts(conn)
+
+    transcript.write_text(assistant("msg_1", 5))
+    transcript_usage.index_transcripts(conn)
+
+    totals = conn.execute(
+        "SELECT day, messages, output_tokens FROM project_usage WHERE project_name = 'app'"
+    ).fetchall()
+    assert totals == [("2026-10-01", 2, 12)]
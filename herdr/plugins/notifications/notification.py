@@ -13,6 +13,13 @@ import subprocess
 import sys
 import tempfile
 import time
+from pathlib import Path
+
+# The Claude event hooks name projects the same way; this plugin runs from
+# the dotfiles checkout, beside them.
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "claude" / "hooks"))
+
+import project_names  # noqa: E402
 
 
 def get_dedup_file():
@@ -56,18 +63,6 @@ def should_skip_notification(event_key, dedup_window=5.0):
         return False
 
 
-def extract_project_name(project_dir=None, cwd=None):
-    """Extract project name from directory path."""
-    path = project_dir or cwd or os.getcwd()
-    # Handle special cases
-    if path == os.path.expanduser("~"):
-        return "home"
-    if path == "/":
-        return "root"
-    # Get last component of path
-    return os.path.basename(os.path.normpath(path))
-
-
 def get_custom_sound(sound_type):
     """Get a random sound file from the specified sounds subdirectory."""
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -108,7 +103,7 @@ def format_notification_message(event_data, context):
     title = f"{agent_name} {'Finished' if status == 'done' else 'Needs Input'}"
 
     project_dir = context.get("workspace_cwd") or context.get("focused_pane_cwd")
-    project_name = extract_project_name(project_dir, project_dir)
+    project_name = project_names.project_name(project_dir)
     body = f"Project: {project_name}" if project_name not in ["home", "root"] else status
 
     return title, body
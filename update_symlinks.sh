@@ -68,6 +68,47 @@ if [ "$(uname -s)" = "Darwin" ]; then
     launchctl bootout "gui/$(id -u)" ${AGENT_ALERTS_PLIST} 2>/dev/null
     launchctl bootstrap "gui/$(id -u)" ${AGENT_ALERTS_PLIST}
     echo " ...herdr agent alerts job reloaded"
+
+    # Drains events that capture-event.py spools in --spool mode. Harmless
+    # when nothing spools: each pass finds an empty spool and exits.
+    EVENTS_DRAIN_PLIST=~/Library/LaunchAgents/dev.bobnadler.claude-events-drain.plist
+
+    echo " ...removing ${EVENTS_DRAIN_PLIST}"
+    rm -f ${EVENTS_DRAIN_PLIST}
+    ln -s ${DIR}/claude/launchd/dev.bobnadler.claude-events-drain.plist ${EVENTS_DRAIN_PLIST}
+    launchctl bootout "gui/$(id -u)" ${EVENTS_DRAIN_PLIST} 2>/dev/null
+    launchctl bootstrap "gui/$(id -u)" ${EVENTS_DRAIN_PLIST}
+    echo " ...claude events drain job reloaded"
+
+    # Reads token usage from session transcripts for the dashboard.
+    TRANSCRIPTS_PLIST=~/Library/LaunchAgents/dev.bobnadler.claude-events-index-transcripts.plist
+
+    echo " ...removing ${TRANSCRIPTS_PLIST}"
+    rm -f ${TRANSCRIPTS_PLIST}
+    ln -s ${DIR}/claude/launchd/dev.bobnadler.claude-events-index-transcripts.plist ${TRANSCRIPTS_PLIST}
+    launchctl bootout "gui/$(id -u)" ${TRANSCRIPTS_PLIST} 2>/dev/null
+    launchctl bootstrap "gui/$(id -u)" ${TRANSCRIPTS_PLIST}
+    echo " ...claude transcript indexer job reloaded"
+
+    # Alerts on tool bursts, error spikes and silent sessions in the events.
+    EVENTS_ALERTS_PLIST=~/Library/LaunchAgents/dev.bobnadler.claude-events-alerts.plist
+
+    echo " ...removing ${EVENTS_ALERTS_PLIST}"
+    rm -f ${EVENTS_ALERTS_PLIST}
+    ln -s ${DIR}/claude/launchd/dev.bobnadler.claude-events-alerts.plist ${EVENTS_ALERTS_PLIST}
+    launchctl bootout "gui/$(id -u)" ${EVENTS_ALERTS_PLIST} 2>/dev/null
+    launchctl bootstrap "gui/$(id -u)" ${EVENTS_ALERTS_PLIST}
+    echo " ...claude events alerts job reloaded"
+
+    # Checkpoints the events database's WAL and records its health.
+    EVENTS_MAINTAIN_PLIST=~/Library/LaunchAgents/dev.bobnadler.claude-events-maintain.plist
+
+    echo " ...removing ${EVENTS_MAINTAIN_PLIST}"
+    rm -f ${EVENTS_MAINTAIN_PLIST}
+    ln -s ${DIR}/claude/launchd/dev.bobnadler.claude-events-maintain.plist ${EVENTS_MAINTAIN_PLIST}
+    launchctl bootout "gui/$(id -u)" ${EVENTS_MAINTAIN_PLIST} 2>/dev/null
+    launchctl bootstrap "gui/$(id -u)" ${EVENTS_MAINTAIN_PLIST}
+    echo " ...claude events maintenance job reloaded"
 fi
 
 echo " ...removing ~/.claude/CLAUDE.md"